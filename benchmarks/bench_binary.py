@@ -0,0 +1,60 @@
+"""
+    Benchmark of loading problems from the binary format against parsing them.
+
+    Generates a roads-like problem with the requested number of :init atoms,
+    parses it, saves it with pypddl.binary.dump, and reports the size of both
+    files and the time to parse the PDDL file and to load the binary one,
+    eagerly and with lazy=True (then decoding the init atoms).
+
+    Usage:
+        python benchmarks/bench_binary.py --atoms 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pypddl.pddlparser import PDDLParser
+from pypddl import binary
+
+from bench_writer import write_problem
+
+
+def best_time(step, repeat):
+    """Least time of repeat runs of step()."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = step()
+        times.append(time.perf_counter() - start)
+        del result
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the binary format against parsing.')
+    parser.add_argument('--atoms', type=int, default=1000000,
+                        help='number of :init atoms of the problem (default: %(default)s)')
+    parser.add_argument('--locations', type=int, default=1000,
+                        help='number of objects the atoms range over (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs of each step, the best is reported (default: %(default)s)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename, saved = os.path.join(tmp, 'problem.pddl'), os.path.join(tmp, 'problem.bin')
+        write_problem(filename, args.atoms, args.locations)
+        binary.dump(PDDLParser.parse(filename), saved)
+
+        parse_time = best_time(lambda: PDDLParser.parse(filename).init, args.repeat)
+        load_time = best_time(lambda: binary.load(saved), args.repeat)
+        lazy_time = best_time(lambda: binary.load(saved, lazy=True), args.repeat)
+        lazy_init_time = best_time(lambda: binary.load(saved, lazy=True).init, args.repeat)
+        sizes = os.path.getsize(filename), os.path.getsize(saved)
+
+    print('{} atoms'.format(args.atoms))
+    print('{:<22} {:>8} {:>8}'.format('', 's', 'MB'))
+    print('{:<22} {:>8.3f} {:>8.1f}'.format('parse PDDL', parse_time, sizes[0] / 1e6))
+    print('{:<22} {:>8.3f} {:>8.1f}'.format('load', load_time, sizes[1] / 1e6))
+    print('{:<22} {:>8.3f}'.format('load lazy', lazy_time))
+    print('{:<22} {:>8.3f}'.format('load lazy + init', lazy_init_time))
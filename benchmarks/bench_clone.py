@@ -0,0 +1,70 @@
+"""
+    Benchmark of deriving problem variants from one parse.
+
+    Generates a roads-like problem with the requested number of :init atoms,
+    parses it once, then derives variants that each add one fact, either with
+    problem.clone() (copy-on-write) or with copy.deepcopy, reporting the time
+    and the memory (tracemalloc) each variant costs.
+
+    Usage:
+        python benchmarks/bench_clone.py --atoms 100000 --variants 100
+"""
+import argparse
+import copy
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from pypddl.pddlparser import PDDLParser
+from pypddl.predicate import Predicate
+
+
+def write_problem(filename, atoms, locations):
+    """Write a problem whose :init lists atoms road facts."""
+    with open(filename, 'w') as f:
+        f.write('(define (problem roads-bench)\n(:domain roads)\n(:objects')
+        f.write(''.join(' l{}'.format(i) for i in range(locations)))
+        f.write(')\n(:init\n')
+        f.write(''.join('\t(road l{} l{})\n'.format(i % locations, (i // locations) % locations)
+                        for i in range(atoms)))
+        f.write(')\n(:goal (at l0)))\n')
+
+
+def measure(problem, derive, variants):
+    """Derive variants of problem, returning the time and the bytes held per variant."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    derived = []
+    for i in range(variants):
+        variant = derive(problem)
+        variant.add_to_init(Predicate('visited'))
+        derived.append(variant)
+    elapsed = time.perf_counter() - start
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed / variants, current / variants
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark deriving problem variants.')
+    parser.add_argument('--atoms', type=int, default=100000,
+                        help='number of :init atoms of the problem (default: %(default)s)')
+    parser.add_argument('--locations', type=int, default=1000,
+                        help='number of objects the atoms range over (default: %(default)s)')
+    parser.add_argument('--variants', type=int, default=20,
+                        help='number of variants derived (default: %(default)s)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'problem.pddl')
+        write_problem(filename, args.atoms, args.locations)
+        problem = PDDLParser.parse(filename)
+
+    print('{:<10} {:>12} {:>12}'.format('variant', 'ms/variant', 'KB/variant'))
+    for name, derive in (('clone', lambda p: p.clone()),
+                         ('deepcopy', copy.deepcopy)):
+        elapsed, held = measure(problem, derive, args.variants)
+        print('{:<10} {:>12.2f} {:>12.1f}'.format(name, elapsed * 1e3, held / 1e3))
@@ -0,0 +1,82 @@
+"""
+    Benchmark of traversals of action effects.
+
+    Compiles the labeled example of pddl/mtp-example (MTP), then collects the
+    literals of all the effects of the compiled domain, many times, both on
+    the Effect trees (walk and literals) and on their legacy nested list/tuple encoding
+    (to_legacy), which has to be told apart with isinstance checks, and times
+    printing the effects (to_pddl).
+
+    Usage:
+        python benchmarks/bench_effects.py --runs 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pypddl.pddlparser import PDDLParser
+from pypddl.mtp import multi_tier_compilation_domain, multi_tier_compilation_problem
+from pypddl.effects import Probabilistic, walk, literals, to_legacy, to_pddl
+
+
+def legacy_literals(effect, literals):
+    """Collect the literals of a legacy encoded effect."""
+    if isinstance(effect, list):
+        for x in effect:
+            legacy_literals(x, literals)
+    elif isinstance(effect[0], float):
+        literals.append(effect[1])
+    elif effect[0] == 'oneof':
+        legacy_literals(effect[1], literals)
+    elif effect[0] == 'when':
+        legacy_literals(effect[1], literals)
+        legacy_literals(effect[2], literals)
+    elif effect[0] == 'label':
+        legacy_literals(effect[2], literals)
+    else:   # forall
+        legacy_literals(effect[1], literals)
+    return literals
+
+
+def measure(step, runs):
+    """Time per run of step()."""
+    start = time.perf_counter()
+    for _ in range(runs):
+        step()
+    return (time.perf_counter() - start) / runs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark traversals of action effects.')
+    parser.add_argument('--runs', type=int, default=1000,
+                        help='number of traversals (default: %(default)s)')
+    parser.add_argument('--domain', default='pddl/mtp-example/labeled-domain.pddl',
+                        help='labeled domain file (default: %(default)s)')
+    parser.add_argument('--problem', default='pddl/mtp-example/labeled-problem.pddl',
+                        help='labeled problem file (default: %(default)s)')
+    args = parser.parse_args()
+
+    domain = PDDLParser.parse(args.domain)
+    problem = PDDLParser.parse(args.problem)
+    with tempfile.TemporaryDirectory() as tmp:
+        hierarchy, goal = multi_tier_compilation_problem(problem, os.path.join(tmp, 'problem.pddl'))
+        multi_tier_compilation_domain(domain, hierarchy, goal, os.path.join(tmp, 'domain.pddl'))
+
+    trees = [action.effects for action in domain.operators]
+    legacy = [to_legacy(effect) for effect in trees]
+    assert [literals(t) for t in trees] == [legacy_literals(e, []) for e in legacy]
+
+    walk_time = measure(lambda: [[e.literal for e in walk(t) if isinstance(e, Probabilistic)] for t in trees],
+                        args.runs)
+    literals_time = measure(lambda: [literals(t) for t in trees], args.runs)
+    legacy_time = measure(lambda: [legacy_literals(e, []) for e in legacy], args.runs)
+    print_time = measure(lambda: [to_pddl(t) for t in trees], args.runs)
+
+    print('{} actions, {} atomic effects'.format(
+        len(trees), sum(isinstance(e, Probabilistic) for t in trees for e in walk(t))))
+    print('{:<16} {:>10}'.format('traversal', 'us/run'))
+    print('{:<16} {:>10.1f}'.format('walk', walk_time * 1e6))
+    print('{:<16} {:>10.1f}'.format('literals', literals_time * 1e6))
+    print('{:<16} {:>10.1f}'.format('legacy', legacy_time * 1e6))
+    print('{:<16} {:>10.1f}'.format('to_pddl', print_time * 1e6))
@@ -0,0 +1,92 @@
+"""
+    Benchmark of the memory held by parsed problems.
+
+    Generates a roads-like problem with the requested number of ground atoms in
+    its :init section, parses it under tracemalloc and reports the memory that
+    stays allocated per atom once the problem is built. With --copies the same
+    atoms are listed several times, which shows the effect of interning: the
+    repeated atoms share one object and cost only their list slot. With
+    --predicates the same arguments are listed under several predicates (road,
+    road1...), whose atoms share one argument tuple. With
+    --compact the problem is then moved into its array-backed FactStore
+    (needs numpy), whose memory is reported as well.
+
+    What to expect, on 200k atoms: a problem of distinct atoms holds about
+    120 bytes per atom, one Predicate and one argument tuple each, about half
+    of what the dict-backed objects held before interning (about 217 bytes).
+    Interning only saves more when atoms repeat (--copies 4: 38 bytes/atom)
+    or share their arguments (--predicates 4: 80 bytes/atom); a severalfold
+    reduction of distinct atoms needs the FactStore (--compact: 12 bytes per
+    binary atom).
+
+    Usage:
+        python benchmarks/bench_memory.py --atoms 1000000
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from pypddl.pddlparser import PDDLParser
+
+
+def write_problem(filename, atoms, locations, copies, predicates=1):
+    """Write a problem whose :init lists atoms ground atoms, copies times each,
+    each argument pair under predicates predicate names."""
+    names = ['road'] + ['road{}'.format(k) for k in range(1, predicates)]
+    distinct = atoms // copies // predicates
+    with open(filename, 'w') as f:
+        f.write('(define (problem roads-bench)\n(:domain roads)\n(:objects')
+        f.write(''.join(' l{}'.format(i) for i in range(locations)))
+        f.write(')\n(:init\n')
+        for start in range(0, distinct, 10000):
+            chunk = ''.join('\t({} l{} l{})\n'.format(name, i % locations, (i // locations) % locations)
+                            for i in range(start, min(start + 10000, distinct)) for name in names)
+            f.write(chunk * copies)
+        f.write(')\n(:goal (at l0)))\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the memory held by parsed problems.')
+    parser.add_argument('--atoms', type=int, default=1000000,
+                        help='number of :init atoms of the problem (default: %(default)s)')
+    parser.add_argument('--locations', type=int, default=1000,
+                        help='number of objects the atoms range over (default: %(default)s)')
+    parser.add_argument('--copies', type=int, default=1,
+                        help='times each distinct atom is listed (default: %(default)s)')
+    parser.add_argument('--predicates', type=int, default=1,
+                        help='predicates each argument pair is listed under (default: %(default)s)')
+    parser.add_argument('--compact', action='store_true',
+                        help='also measure the problem compacted into a FactStore')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'problem.pddl')
+        write_problem(filename, args.atoms, args.locations, args.copies, args.predicates)
+        PDDLParser.check_string('(:init)')     # build the tables outside the measure
+
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        problem = PDDLParser.parse(filename)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    init = problem.init
+    distinct = len(set(map(id, init)))
+    print('{} atoms ({} distinct objects), parsed in {:.2f} s'.format(len(init), distinct, elapsed))
+    print('held: {:.1f} MB, {:.0f} bytes/atom'.format(current / 1e6, current / len(init)))
+    print('peak: {:.1f} MB, {:.0f} bytes/atom'.format(peak / 1e6, peak / len(init)))
+
+    if args.compact:
+        atoms = len(init)
+        del init
+        start = time.perf_counter()
+        store = problem.compact()
+        elapsed = time.perf_counter() - start
+        print('compacted in {:.2f} s: arrays {:.1f} MB, {:.1f} bytes/atom, {} objects'.format(
+            elapsed, store.nbytes / 1e6, store.nbytes / atoms, len(store.objects)))
@@ -0,0 +1,60 @@
+"""
+    Benchmark of the multi-tier (MTP) compilation and of printing its result.
+
+    Parses the labeled example of pddl/mtp-example several times, then times
+    the compilation of the domains and problems, and the repr of the compiled
+    domain, reporting the peak memory allocated by each step (tracemalloc).
+
+    Usage:
+        python benchmarks/bench_mtp.py --runs 50
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from pypddl.pddlparser import PDDLParser
+from pypddl.mtp import multi_tier_compilation_domain, multi_tier_compilation_problem
+
+
+def measure(step, runs):
+    """Run step(i) for each run, returning the time per run and the peak bytes allocated."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(runs):
+        step(i)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed / runs, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the MTP compilation.')
+    parser.add_argument('--runs', type=int, default=50,
+                        help='number of compilations (default: %(default)s)')
+    parser.add_argument('--domain', default='pddl/mtp-example/labeled-domain.pddl',
+                        help='labeled domain file (default: %(default)s)')
+    parser.add_argument('--problem', default='pddl/mtp-example/labeled-problem.pddl',
+                        help='labeled problem file (default: %(default)s)')
+    args = parser.parse_args()
+
+    domains = [PDDLParser.parse(args.domain) for _ in range(args.runs)]
+    problems = [PDDLParser.parse(args.problem) for _ in range(args.runs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_domain = os.path.join(tmp, 'mtp-domain.pddl')
+        out_problem = os.path.join(tmp, 'mtp-problem.pddl')
+
+        def compile(i):
+            hierarchy, goal = multi_tier_compilation_problem(problems[i], out_problem)
+            multi_tier_compilation_domain(domains[i], hierarchy, goal, out_domain)
+
+        compile_time, compile_peak = measure(compile, args.runs)
+
+    repr_time, repr_peak = measure(lambda i: repr(domains[i]), args.runs)
+
+    print('{:<12} {:>10} {:>12}'.format('step', 'ms/run', 'peak KB'))
+    print('{:<12} {:>10.2f} {:>12.1f}'.format('compilation', compile_time * 1e3, compile_peak / 1e3))
+    print('{:<12} {:>10.2f} {:>12.1f}'.format('repr', repr_time * 1e3, repr_peak / 1e3))
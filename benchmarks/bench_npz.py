@@ -0,0 +1,50 @@
+"""
+    Benchmark of loading a benchmark family from a .npz export (needs numpy).
+
+    Parses the problems of a family (by default the 40 earth_observation
+    problems), exports them with pypddl.columnar.save_family_npz, and reports
+    the time to parse them against the time to load the file, to rebuild the
+    Problem objects, and to decode their :init atoms.
+
+    Usage:
+        python benchmarks/bench_npz.py --problems 'pddl/earth_observation/p*.pddl'
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from pypddl.pddlparser import PDDLParser
+from pypddl import columnar
+
+
+def timed(step):
+    """Run step(), returning its result and the time it took."""
+    start = time.perf_counter()
+    result = step()
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark loading a problem family from .npz.')
+    parser.add_argument('--problems', default='pddl/earth_observation/p*.pddl',
+                        help='glob of the problem files of the family (default: %(default)s)')
+    args = parser.parse_args()
+
+    filenames = sorted(glob.glob(args.problems))
+    problems, parse_time = timed(lambda: [PDDLParser.parse(f) for f in filenames])
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = os.path.join(tmp, 'family.npz')
+        columnar.save_family_npz(problems, saved)
+        size = os.path.getsize(saved)
+        family, load_time = timed(lambda: columnar.load_family_npz(saved))
+    loaded, problems_time = timed(family.problems)
+    _, init_time = timed(lambda: [p.init for p in loaded])
+
+    print('{} problems, {:.2f} MB of npz'.format(len(family), size / 1e6))
+    print('{:<22} {:>8}'.format('', 'ms'))
+    print('{:<22} {:>8.1f}'.format('parse PDDL', parse_time * 1e3))
+    print('{:<22} {:>8.1f}'.format('load npz', load_time * 1e3))
+    print('{:<22} {:>8.1f}'.format('Problem objects', problems_time * 1e3))
+    print('{:<22} {:>8.1f}'.format('decode :init', init_time * 1e3))
@@ -0,0 +1,81 @@
+"""
+    Benchmark of the PDDL input reader.
+
+    Generates doors-like problems whose :init sections hold enough ground atoms
+    to reach each requested size, then times the streaming reader used by
+    PDDLParser against the former line-by-line reader. Throughput (MB/s) should
+    stay flat across sizes, i.e., the reader scales linearly.
+
+    Usage:
+        python benchmarks/bench_read_input.py --sizes 1 10 100 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pypddl.pddlparser import _read_file
+
+
+def legacy_read_input(filename):
+    """The reader PDDLParser used before, kept here as the baseline."""
+    with open(filename, 'r', encoding='utf-8') as file:
+        data = ''
+        for line in file:
+            line = line.rstrip().lower()
+            pos = line.find(';')
+            if pos != -1:
+                line = line[:pos]
+            data += '\n' + line
+    return data
+
+
+def write_problem(filename, size_mb):
+    """Write a problem of roughly size_mb megabytes, mostly :init atoms."""
+    target = size_mb * 1024 * 1024
+    with open(filename, 'w') as f:
+        f.write('(define (problem doors-bench)\n(:domain doors)\n; generated for benchmarking\n(:init\n')
+        written = 0
+        i = 0
+        while written < target:
+            chunk = ''.join('\t(door-in D{0} L{0}) ; door {0}\n\t(open D{0})\n'.format(j)
+                            for j in range(i, i + 10000))
+            f.write(chunk)
+            written += len(chunk)
+            i += 10000
+        f.write(')\n(:goal (player-at L1)))\n')
+
+
+def time_reader(reader, filename, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        reader(filename)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the PDDL input reader.')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1, 10, 100, 500],
+                        help='input sizes in MB (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of timed runs per size, best is reported (default: %(default)s)')
+    parser.add_argument('--skip-legacy', action='store_true', default=False,
+                        help='do not time the former line-by-line reader')
+    args = parser.parse_args()
+
+    print('{:>8} {:>12} {:>12} {:>12} {:>12}'.format('MB', 'stream (s)', 'stream MB/s', 'legacy (s)', 'legacy MB/s'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            filename = os.path.join(tmp, 'problem-{}.pddl'.format(size))
+            write_problem(filename, size)
+            mb = os.path.getsize(filename) / (1024 * 1024)
+
+            stream = time_reader(_read_file, filename, args.repeat)
+            row = '{:>8.1f} {:>12.3f} {:>12.1f}'.format(mb, stream, mb / stream)
+            if not args.skip_legacy:
+                legacy = time_reader(legacy_read_input, filename, args.repeat)
+                row += ' {:>12.3f} {:>12.1f}'.format(legacy, mb / legacy)
+            print(row)
+            os.remove(filename)
@@ -0,0 +1,51 @@
+"""
+    Benchmark of the cold start cost of the parser.
+
+    Each run spawns a fresh interpreter, as a short-lived worker would, and
+    measures inside it the time to import pypddl.pddlparser and the time of the
+    first parse (which loads the lexer and parser tables), against the time of
+    a second parse of the same file.
+
+    Usage:
+        python benchmarks/bench_startup.py --runs 20 pddl/blocksworld/domain.pddl
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+CHILD = '''
+import time
+start = time.perf_counter()
+from pypddl.pddlparser import PDDLParser
+imported = time.perf_counter()
+PDDLParser.parse({filename!r})
+first = time.perf_counter()
+PDDLParser.parse({filename!r})
+second = time.perf_counter()
+print(imported - start, first - imported, second - first)
+'''
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the cold start of the PDDL parser.')
+    parser.add_argument('filename', nargs='?', default='pddl/blocksworld/domain.pddl',
+                        help='PDDL file parsed by each run (default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=20,
+                        help='number of fresh interpreters to start (default: %(default)s)')
+    args = parser.parse_args()
+
+    # warm up the OS caches and make sure the tables exist before measuring
+    subprocess.run([sys.executable, '-c', CHILD.format(filename=args.filename)], check=True,
+                   stdout=subprocess.DEVNULL)
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, '-c', CHILD.format(filename=args.filename)],
+                             check=True, capture_output=True, text=True).stdout
+        samples.append([float(x) * 1000 for x in out.split()])
+
+    print('{:<28} {:>10} {:>10}'.format('(ms over {} runs)'.format(args.runs), 'median', 'max'))
+    for i, label in enumerate(['import pypddl.pddlparser', 'first parse (loads tables)', 'second parse']):
+        column = [s[i] for s in samples]
+        print('{:<28} {:>10.2f} {:>10.2f}'.format(label, statistics.median(column), max(column)))
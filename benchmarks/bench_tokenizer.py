@@ -0,0 +1,53 @@
+"""
+    Benchmark of the tokenizers of the parser.
+
+    Tokenizes every PDDL file under the given directory with the lexer generated
+    by ply and with the master-regex RegexLexer, checks that both produce the
+    same tokens, and reports their token rates.
+
+    Usage:
+        python benchmarks/bench_tokenizer.py --repeat 5 pddl/
+"""
+import argparse
+import glob
+import os
+import time
+
+from pypddl.pddlparser import PDDLParser, _read_file
+
+
+def tokenize(lexer, text):
+    lexer.input(text)
+    lexer.lineno = 1
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in lexer]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the PDDL tokenizers.')
+    parser.add_argument('directory', nargs='?', default='pddl',
+                        help='directory searched recursively for PDDL files (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timing repetitions, the best one is reported (default: %(default)s)')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.directory, '**', '*.pddl'), recursive=True))
+    texts = [_read_file(f) for f in files]
+    lexers = {name: PDDLParser(lexer=name)._lexer for name in ['ply', 'regex']}
+
+    for filename, text in zip(files, texts):
+        if tokenize(lexers['ply'], text) != tokenize(lexers['regex'], text):
+            raise SystemExit('{}: the tokenizers disagree'.format(filename))
+
+    size = sum(len(t) for t in texts)
+    print('{} files, {:.2f} MB'.format(len(files), size / 1e6))
+    print('{:<8} {:>10} {:>12} {:>10}'.format('lexer', 'tokens', 'tokens/s', 'MB/s'))
+    for name, lexer in lexers.items():
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            count = 0
+            for text in texts:
+                lexer.input(text)
+                count += sum(1 for _ in iter(lexer.token, None))   # as the parser reads them
+            best = min(best, time.perf_counter() - start)
+        print('{:<8} {:>10} {:>12.0f} {:>10.2f}'.format(name, count, count / best, size / 1e6 / best))
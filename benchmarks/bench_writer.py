@@ -0,0 +1,69 @@
+"""
+    Benchmark of writing parsed problems back to PDDL.
+
+    Generates a roads-like problem with the requested number of :init atoms,
+    parses it, and writes it to a file both as print(repr(problem)) and with
+    the streaming problem.write(f), reporting the time and the peak memory
+    allocated by each (tracemalloc), and checking that both files are equal.
+
+    Usage:
+        python benchmarks/bench_writer.py --atoms 1000000
+"""
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+import tracemalloc
+
+from pypddl.pddlparser import PDDLParser
+
+
+def write_problem(filename, atoms, locations):
+    """Write a problem whose :init lists atoms road facts."""
+    with open(filename, 'w') as f:
+        f.write('(define (problem roads-bench)\n(:domain roads)\n(:objects')
+        f.write(''.join(' l{}'.format(i) for i in range(locations)))
+        f.write(')\n(:init\n')
+        for start in range(0, atoms, 10000):
+            f.write(''.join('\t(road l{} l{})\n'.format(i % locations, (i // locations) % locations)
+                            for i in range(start, min(start + 10000, atoms))))
+        f.write(')\n(:goal (at l0)))\n')
+
+
+def measure(output, step):
+    """Run step(f) on a new file, returning the time and the peak bytes allocated."""
+    with open(output, 'w') as f:
+        tracemalloc.start()
+        start = time.perf_counter()
+        step(f)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark writing problems back to PDDL.')
+    parser.add_argument('--atoms', type=int, default=1000000,
+                        help='number of :init atoms of the problem (default: %(default)s)')
+    parser.add_argument('--locations', type=int, default=1000,
+                        help='number of objects the atoms range over (default: %(default)s)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'problem.pddl')
+        write_problem(filename, args.atoms, args.locations)
+        problem = PDDLParser.parse(filename)
+        problem.init    # decode outside the measure
+
+        out_repr, out_write = os.path.join(tmp, 'repr.pddl'), os.path.join(tmp, 'write.pddl')
+        repr_time, repr_peak = measure(out_repr, lambda f: print(repr(problem), file=f))
+        write_time, write_peak = measure(out_write, lambda f: (problem.write(f), f.write('\n')))
+        assert filecmp.cmp(out_repr, out_write, shallow=False)
+        size = os.path.getsize(out_write)
+
+    print('{} atoms, {:.1f} MB of PDDL'.format(args.atoms, size / 1e6))
+    print('{:<8} {:>8} {:>10}'.format('writer', 's', 'peak MB'))
+    print('{:<8} {:>8.2f} {:>10.1f}'.format('repr', repr_time, repr_peak / 1e6))
+    print('{:<8} {:>8.2f} {:>10.1f}'.format('write', write_time, write_peak / 1e6))
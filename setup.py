@@ -6,11 +6,32 @@ See:
       https://github.com/pypa/sampleproject/blob/main/setup.py
 """
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 
+import os
 import pathlib
+import sys
 
 here = pathlib.Path(__file__).parent.resolve()
 
+
+class build_py_with_tables(build_py):
+    """Generate the lexer and LALR parser tables and ship them inside the package."""
+
+    def run(self):
+        super().run()
+        if self.dry_run:
+            return
+        sys.path.insert(0, str(here / "src"))
+        try:
+            from pypddl.pddlparser import write_tables
+        except ImportError as e:   # ply not available at build time
+            print("WARNING: parser tables not generated ({}), they will be built on first use".format(e))
+            return
+        finally:
+            sys.path.pop(0)
+        write_tables(os.path.join(self.build_lib, "pypddl"))
+
 # Get the long description from the README file
 long_description = (here / "README.md").read_text(encoding="utf-8")
 
@@ -31,8 +52,10 @@ setup(name='pypddl',
       },
       ####################################################
       install_requires=["ply"],
+      extras_require={"numpy": ["numpy"]},
       packages=find_packages(where="src"),
       package_dir={"": "src"},
+      cmdclass={"build_py": build_py_with_tables},
       # For example, the following would provide a command called `sample` which 
       # executes the function `main` from this package when invoked:
     #   entry_points={  # Optional
@@ -14,6 +14,11 @@
 # along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
 
 
+from pypddl.effects import And, from_legacy, to_legacy
+from pypddl import fingerprint
+from pypddl import writer
+
+
 class Action(object):
 
     def __init__(self, name, params, precond, effects):
@@ -22,12 +27,17 @@ class Action(object):
         :param name: name of the operator (e.g., 'pick-up')
         :param params:  list of Term objects (e.g., '?x' of type 'blocks')
         :param precond: list of Literals objects
-        :param effects: list of Literals objects
+        :param effects: Effect object (see pypddl.effects), or its legacy
+            encoding as nested lists and tuples (e.g., [(1.0, literal), ...])
+
+            The getters return tuples and immutable effects, without copying;
+            edit the action with the setters and add_precond/add_effect.
         """
         self._name    = name
-        self._params  = params
-        self._precond = precond
-        self._effects = effects
+        self._params  = tuple(params)
+        self._precond = tuple(precond)
+        self._effects = from_legacy(effects)
+        self._fingerprint = None    # cached until the action changes
 
     @property
     def name(self):
@@ -35,83 +45,78 @@ class Action(object):
 
     @property
     def params(self):
-        return self._params[:]
+        return self._params
 
     @property
     def precond(self):
-        return self._precond[:]
+        return self._precond
 
     @property
     def effects(self):
-        return self._effects[:]
+        return self._effects
+
+    @property
+    def legacy_effects(self):
+        """
+        :return: the effects encoded as nested lists and tuples (see pypddl.effects.to_legacy)
+        """
+        return to_legacy(self._effects)
 
     @precond.setter
     def precond(self, precond):
-        self._precond = precond
+        self._precond = tuple(precond)
+        self._fingerprint = None
+
+    @effects.setter
+    def effects(self, effects):
+        self._effects = from_legacy(effects)
+        self._fingerprint = None
+
+    def add_precond(self, literal):
+        self._precond += (literal,)
+        self._fingerprint = None
+
+    def add_effect(self, effect):
+        """
+        :param effect: an effect to conjoin with the current ones (e.g., Probabilistic(1.0, literal))
+        """
+        effect = from_legacy(effect)
+        if isinstance(self._effects, And):
+            self._effects = And(self._effects.effects + (effect,))
+        else:
+            self._effects = And((self._effects, effect))
+        self._fingerprint = None
+
+    def fingerprint(self):
+        """
+            Canonical content digest of the action, cached until it changes.
+            The order of the preconditions and of the effects of each (and ...)
+            and (oneof ...) does not matter; the order of the parameters does.
+
+        :return: 128-bit digest as 32 hexadecimal digits
+        """
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint.hexdigest(fingerprint.sequence('action\x00' + self._name, (
+                fingerprint.sequence('parameters', (fingerprint.digest(fingerprint.term_text(p)) for p in self._params)),
+                fingerprint.combine('precondition', map(fingerprint.literal_digest, self._precond)),
+                fingerprint.effect_digest(self._effects))))
+        return self._fingerprint
 
     def __str__(self):
         operator_str  = '{0}({1})\n'.format(self._name, ', '.join(map(str, self._params)))
         operator_str += '>> precond: {0}\n'.format(', '.join(map(str, self._precond)))
-        operator_str += '>> effects: {0}\n'.format(', '.join(map(str, self._effects)))
+        operator_str += '>> effects: {0}\n'.format(', '.join(map(str, self.legacy_effects)))
         return operator_str
 
- 
-    @staticmethod
-    def __effect_to_str(effect):
-        # print(effect)
-        if isinstance(effect, list):    # list of effects: and them all
-            if len(effect) > 1:
-                return '(and {})'.format(' '.join(Action.__effect_to_str(x) for x in effect))
-            else:
-                return ' '.join(Action.__effect_to_str(x) for x in effect)
-        elif isinstance(effect, tuple) and isinstance(effect[0], float):    # probabilistic atomic (1.0, literal)
-            return repr(effect[1])  # representation of the literal
-        elif isinstance(effect, tuple) and isinstance(effect[0], str):    # typed effect: when, oneof, labeled
-            if effect[0] == "when":
-                return f'(when {Action.__effect_to_str(effect[1])}) {Action.__effect_to_str(effect[2])})'
-            if effect[0] == "oneof":
-                return '(oneof {})'.format(' '.join(Action.__effect_to_str(x) for x in effect[1]))
-            if effect[0] == "label":
-                return f'({effect[1]} {Action.__effect_to_str(effect[2])})'
-            else:
-                print(f"This is a tuple with first argument str but cannot recognise type of first element: {effect[0]}")
-        else:
-            print("Something very wrong, an effect is empty...")
-
+    def __repr__(self):
+        return ''.join(writer.action_chunks(self))
 
+    def write(self, file, buffer_size=1 << 16):
+        """
+            Write the PDDL text of the action (its repr) to file, in chunks,
+            without building it as one string
 
-    def __repr__(self):
-        # First compute effect string - self.effects is a list
-        # print(self._effects)
-        effect_str = Action.__effect_to_str(self._effects)
-        # print(effect_str)
-        # print("====================")
-        
-        
-        # if isinstance(self._effects[0], list): # if only element in list is a list then it is oneof (...) 
-        #     effect_str = Action.__det_effect_to_str(self._effects[0])
-        # elif len(self._effects) == 1 and isinstance(self.effects[0][0][0][0], str): # Labeled effects
-        #     effect_str = '(oneof {})'.format(' '.join(Action.__det_effect_to_str(x) for x in self._effects[0]))
-        # elif len(self._effects) > 1:
-        #     effect_str = '(oneof {})'.format(' '.join(Action.__det_effect_to_str(x) for x in self._effects))
-
-        # Second compute precondition string
-        def_precond = ''
-        for p in self._precond:
-            if not isinstance(p,list):
-                def_precond += ' ' + repr(p)
-            else:
-                def_precond += ' (or {})'.format(' '.join(repr(x) for x in p))
-
-        operator_str  = '\t(:action {name} \n' \
-                        '\t\t:parameters ({param})\n' \
-                        '\t\t:precondition (and {prec})\n' \
-                        '\t\t:effect {effect}\n' \
-                        '\t)'.\
-            format(name = self._name,
-                   param = ' '.join(repr(p) for p in self._params),
-                   prec = def_precond,
-                   #prec = ' '.join(repr(p) for p in self._precond),
-                   effect = effect_str
-                   )
-        return operator_str
+        :param file: file-like object (e.g., open(filename, 'w'))
+        :param buffer_size: characters gathered before each write
+        """
+        writer.write_chunks(writer.action_chunks(self), file, buffer_size)
@@ -0,0 +1,484 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compact, versioned binary format of parsed models (Domain, Problem or both),
+# much faster to load than PDDL text is to parse:
+#
+#   magic (8 bytes) | version (uint32) | kind (uint32) | 7 sections
+#
+# Each section is an array of numbers: a typecode (1 byte, padded to 8), the
+# number of items (uint64) and the items, little endian, padded to 8 bytes, so
+# that it can be read in place from an mmap (memoryview.cast). The sections:
+#
+#   strings     utf-8 names, separated by NUL ('B')
+#   terms       (name, type, kind) string IDs per term: kind 0 constant,
+#               1 variable, 2 plain name (arguments of =); type -1 if none
+#   atoms       name string ID, arity and term IDs of each atom
+#   floats      probabilities of effects ('d')
+#   body        the rest of the model, flat: names, declarations, actions with
+#               literals (atom ID + 1, negated if negative) and effect trees in
+#               pre-order (see _EFFECT_CODES); goals are literals, or effects
+#               (e.g., labeled or oneof goals) where literal goals are coded
+#               _LITERAL and the literal
+#   runs        (name string ID, arity, count) of each run of consecutive init
+#               atoms of the same predicate
+#   arguments   term IDs of the arguments of the init atoms, in order, with
+#               the smallest unsigned type that fits ('B', 'H' or 'I')
+#
+# Init atoms are decoded a whole run at a time, and only when problem.init is
+# first read if loaded with lazy=True; the runs and their arguments are checked
+# when loading either way, so that a corrupt file fails there.
+
+import gc
+import mmap
+import struct
+import sys
+from array import array
+from itertools import repeat
+
+from pypddl.domain import Domain
+from pypddl.action import Action
+from pypddl.problem import Problem
+from pypddl.predicate import Predicate
+from pypddl.literal import Literal
+from pypddl.term import Term
+from pypddl.effects import Effect, Probabilistic, And, OneOf, When, Labeled, Forall
+
+
+MAGIC = b'PDDLBIN\x00'
+VERSION = 1
+
+_DOMAIN, _PROBLEM, _BOTH = 1, 2, 3
+_HEADER = struct.Struct('<8sII')
+_SECTION = struct.Struct('<cxxxxxxxQ')
+_SECTIONS = 7
+_TYPECODES = frozenset('BHIid')
+
+_PROBABILISTIC, _AND, _ONEOF, _WHEN, _LABELED, _FORALL, _LITERAL = range(7)
+_EFFECT_CODES = {Probabilistic: _PROBABILISTIC, And: _AND, OneOf: _ONEOF,
+                 When: _WHEN, Labeled: _LABELED, Forall: _FORALL}
+
+
+class _Encoder(object):
+
+    def __init__(self):
+        self.strings = {}
+        self.terms = {}
+        self.term_data = []
+        self.atoms = {}
+        self.atom_data = []
+        self.floats = []
+        self.body = []
+        self.runs = []
+        self.arguments = []
+
+    def string(self, name):
+        if name is None:
+            return -1
+        sid = self.strings.get(name)
+        if sid is None:
+            sid = self.strings[name] = len(self.strings)
+        return sid
+
+    def term(self, term):
+        tid = self.terms.get(term)
+        if tid is None:
+            tid = self.terms[term] = len(self.terms)
+            if isinstance(term, str):
+                self.term_data += (self.string(term), -1, 2)
+            else:
+                self.term_data += (self.string(term.name), self.string(term.type), int(term.is_variable()))
+        return tid
+
+    def atom(self, atom):
+        aid = self.atoms.get(atom)
+        if aid is None:
+            aid = self.atoms[atom] = len(self.atoms)
+            self.atom_data += (self.string(atom.name), atom.arity)
+            self.atom_data += [self.term(arg) for arg in atom.args]
+        return aid
+
+    def literal(self, literal):
+        aid = self.atom(literal.predicate) + 1
+        return aid if literal.is_positive() else -aid
+
+    def names(self, names):
+        self.body.append(len(names))
+        self.body += [self.string(name) for name in names]
+
+    def names_by_type(self, names_by_type):
+        self.body.append(len(names_by_type))
+        for type, names in names_by_type.items():
+            self.body.append(self.string(type))
+            self.names(names)
+
+    def effect(self, effect):
+        code = _EFFECT_CODES[type(effect)]
+        body = self.body
+        body.append(code)
+        if code == _PROBABILISTIC:
+            body += (len(self.floats), self.literal(effect.literal))
+            self.floats.append(effect.probability)
+        elif code in (_AND, _ONEOF):
+            body.append(len(effect.effects))
+            for child in effect.effects:
+                self.effect(child)
+        elif code == _WHEN:
+            self.effect(effect.condition)
+            self.effect(effect.effect)
+        elif code == _LABELED:
+            body.append(self.string(effect.label))
+            self.effect(effect.effect)
+        else:
+            self.effect(effect.effect)
+
+    def domain(self, domain):
+        body = self.body
+        body.append(self.string(domain.name))
+        if domain.requirements is None:
+            body.append(-1)
+        else:
+            self.names(domain.requirements)
+        self.names_by_type(domain.types)
+        self.names_by_type(domain.constants)
+        body.append(len(domain.predicates))
+        body += [self.atom(pred) for pred in domain.predicates]
+        body.append(len(domain.operators))
+        for op in domain.operators:
+            body.append(self.string(op.name))
+            body.append(len(op.params))
+            body += [self.term(p) for p in op.params]
+            body.append(len(op.precond))
+            for p in op.precond:
+                if isinstance(p, list):     # (or ...) of literals
+                    body += (1, len(p))
+                    body += [self.literal(x) for x in p]
+                else:
+                    body += (0, self.literal(p))
+            self.effect(op.effects)
+
+    def problem(self, problem):
+        body = self.body
+        body += (self.string(problem.name), self.string(problem.domain))
+        self.names_by_type(problem.objects)
+        goal = problem.goal
+        effects = any(isinstance(g, Effect) for g in goal)
+        body += (int(effects), len(goal))
+        for g in goal:
+            if not effects:
+                body.append(self.literal(g))
+            elif isinstance(g, Effect):
+                self.effect(g)
+            else:
+                body += (_LITERAL, self.literal(g))
+        key = None
+        for atom in problem.init:
+            if (atom.name, atom.arity) != key:
+                key = (atom.name, atom.arity)
+                self.runs += (self.string(atom.name), atom.arity, 0)
+            self.runs[-1] += 1
+            self.arguments += [self.term(arg) for arg in atom.args]
+
+    def sections(self):
+        top = max(self.arguments, default=0)
+        code = 'B' if top < 1 << 8 else 'H' if top < 1 << 16 else 'I'
+        return [('B', '\x00'.join(self.strings).encode()),
+                ('i', array('i', self.term_data)),
+                ('i', array('i', self.atom_data)),
+                ('d', array('d', self.floats)),
+                ('i', array('i', self.body)),
+                ('i', array('i', self.runs)),
+                (code, array(code, self.arguments))]
+
+
+def dumps(model):
+    """
+    :param model: Domain, Problem, or (Domain, Problem) tuple, as parsed
+    :return: bytes of the binary encoding of the model
+    """
+    encoder = _Encoder()
+    if isinstance(model, tuple):
+        kind = _BOTH
+        encoder.domain(model[0])
+        encoder.problem(model[1])
+    elif isinstance(model, Domain):
+        kind = _DOMAIN
+        encoder.domain(model)
+    elif isinstance(model, Problem):
+        kind = _PROBLEM
+        encoder.problem(model)
+    else:
+        raise TypeError('Cannot encode {!r}'.format(type(model)))
+
+    chunks = [_HEADER.pack(MAGIC, VERSION, kind)]
+    for code, items in encoder.sections():
+        if isinstance(items, array):
+            if sys.byteorder == 'big':
+                items.byteswap()
+            data = items.tobytes()
+        else:
+            data = items
+        chunks.append(_SECTION.pack(code.encode(), len(data) // struct.calcsize(code)))
+        chunks.append(data)
+        chunks.append(b'\x00' * (-len(data) % 8))
+    return b''.join(chunks)
+
+
+def dump(model, file):
+    """
+    :param model: Domain, Problem, or (Domain, Problem) tuple, as parsed
+    :param file: filename, or binary file object to write the encoding to
+    """
+    data = dumps(model)
+    if isinstance(file, str):
+        with open(file, 'wb') as f:
+            f.write(data)
+    else:
+        file.write(data)
+
+
+def _sections(data):
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise ValueError('Not a pypddl binary model: too short')
+    magic, version, kind = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError('Not a pypddl binary model')
+    if version != VERSION:
+        raise ValueError('Unsupported version {} of the pypddl binary format (expected {})'.format(version, VERSION))
+    offset = _HEADER.size
+    sections = []
+    for _ in range(_SECTIONS):
+        if offset + _SECTION.size > len(view):
+            raise ValueError('Not a pypddl binary model: truncated')
+        code, count = _SECTION.unpack_from(view, offset)
+        code = code.decode('latin-1')
+        if code not in _TYPECODES:
+            raise ValueError('Not a pypddl binary model: unknown typecode {!r}'.format(code))
+        offset += _SECTION.size
+        size = count * struct.calcsize(code)
+        if offset + size + (-size % 8) > len(view):     # padding included
+            raise ValueError('Not a pypddl binary model: truncated')
+        items = view[offset:offset + size].cast(code)
+        if sys.byteorder == 'big' and code != 'B':
+            items = array(code, items)
+            items.byteswap()
+        sections.append(items)
+        offset += size + (-size % 8)
+    return kind, sections
+
+
+def _item(table, i, what):
+    # table[i], without the wrap-around of negative indices
+    if not 0 <= i < len(table):
+        raise ValueError('{} ID {} out of range'.format(what, i))
+    return table[i]
+
+
+class _Decoder(object):
+
+    def __init__(self, sections):
+        strings, terms, atoms, floats, body, self.runs, self.arguments = sections
+        self.strings = bytes(strings).decode().split('\x00') if len(strings) else []
+        self.floats = floats.tolist()
+        self.body = body.tolist()
+        self.position = 0
+
+        self.terms = []
+        terms = terms.tolist()
+        for i in range(0, len(terms), 3):
+            name, type, kind = self.name(terms[i]), self.name(terms[i + 1]), terms[i + 2]
+            self.terms.append(name if kind == 2 else Term(name=name, type=type, var=bool(kind)))
+
+        self.atoms = []
+        atoms = atoms.tolist()
+        i = 0
+        while i < len(atoms):
+            arity = atoms[i + 1]
+            if arity < 0:
+                raise ValueError('negative arity {}'.format(arity))
+            args = atoms[i + 2:i + 2 + arity]
+            if len(args) != arity:
+                raise ValueError('atom {} has {} of its {} arguments'.format(len(self.atoms), len(args), arity))
+            self.atoms.append(Predicate(self.name(atoms[i]), [_item(self.terms, t, 'term') for t in args]))
+            i += 2 + arity
+        self.literals = {}
+        self.check_runs()
+
+    def check_runs(self):
+        # the init atoms are only decoded later with lazy=True, so their runs
+        # are checked here, when loading
+        runs = self.runs.tolist()
+        if len(runs) % 3:
+            raise ValueError('{} numbers in the runs of init atoms'.format(len(runs)))
+        total = 0
+        for i in range(0, len(runs), 3):
+            self.name(runs[i])
+            arity, count = runs[i + 1], runs[i + 2]
+            if arity < 0 or count < 0:
+                raise ValueError('run of {} atoms of arity {}'.format(count, arity))
+            total += arity * count
+        if total != len(self.arguments):
+            raise ValueError('the runs of init atoms have {} arguments, not {}'.format(total, len(self.arguments)))
+        top = max(self.arguments, default=-1)   # unsigned, so no negative IDs
+        if top >= len(self.terms):
+            raise ValueError('term ID {} out of range'.format(top))
+
+    def name(self, sid):
+        # string ID -1 is None
+        return None if sid == -1 else _item(self.strings, sid, 'string')
+
+    def next(self):
+        value = self.body[self.position]
+        self.position += 1
+        return value
+
+    def string(self):
+        return self.name(self.next())
+
+    def names(self):
+        return [self.string() for _ in range(self.next())]
+
+    def names_by_type(self):
+        names_by_type = {}
+        for _ in range(self.next()):
+            type = self.string()
+            names_by_type[type] = self.names()
+        return names_by_type
+
+    def literal(self):
+        code = self.next()
+        literal = self.literals.get(code)
+        if literal is None:     # literals are shared, as when parsing
+            atom = _item(self.atoms, abs(code) - 1, 'atom')
+            literal = self.literals[code] = Literal(atom, code > 0)
+        return literal
+
+    def effect(self):
+        code = self.next()
+        if code == _PROBABILISTIC:
+            probability = _item(self.floats, self.next(), 'float')
+            return Probabilistic(probability, self.literal())
+        if code == _AND:
+            return And([self.effect() for _ in range(self.next())])
+        if code == _ONEOF:
+            return OneOf([self.effect() for _ in range(self.next())])
+        if code == _WHEN:
+            condition = self.effect()
+            return When(condition, self.effect())
+        if code == _LABELED:
+            label = self.string()
+            return Labeled(label, self.effect())
+        if code == _FORALL:
+            return Forall(self.effect())
+        if code == _LITERAL:    # literal goal among effect goals
+            return self.literal()
+        raise ValueError('unknown effect code {}'.format(code))
+
+    def domain(self):
+        name = self.string()
+        if self.body[self.position] == -1:
+            self.position += 1
+            requirements = None
+        else:
+            requirements = self.names()
+        types = self.names_by_type()
+        constants = self.names_by_type()
+        predicates = [_item(self.atoms, self.next(), 'atom') for _ in range(self.next())]
+        operators = []
+        for _ in range(self.next()):
+            op_name = self.string()
+            params = [_item(self.terms, self.next(), 'term') for _ in range(self.next())]
+            precond = []
+            for _ in range(self.next()):
+                if self.next():     # (or ...) of literals
+                    precond.append([self.literal() for _ in range(self.next())])
+                else:
+                    precond.append(self.literal())
+            operators.append(Action(op_name, params, precond, self.effect()))
+        return Domain(name, requirements, types, constants, predicates, operators)
+
+    def problem(self, lazy):
+        name, domain = self.string(), self.string()
+        objects = [Term.constant(obj, type) for type, names in self.names_by_type().items() for obj in names]
+        effects = self.next()
+        goal = [self.effect() if effects else self.literal() for _ in range(self.next())]
+        init = self.init if lazy else self.init()
+        return Problem(name, domain, objects, init, goal)
+
+    def init(self):
+        # a run of atoms at a time, with C loops (map), and without the cyclic
+        # garbage collector, which would go through the growing heap many times
+        # for nothing; the runs were checked by check_runs
+        terms = self.terms
+        runs, arguments = self.runs.tolist(), self.arguments
+        init = []
+        position = 0
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for i in range(0, len(runs), 3):
+                name, arity, count = self.name(runs[i]), runs[i + 1], runs[i + 2]
+                if arity == 0:      # one object, as the parser shares equal atoms
+                    init.extend(repeat(Predicate(name), count))
+                    continue
+                args = list(map(terms.__getitem__, arguments[position:position + arity * count].tolist()))
+                position += arity * count
+                init += map(Predicate, repeat(name, count), zip(*[args[j::arity] for j in range(arity)]))
+        finally:
+            if collecting:
+                gc.enable()
+        self.runs = self.arguments = None   # release the mmap
+        return init
+
+
+def loads(data, lazy=False):
+    """
+    :param data: bytes-like object with the encoding of a model (bytes, mmap...)
+    :param lazy: decode the init atoms of problems on first access to problem.init
+    :return: Domain, Problem, or (Domain, Problem) tuple
+    """
+    kind, sections = _sections(data)
+    if kind not in (_DOMAIN, _PROBLEM, _BOTH):
+        raise ValueError('Unknown kind {} of pypddl binary model'.format(kind))
+    try:
+        decoder = _Decoder(sections)
+        if kind == _DOMAIN:
+            return decoder.domain()
+        if kind == _PROBLEM:
+            return decoder.problem(lazy)
+        domain = decoder.domain()
+        return domain, decoder.problem(lazy)
+    except (ValueError, IndexError, UnicodeDecodeError) as error:   # IDs out of range, bad strings...
+        raise ValueError('Not a pypddl binary model: corrupt ({})'.format(error)) from error
+
+
+def load(file, lazy=False):
+    """
+        Load a model saved with dump, reading the file through an mmap
+
+    :param file: filename, or binary file object opened for reading
+    :param lazy: decode the init atoms of problems on first access to
+        problem.init (the mmap is kept open until then)
+    :return: Domain, Problem, or (Domain, Problem) tuple
+    """
+    if isinstance(file, str):
+        with open(file, 'rb') as f:
+            return load(f, lazy)
+    try:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):   # not a real file (e.g., BytesIO), or empty
+        return loads(file.read(), lazy)
+    return loads(data, lazy)
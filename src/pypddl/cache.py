@@ -0,0 +1,170 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import zlib
+
+from pypddl.pddlparser import grammar_version
+
+
+class ParseCache(object):
+
+    SUFFIX = '.pddlc'
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        """
+            Construct a content-addressed, on-disk cache of parsed models
+
+            Entries are keyed on a hash of the normalized PDDL text and of the
+            grammar version, so editing a file or the parser never serves a
+            stale model. Each entry is a compressed pickle of the parsed Domain,
+            Problem or (Domain, Problem) tuple; entries are evicted least
+            recently used first once the directory grows beyond max_bytes.
+
+            Entries are unpickled when read, so the directory must be trusted.
+
+        :param directory: directory holding the cache entries (created if needed)
+        :param max_bytes: size cap of the cache directory in bytes
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self._size = None   # total size of the entries, computed on first store
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def __str__(self):
+        return 'ParseCache({0}): {1} hits, {2} misses'.format(self._directory, self._hits, self._misses)
+
+    def fetch(self, text, parse):
+        """
+            Return the model parsed from text, calling parse(text) on a miss only.
+
+        :param text: normalized PDDL text
+        :param parse: function from text to the parsed model
+        :return: the parsed model
+        """
+        digest = hashlib.sha256(grammar_version().encode('ascii'))
+        digest.update(text.encode('utf-8'))
+        key = digest.hexdigest()
+
+        model = self.__load(key)
+        if model is not None:
+            with self._lock:
+                self._hits += 1
+            return model
+
+        with self._lock:
+            self._misses += 1
+        model = parse(text)
+        if model is not None:   # syntax errors are not cached
+            self.__store(key, model)
+        return model
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        for entry in self.__entries():
+            try:
+                os.remove(entry.path)
+            except OSError:     # removed meanwhile by another process
+                pass
+        with self._lock:
+            self._hits = self._misses = 0
+            self._size = 0
+
+    def __path(self, key):
+        return os.path.join(self._directory, key + self.SUFFIX)
+
+    def __entries(self):
+        return [e for e in os.scandir(self._directory) if e.name.endswith(self.SUFFIX)]
+
+    def __stats(self):
+        # (modification time, size, path) of each entry, skipping those removed
+        # by other processes since the directory was listed
+        stats = []
+        for entry in self.__entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            stats.append((stat.st_mtime, stat.st_size, entry.path))
+        return stats
+
+    def __load(self, key):
+        path = self.__path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # the modification time orders entries for LRU eviction
+        except OSError:
+            return None
+        try:
+            return pickle.loads(zlib.decompress(data))
+        except (zlib.error, pickle.UnpicklingError, EOFError):    # corrupt entry: parse again
+            return None
+
+    def __store(self, key, model):
+        data = zlib.compress(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        # write then rename, so that concurrent readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self._directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        path = self.__path(key)
+        try:
+            replaced = os.stat(path).st_size   # rewriting an entry (e.g., a corrupt one)
+        except OSError:
+            replaced = 0
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self.__stats())
+            else:
+                self._size += len(data) - replaced
+            if self._size > self._max_bytes:
+                self.__evict()
+
+    def __evict(self):
+        entries = sorted(self.__stats())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:     # already evicted by another process
+                pass
+            self._size -= size
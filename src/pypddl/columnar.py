@@ -0,0 +1,322 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+# Columnar export of the facts of problems to NumPy .npz files (numpy is
+# optional: pip install pypddl[numpy]).
+#
+# A file holds a family of problems (one or more) sharing the vocabularies:
+#
+#   names, domains              name and domain of each problem
+#   predicate_names, predicate_arities
+#   term_names, term_types, term_variables
+#                               terms, with type IDs into types (-1 if none)
+#   types                       type names
+#   objects, objects_offsets    term IDs of the :objects of each problem,
+#                               those of problem i in objects[offsets[i]:offsets[i + 1]]
+#   init_order, init_offsets    predicate ID of each init atom, in order,
+#                               per problem as objects
+#   init_<p>                    int32 matrix with the term IDs of the init
+#                               atoms of predicate ID p of all the problems,
+#                               one row each, in order
+#   goal_order, goal_offsets, goal_<p>, goal_positive
+#                               the same for the goal literals, and their sign
+#
+# All the arrays are numbers or fixed-width strings, so no pickle is needed.
+
+from collections import Counter
+
+from pypddl.facts import np, FactStore
+from pypddl.predicate import Predicate
+from pypddl.literal import Literal
+from pypddl.problem import Problem
+from pypddl.term import Term
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('The npz export needs numpy (pip install pypddl[numpy])')
+
+
+class _Vocabulary(object):
+
+    def __init__(self):
+        self.predicates = {}    # (name, arity) --> ID
+        self.terms = {}         # Term --> ID
+        self.types = {}         # type name --> ID
+
+    def predicate(self, atom):
+        key = (atom.name, atom.arity)
+        pid = self.predicates.get(key)
+        if pid is None:
+            pid = self.predicates[key] = len(self.predicates)
+        return pid
+
+    def term(self, term):
+        tid = self.terms.get(term)
+        if tid is None:
+            tid = self.terms[term] = len(self.terms)
+            if term.type is not None and term.type not in self.types:
+                self.types[term.type] = len(self.types)
+        return tid
+
+
+def _encode_atoms(vocabulary, atoms, order, rows):
+    # append the predicate IDs of atoms to order, and their term IDs to rows[pid] (dict)
+    for atom in atoms:
+        pid = vocabulary.predicate(atom)
+        order.append(pid)
+        rows.setdefault(pid, []).extend([vocabulary.term(arg) for arg in atom.args])
+
+
+def save_family_npz(problems, file, compressed=False):
+    """
+        Export the facts of many problems (e.g., a benchmark family) to one
+        .npz file, with one matrix per predicate for all of them
+
+    :param problems: iterable of Problem objects whose goals are literals
+    :param file: filename, or binary file object
+    :param compressed: zip compression (smaller files, slower to load)
+    """
+    _require_numpy()
+    vocabulary = _Vocabulary()
+    names, domains = [], []
+    objects, objects_offsets = [], [0]
+    init_order, init_offsets, init_rows = [], [0], {}
+    goal_order, goal_offsets, goal_rows, goal_positive = [], [0], {}, []
+    for problem in problems:
+        names.append(problem.name)
+        domains.append(problem.domain)
+        objects += [vocabulary.term(Term.constant(obj, type))
+                    for type, objs in problem.objects.items() for obj in objs]
+        objects_offsets.append(len(objects))
+        _encode_atoms(vocabulary, problem.init, init_order, init_rows)
+        init_offsets.append(len(init_order))
+        for literal in problem.goal:
+            if not isinstance(literal, Literal):
+                raise ValueError('Only goals of literals can be exported, not {!r}'.format(literal))
+        _encode_atoms(vocabulary, (literal.predicate for literal in problem.goal), goal_order, goal_rows)
+        goal_positive += [literal.is_positive() for literal in problem.goal]
+        goal_offsets.append(len(goal_order))
+
+    if len(vocabulary.terms) > np.iinfo(np.int32).max:
+        raise OverflowError('Too many terms for int32 IDs')
+    predicates = list(vocabulary.predicates)
+    terms = list(vocabulary.terms)
+    arrays = {
+        'names': np.array(names, dtype=str),
+        'domains': np.array(domains, dtype=str),
+        'predicate_names': np.array([name for name, _ in predicates], dtype=str),
+        'predicate_arities': np.array([arity for _, arity in predicates], dtype=np.int32),
+        'term_names': np.array([term.name for term in terms], dtype=str),
+        'term_types': np.array([vocabulary.types.get(term.type, -1) for term in terms], dtype=np.int32),
+        'term_variables': np.array([term.is_variable() for term in terms], dtype=bool),
+        'types': np.array(list(vocabulary.types), dtype=str),
+        'objects': np.array(objects, dtype=np.int32),
+        'objects_offsets': np.array(objects_offsets, dtype=np.int64),
+        'init_order': np.array(init_order, dtype=np.int32),
+        'init_offsets': np.array(init_offsets, dtype=np.int64),
+        'goal_order': np.array(goal_order, dtype=np.int32),
+        'goal_offsets': np.array(goal_offsets, dtype=np.int64),
+        'goal_positive': np.array(goal_positive, dtype=bool),
+    }
+    for prefix, order, rows in (('init', init_order, init_rows), ('goal', goal_order, goal_rows)):
+        counts = Counter(order)     # rows per predicate, as those without arguments have no IDs
+        for pid, (name, arity) in enumerate(predicates):
+            table = np.array(rows.get(pid, []), dtype=np.int32).reshape(counts[pid], arity)
+            arrays['{}_{}'.format(prefix, pid)] = table
+    (np.savez_compressed if compressed else np.savez)(file, **arrays)
+
+
+def save_npz(problem, file, compressed=False):
+    """
+    :param problem: Problem object whose goal is a list of literals
+    :param file: filename, or binary file object
+    :param compressed: zip compression (smaller files, slower to load)
+    """
+    save_family_npz([problem], file, compressed)
+
+
+class ProblemFamily(object):
+
+    def __init__(self, arrays):
+        """
+            Facts of a family of problems, as saved by save_family_npz
+
+            The atoms of each predicate are one int32 matrix of term IDs for
+            the whole family (facts), so queries over all the problems are
+            vectorized; problem(i) rebuilds a Problem object, whose init is
+            decoded from a FactStore of views of those matrices on first access.
+
+        :param arrays: mapping from the names of the arrays of the file to them
+        """
+        _require_numpy()
+        self._arrays = arrays
+        self._names = arrays['names'].tolist()
+        self._domains = arrays['domains'].tolist()
+        self._predicates = list(zip(arrays['predicate_names'].tolist(), arrays['predicate_arities'].tolist()))
+        self._predicate_ids = {p: i for i, p in enumerate(self._predicates)}
+        types = arrays['types'].tolist() + [None]   # type ID -1
+        self._terms = [Term(name=name, type=types[type], var=variable) for name, type, variable in
+                       zip(arrays['term_names'].tolist(), arrays['term_types'].tolist(),
+                           arrays['term_variables'].tolist())]
+        self._init_starts = self._row_starts('init')
+        self._goal_starts = self._row_starts('goal')
+
+    def _row_starts(self, prefix):
+        # (problems + 1) x predicates matrix: the first row of the atoms of each
+        # problem in each per-predicate matrix
+        order, offsets = self._arrays[prefix + '_order'], self._arrays[prefix + '_offsets']
+        n, count = len(self._names), len(self._predicates)
+        problem_ids = np.repeat(np.arange(n), np.diff(offsets))
+        counts = np.bincount(problem_ids * count + order, minlength=n * count).reshape(n, count)
+        starts = np.zeros((n + 1, count), dtype=np.int64)
+        np.cumsum(counts, axis=0, out=starts[1:])
+        return starts
+
+    @property
+    def names(self):
+        """
+        :return: list of the names of the problems
+        """
+        return self._names[:]
+
+    @property
+    def domains(self):
+        """
+        :return: list of the domain names of the problems
+        """
+        return self._domains[:]
+
+    @property
+    def predicates(self):
+        """
+        :return: list of (name, arity) pairs, indexed by predicate ID
+        """
+        return self._predicates[:]
+
+    @property
+    def terms(self):
+        """
+        :return: list of Term objects, indexed by term ID
+        """
+        return self._terms[:]
+
+    @property
+    def term_names(self):
+        """
+        :return: array with the name of each term, e.g., family.term_names[family.facts('at')]
+        """
+        return self._arrays['term_names']
+
+    def __len__(self):
+        return len(self._names)
+
+    def predicate_id(self, name, arity=None):
+        """
+        :param name: name of a predicate
+        :param arity: its arity, only needed if several predicates share the name
+        :return: the ID of the predicate, or None if no problem has atoms of it
+        """
+        if arity is not None:
+            return self._predicate_ids.get((name, arity))
+        ids = [i for (n, a), i in self._predicate_ids.items() if n == name]
+        if len(ids) > 1:
+            raise ValueError('Predicate {} has several arities, give one'.format(name))
+        return ids[0] if ids else None
+
+    def facts(self, name, arity=None, problem=None, goal=False):
+        """
+        :param name: name of a predicate
+        :param arity: its arity, only needed if several predicates share the name
+        :param problem: index of a problem, or None for all the problems
+        :param goal: the atoms of the goals instead of init
+        :return: read-only int32 matrix with the term IDs of the atoms, one row each
+        """
+        pid = self.predicate_id(name, arity)
+        if pid is None:
+            return np.empty((0, arity or 0), dtype=np.int32)
+        prefix = 'goal' if goal else 'init'
+        table = self._arrays['{}_{}'.format(prefix, pid)]
+        if problem is None:
+            return table
+        starts = self._goal_starts if goal else self._init_starts
+        return table[starts[problem, pid]:starts[problem + 1, pid]]
+
+    def problem_ids(self, name, arity=None, goal=False):
+        """
+        :param name: name of a predicate
+        :param arity: its arity, only needed if several predicates share the name
+        :param goal: the atoms of the goals instead of init
+        :return: vector with the index of the problem of each row of facts(name)
+        """
+        pid = self.predicate_id(name, arity)
+        if pid is None:
+            return np.empty(0, dtype=np.int64)
+        starts = self._goal_starts if goal else self._init_starts
+        return np.repeat(np.arange(len(self)), np.diff(starts[:, pid]))
+
+    def problem(self, i):
+        """
+        :param i: index of a problem
+        :return: Problem object
+        """
+        arrays, terms = self._arrays, self._terms
+        start, end = arrays['objects_offsets'][i:i + 2].tolist()
+        objects = [terms[t] for t in arrays['objects'][start:end].tolist()]
+        start, end = arrays['init_offsets'][i:i + 2].tolist()
+        tables = [arrays['init_{}'.format(pid)][self._init_starts[i, pid]:self._init_starts[i + 1, pid]]
+                  for pid in range(len(self._predicates))]
+        init = FactStore(self._predicates, terms, tables, arrays['init_order'][start:end])
+        start, end = arrays['goal_offsets'][i:i + 2].tolist()
+        goal_tables = {}
+        goal = []
+        for pid, positive in zip(arrays['goal_order'][start:end].tolist(),
+                                 arrays['goal_positive'][start:end].tolist()):
+            rows = goal_tables.get(pid)
+            if rows is None:
+                rows = goal_tables[pid] = iter(self.facts(*self._predicates[pid], problem=i, goal=True).tolist())
+            predicate = Predicate(self._predicates[pid][0], [terms[t] for t in next(rows)])
+            goal.append(Literal(predicate, positive))
+        return Problem(self._names[i], self._domains[i], objects, init, goal)
+
+    def problems(self):
+        """
+        :return: list of the Problem objects of the family, in order
+        """
+        return [self.problem(i) for i in range(len(self))]
+
+
+def load_family_npz(file):
+    """
+    :param file: filename, or binary file object, saved with save_family_npz
+    :return: ProblemFamily object
+    """
+    _require_numpy()
+    with np.load(file) as data:
+        arrays = {key: data[key] for key in data.files}
+    for array in arrays.values():
+        array.flags.writeable = False
+    return ProblemFamily(arrays)
+
+
+def load_npz(file):
+    """
+    :param file: filename, or binary file object, saved with save_npz
+    :return: Problem object
+    """
+    family = load_family_npz(file)
+    if len(family) != 1:
+        raise ValueError('Expected one problem, the file has {}'.format(len(family)))
+    return family.problem(0)
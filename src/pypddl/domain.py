@@ -14,10 +14,35 @@
 # along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import copy
+from types import MappingProxyType
+
 from pypddl.predicate import Predicate
 from pypddl.term      import Term
 from pypddl.literal   import Literal
 from pypddl.action    import Action
+from pypddl           import fingerprint
+from pypddl           import writer
+
+
+def _register(registry, key, value):
+    # repeated keys are stored under (key, 1), (key, 2)... to keep them in order
+    if key in registry:
+        n = 1
+        while (key, n) in registry:
+            n += 1
+        key = (key, n)
+    registry[key] = value
+
+
+def _unregister(registry, key):
+    # remove the key and its repetitions, return whether there was any
+    if registry.pop(key, None) is None:
+        return False
+    n = 1
+    while registry.pop((key, n), None) is not None:
+        n += 1
+    return True
 
 
 class Domain(object):
@@ -31,13 +56,61 @@ class Domain(object):
         :param constants: dictionary from types to list constants ("" for non-typed constants)
         :param predicates: list of Predicate objects
         :param operators: list of Action objects
+
+            The getters return tuples and read-only mappings, without copying;
+            edit the domain with the setters and the add_/del_ methods.
+
+            Predicates are registered by (name, arity) and operators by name,
+            in order of addition, so adding, removing and looking them up
+            (predicate, action) take constant time. Repeated declarations are
+            kept, in order, as the parser always did; lookups return the first.
         """
         self._name = name
         self._requirements = requirements
         self._types = types
         self._constants = constants
-        self._predicates = predicates
-        self._operators = operators
+        self._shared = set()    # fields shared with clones, copied before changing them
+        self.predicates = predicates
+        self.operators = operators
+        self._closure = None    # type --> frozenset of the type and its subtypes, built on demand
+        self._fingerprint = None    # digest of all but the operators, cached until they change
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_closure'] = None    # mapping proxies are not picklable, rebuilt on demand
+        state['_predicates_view'] = state['_operators_view'] = None
+        state['_shared'] = set()
+        return state
+
+    def clone(self):
+        """
+            Cheap copy of the domain to derive variants from (e.g., with the
+            MTP compilation, which changes the domain in place)
+
+            The copy shares the predicates, types and constants with this
+            domain until either of them changes them (copy-on-write). Actions
+            are copied, but share their parameters, preconditions and effects,
+            which are immutable.
+
+        :return: Domain object
+        """
+        clone = object.__new__(Domain)
+        clone.__dict__.update(self.__dict__)
+        clone.operators = [copy.copy(op) for op in self.operators]
+        self._shared.update(('_predicates', '_types'))
+        clone._shared = set(self._shared)
+        return clone
+
+    def __own(self, field):
+        # copy a field shared with clones before changing it
+        if field in self._shared:
+            value = getattr(self, field)
+            if field == '_types':   # dict of lists
+                value = {t: list(subtypes) for t, subtypes in value.items()}
+            else:
+                value = dict(value)
+            setattr(self, field, value)
+            self._shared.discard(field)
 
     @property
     def name(self):
@@ -45,128 +118,219 @@ class Domain(object):
 
     @property
     def requirements(self):
-        return self._requirements[:]
+        return None if self._requirements is None else tuple(self._requirements)
 
     @property
     def types(self):
-        return self._types[:]
+        return MappingProxyType(self._types)
 
     @property
     def constants(self):
-        return self._constants[:]
+        return MappingProxyType(self._constants)
 
     @property
     def predicates(self):
-        return self._predicates[:]
+        if self._predicates_view is None:
+            self._predicates_view = tuple(self._predicates.values())
+        return self._predicates_view
 
     @property
     def operators(self):
-        return self._operators[:]
+        if self._operators_view is None:
+            self._operators_view = tuple(self._operators.values())
+        return self._operators_view
 
     @requirements.setter
     def requirements(self, requirements):
         self._requirements = requirements
+        self._fingerprint = None
 
     @predicates.setter
     def predicates(self, predicates):
-        self._predicates = predicates
+        self._predicates = {}
+        self._shared.discard('_predicates')
+        for pred in predicates:
+            _register(self._predicates, (pred.name, pred.arity), pred)
+        self._predicates_view = None    # tuple of the values, built on demand
+        self._fingerprint = None
 
     @constants.setter
     def constants(self, constants):
         self._constants = constants
+        self._closure = self._fingerprint = None
 
     @types.setter
     def types(self, types):
         self._types = types
+        self._shared.discard('_types')
+        self._closure = self._fingerprint = None
+
+    @property
+    def type_closure(self):
+        """
+            Transitive closure of the type hierarchy, computed once (and again
+            after the types or constants change). Every type maps to itself and
+            all its subtypes; 'object', the root of PDDL types, maps to all of
+            them.
+
+        :return: read-only mapping from type name to frozenset of type names
+        """
+        if self._closure is None:
+            self._closure = MappingProxyType(self.__compute_closure())
+        return self._closure
+
+    def __compute_closure(self):
+        children = {t: list(subtypes) for t, subtypes in self._types.items() if t != ''}
+        names = set(children)
+        for subtypes in self._types.values():
+            names.update(subtypes)
+        names.update(t for t in self._constants if t != '')
+        names.add('object')
+        closure = {}
+        for t in names:
+            found = {t}
+            stack = [t]
+            while stack:    # depth-first, found also guards against cycles
+                for sub in children.get(stack.pop(), ()):
+                    if sub not in found:
+                        found.add(sub)
+                        stack.append(sub)
+            closure[t] = found
+        closure['object'] |= names
+        return {t: frozenset(found) for t, found in closure.items()}
+
+    def subtypes(self, type):
+        """
+        :param type: name of a type (e.g., 'locatable')
+        :return: frozenset with the type and all its subtypes
+        """
+        return self.type_closure.get(type) or frozenset((type,))
+
+    def is_subtype(self, type, super_type):
+        """
+        :return: True if type is super_type or one of its (transitive) subtypes
+        """
+        return type in self.subtypes(super_type)
 
     @operators.setter
     def operators(self, operators):
-        self._operators = operators
+        self._operators = {}
+        for op in operators:
+            _register(self._operators, op.name, op)
+        self._operators_view = None
 
     def __str__(self):
         domain_str  = '@ Domain: {0}\n'.format(self._name)
         if self._requirements is not None:
             domain_str += '>> requirements: {0}\n'.format(', '.join(self._requirements))
         domain_str += '>> types: {0}\n'.format(', '.join(self._types))
-        domain_str += '>> predicates: {0}\n'.format(', '.join(map(str, self._predicates)))
+        domain_str += '>> predicates: {0}\n'.format(', '.join(map(str, self.predicates)))
         domain_str += '>> operators:\n    {0}\n'.format(
-            '\n    '.join(str(op).replace('\n', '\n    ') for op in self._operators))
+            '\n    '.join(str(op).replace('\n', '\n    ') for op in self.operators))
         return domain_str
 
     def __repr__(self):
-        pddl_str = f'(define (domain {self._name})\n'
-
-        if self._requirements is not None:
-            requirements = ' '.join(self._requirements)
-            pddl_str += f'\t(:requirements {requirements})\n'
-
+        return ''.join(writer.domain_chunks(self))
 
-        if len(self._types):    # if there are some :types defined
-            types_txt = ' '.join(
-                '\t\t{} - {}\n'.format(' '.join(self._types[t]), t) for t in self._types.keys() if not t == '')
-
-            if '' in self._types.keys():    # the case of types without subtypes
-                types_txt = '\t\t{} {}\n'.format(types_txt, ' '.join(t for t in self._types['']))
-
-            pddl_str += f'\t(:types \n{types_txt}\t)\n'
-
-        if len(self._constants):    # there are :constants defined
-            constants_txt = ' '.join(
-                '\t\t{} - {}\n'.format(' '.join(self._constants[t]), t) for t in self._constants.keys() if not t == '')
-
-            if '' in self._constants.keys():
-                constants_txt = '\t\t{} {}\n'.format(constants_txt, ' '.join(t for t in self._constants['']))
-
-            pddl_str += f'\t(:constants \n{constants_txt}\t)\n'
-
-
-        predicates = '\n\t\t'.join(repr(pred) for pred in self._predicates)
-        pddl_str += f'\t(:predicates\n \t\t{predicates}\n\t)\n'
-
-        actions='\n'.join(repr(act) for act in self._operators)
-        pddl_str += f'{actions}\n'
+    def write(self, file, buffer_size=1 << 16):
+        """
+            Write the PDDL text of the domain (its repr) to file, in chunks,
+            without building it as one string
 
-        pddl_str += f')'
+        :param file: file-like object (e.g., open(filename, 'w'))
+        :param buffer_size: characters gathered before each write
+        """
+        writer.write_chunks(writer.domain_chunks(self), file, buffer_size)
 
-        return pddl_str
 
     def add_type(self, type, type_type=''):
+        self.__own('_types')
         if type_type in self._types:
             self._types[type_type].append(type)
         else:
             self._types[type_type] = [type]
-    def del_type(self, type_type=''):
+        self._closure = self._fingerprint = None
+    def del_type(self, type, type_type=''):
+        self.__own('_types')
         if type_type in self._types:
             self._types[type_type].remove(type)
+        self._closure = self._fingerprint = None
 
 
-    def add_pred(self, pred):
-        self._predicates.append(pred)
-
     # domain.add_pred('open', [('?x', 'boxes'), ('y', 'block'))
-    def add_pred(self, name, args):
-        args2 = []
-        for a in args:
-            if type(a) is tuple:    # name of variable with type
-                arg = Term(name=a[0], type=a[1])
-            elif type(a) is str:    # a constant value
-                arg = Term(value=a[0])
-            else:
-                print('ERROR: something went wrong, incorrect argument for predicate {}'.format(name))
-            args2.append(arg)
-        self._predicates.append(Predicate(name, args2))
+    def add_pred(self, name, args=None):
+        """
+        :param name: Predicate object, or the name of the predicate
+        :param args: with a name, list of arguments: (variable, type) pairs,
+            variable names or constant names
+        """
+        if isinstance(name, Predicate):
+            pred = name
+        else:
+            args2 = []
+            for a in args:
+                if type(a) is tuple:    # name of variable with type
+                    arg = Term.variable(a[0], a[1])
+                elif a.startswith('?'):  # untyped variable
+                    arg = Term.variable(a)
+                else:                   # a constant value
+                    arg = Term.constant(a)
+                args2.append(arg)
+            pred = Predicate(name, args2)
+        self.__own('_predicates')
+        _register(self._predicates, (pred.name, pred.arity), pred)
+        self._predicates_view = self._fingerprint = None
 
     # domain.del_pred('handempty', 0)
     def del_pred(self, name, arity):
-        for pred in self._predicates:
-            if pred.name == name and len(pred.args) == arity:
-                self._predicates.remove(pred)
+        self.__own('_predicates')
+        if _unregister(self._predicates, (name, arity)):
+            self._predicates_view = self._fingerprint = None
+
+    def predicate(self, name, arity):
+        """
+        :return: the Predicate declared with name and arity, or None
+        """
+        return self._predicates.get((name, arity))
+
+    # domain.add_action('pick-up', params, precond, effects)
+    def add_action(self, name, params=(), precond=(), effects=()):
+        """
+        :param name: Action object, or the name of the action
+        :param params: with a name, list of Term objects
+        :param precond: with a name, list of Literal objects
+        :param effects: with a name, the effects (see Action)
+        """
+        action = name if isinstance(name, Action) else Action(name, params, precond, effects)
+        _register(self._operators, action.name, action)
+        self._operators_view = None
 
+    # domain.del_action('pick-up')
+    def del_action(self, name):
+        if _unregister(self._operators, name):
+            self._operators_view = None
 
+    def action(self, name):
+        """
+        :return: the Action with the name, or None
+        """
+        return self._operators.get(name)
 
-    def add_action(self, action):
-        self._operators.append(action)
+    def fingerprint(self):
+        """
+            Canonical content digest of the domain. The order of requirements,
+            declarations (types, constants, predicates) and actions does not
+            matter. The digest of everything but the actions is cached until
+            the domain changes, and each action caches its own (see
+            Action.fingerprint), so asking again is cheap.
 
-    def add_action(self, name, params, precond, effects):
-        self._operators.append(Action(name, params, precond, effects)
-)
\ No newline at end of file
+        :return: 128-bit digest as 32 hexadecimal digits
+        """
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint.sequence('domain\x00' + self._name, (
+                fingerprint.combine('requirements', map(fingerprint.digest, self._requirements or ())),
+                fingerprint.names_digest('types', self._types),
+                fingerprint.names_digest('constants', self._constants),
+                fingerprint.combine('predicates', map(fingerprint.atom_digest, self._predicates.values()))))
+        operators = fingerprint.combine('operators', (int(op.fingerprint(), 16) for op in self._operators.values()))
+        return fingerprint.hexdigest(fingerprint.sequence('domain', (self._fingerprint, operators)))
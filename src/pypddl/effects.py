@@ -0,0 +1,261 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+# Effects of actions (and labeled goals) as a tree of immutable nodes:
+#
+#   Probabilistic(probability, literal)     an atomic effect, e.g., (1.0, (at ?x))
+#   And(effects)                            all the effects happen
+#   OneOf(effects)                          one of the effects happens
+#   When(condition, effect)                 conditional effect
+#   Labeled(label, effect)                  effect of a model level (MTP), e.g., (d1 ...)
+#   Forall(effect)                          universal effect
+#
+# Traversals dispatch on the node type through tables (see to_pddl); the nested
+# lists and tuples used before are still available with to_legacy/from_legacy.
+
+
+class Effect(object):
+
+    __slots__ = ()
+    _fields = ()
+
+    def __init__(self, *values):
+        for field, value in zip(self._fields, values):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Effect objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Effect objects are immutable')
+
+    def _values(self):
+        return tuple(getattr(self, field) for field in self._fields)
+
+    def __reduce__(self):
+        return type(self), self._values()
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(self) is type(other):
+            return self._values() == other._values()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((type(self),) + self._values())
+
+    def __repr__(self):
+        return to_pddl(self)
+
+    def children(self):
+        """
+        :return: tuple of the effects directly under this one
+        """
+        return ()
+
+
+class Probabilistic(Effect):
+
+    __slots__ = _fields = ('probability', 'literal')
+
+    def __init__(self, probability, literal):
+        """
+        :param probability: float in [0, 1] (1.0 for deterministic effects)
+        :param literal: Literal object made true
+        """
+        super().__init__(probability, literal)
+
+
+class And(Effect):
+
+    __slots__ = _fields = ('effects',)
+
+    def __init__(self, effects):
+        """
+        :param effects: list of Effect objects
+        """
+        super().__init__(tuple(effects))
+
+    def children(self):
+        return self.effects
+
+
+class OneOf(Effect):
+
+    __slots__ = _fields = ('effects',)
+
+    def __init__(self, effects):
+        """
+        :param effects: list of Effect objects, the alternatives
+        """
+        super().__init__(tuple(effects))
+
+    def children(self):
+        return self.effects
+
+
+class When(Effect):
+
+    __slots__ = _fields = ('condition', 'effect')
+
+    def __init__(self, condition, effect):
+        """
+        :param condition: Effect object (And of atomic effects) that must hold
+        :param effect: Effect object happening if it does
+        """
+        super().__init__(condition, effect)
+
+    def children(self):
+        return self.condition, self.effect
+
+
+class Labeled(Effect):
+
+    __slots__ = _fields = ('label', 'effect')
+
+    def __init__(self, label, effect):
+        """
+        :param label: string name of the level (e.g., 'd1')
+        :param effect: Effect object of that level
+        """
+        super().__init__(label, effect)
+
+    def children(self):
+        return self.effect,
+
+
+class Forall(Effect):
+
+    __slots__ = _fields = ('effect',)
+
+    def __init__(self, effect):
+        """
+        :param effect: Effect object
+        """
+        super().__init__(effect)
+
+    def children(self):
+        return self.effect,
+
+
+def walk(effect):
+    """
+        Traverse an effect tree in pre-order, e.g.,
+            [e.literal for e in walk(action.effects) if isinstance(e, Probabilistic)]
+
+    :param effect: Effect object
+    :return: generator of the Effect objects of the tree, effect first
+    """
+    stack = [effect]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        node = pop()
+        yield node
+        children = node.children()
+        if children:
+            extend(children[::-1])
+
+
+def literals(effect, out=None):
+    """
+        Literals of the atomic effects of an effect tree, in pre-order (the
+        same as the Probabilistic nodes of walk, without the generator)
+
+    :param effect: Effect object
+    :param out: list to append the literals to
+    :return: list of Literal objects
+    """
+    if out is None:
+        out = []
+    if type(effect) is Probabilistic:
+        out.append(effect.literal)
+    else:
+        for child in effect.children():
+            literals(child, out)
+    return out
+
+
+def _and_to_pddl(effect):
+    effects = ' '.join(to_pddl(x) for x in effect.effects)
+    return '(and {})'.format(effects) if len(effect.effects) > 1 else effects
+
+
+_TO_PDDL = {
+    Probabilistic: lambda e: repr(e.literal),
+    And: _and_to_pddl,
+    OneOf: lambda e: '(oneof {})'.format(' '.join(to_pddl(x) for x in e.effects)),
+    # the parenthesis after the condition is how conditional effects have always been printed
+    When: lambda e: '(when {0}) {1})'.format(to_pddl(e.condition), to_pddl(e.effect)),
+    Labeled: lambda e: '({0} {1})'.format(e.label, to_pddl(e.effect)),
+    Forall: lambda e: '(forall {0})'.format(to_pddl(e.effect)),
+}
+
+
+def to_pddl(effect):
+    """
+    :param effect: Effect object
+    :return: PDDL text of the effect
+    """
+    return _TO_PDDL[type(effect)](effect)
+
+
+_TO_LEGACY = {
+    Probabilistic: lambda e: (e.probability, e.literal),
+    And: lambda e: [to_legacy(x) for x in e.effects],
+    OneOf: lambda e: ('oneof', [to_legacy(x) for x in e.effects]),
+    When: lambda e: ('when', to_legacy(e.condition), to_legacy(e.effect)),
+    Labeled: lambda e: ('label', e.label, to_legacy(e.effect)),
+    Forall: lambda e: ('forall', to_legacy(e.effect)),
+}
+
+
+def to_legacy(effect):
+    """
+        Encode an effect as the nested lists and tuples used before the Effect
+        classes: [...] for And, (probability, literal), ('oneof', [...]),
+        ('when', condition, effect), ('label', name, effect) and ('forall', effect).
+
+    :param effect: Effect object
+    :return: the legacy encoding of the effect
+    """
+    return _TO_LEGACY[type(effect)](effect)
+
+
+_FROM_LEGACY = {
+    'oneof': lambda e: OneOf(from_legacy(x) for x in e[1]),
+    'when': lambda e: When(from_legacy(e[1]), from_legacy(e[2])),
+    'label': lambda e: Labeled(e[1], from_legacy(e[2])),
+    'forall': lambda e: Forall(from_legacy(e[1])),
+}
+
+
+def from_legacy(effect):
+    """
+        Decode an effect given in the legacy encoding (see to_legacy). Effect
+        objects are returned as they are, so both encodings can be mixed.
+
+    :param effect: legacy encoding of an effect
+    :return: Effect object
+    """
+    if isinstance(effect, Effect):
+        return effect
+    if isinstance(effect, list):
+        return And(from_legacy(x) for x in effect)
+    if isinstance(effect, tuple) and effect and isinstance(effect[0], float):
+        return Probabilistic(effect[0], effect[1])
+    if isinstance(effect, tuple) and effect and isinstance(effect[0], str):
+        return _FROM_LEGACY[effect[0]](effect)
+    raise ValueError('Not an effect: {!r}'.format(effect))
@@ -0,0 +1,44 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+
+class PDDLSyntaxError(ValueError):
+
+    def __init__(self, lineno, column, token=None, filename=None):
+        """
+            First syntax error found in a PDDL text
+
+        :param lineno: line of the error, starting at 1
+        :param column: column of the error, starting at 1
+        :param token: text of the offending token, or None at the end of the input
+        :param filename: file the text was read from, if any
+        """
+        super().__init__(lineno, column, token, filename)
+        self.lineno = lineno
+        self.column = column
+        self.token = token
+        self.filename = filename
+
+    @property
+    def message(self):
+        if self.token is None:
+            return 'unexpected end of input'
+        return "unexpected '{0}'".format(self.token)
+
+    def __str__(self):
+        location = '{0}:{1}'.format(self.lineno, self.column)
+        if self.filename is not None:
+            location = '{0}:{1}'.format(self.filename, location)
+        return '{0}: {1}'.format(location, self.message)
@@ -0,0 +1,196 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compact, array-backed storage of ground atoms (numpy is optional: pip install pypddl[numpy])
+
+try:
+    import numpy as np
+except ImportError:     # only FactStore needs it
+    np = None
+
+from pypddl.predicate import Predicate
+from pypddl.term import Term
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('FactStore needs numpy (pip install pypddl[numpy])')
+
+
+class FactStore(object):
+
+    def __init__(self, predicates, objects, tables, order):
+        """
+            Ground atoms stored as integer matrices, one per predicate
+
+            Predicates, keyed by (name, arity), and objects (the Term arguments)
+            are mapped to dense integer IDs, their index in the given lists. The
+            atoms of the predicate with ID p are the rows of tables[p], an int32
+            matrix with one column per argument holding object IDs, and order
+            holds the predicate ID of each atom in the original sequence, so
+            that converting back (to_atoms) is lossless, order included.
+
+            Use FactStore.from_atoms to build one from Predicate objects.
+
+        :param predicates: list of (name, arity) pairs
+        :param objects: list of Term objects
+        :param tables: list of int32 matrices, one per predicate, with one
+            column per argument
+        :param order: int32 vector with the predicate ID of each atom
+        """
+        _require_numpy()
+        self._predicates = list(predicates)
+        self._objects = list(objects)
+        self._predicate_ids = {p: i for i, p in enumerate(self._predicates)}
+        self._object_ids = {o: i for i, o in enumerate(self._objects)}
+        self._tables = []
+        for (name, arity), table in zip(self._predicates, tables):
+            table = np.asarray(table, dtype=np.int32)    # the store owns the arrays
+            if table.ndim != 2 or table.shape[1] != arity:
+                raise ValueError('Expected a matrix with {} columns for {}'.format(arity, name))
+            table.flags.writeable = False
+            self._tables.append(table)
+        self._order = np.asarray(order, dtype=np.int32)
+        self._order.flags.writeable = False
+
+    @classmethod
+    def from_atoms(cls, atoms):
+        """
+        :param atoms: iterable of Predicate objects (e.g., problem.init)
+        :return: FactStore holding the atoms, in order
+        """
+        _require_numpy()
+        predicate_ids = {}
+        object_ids = {}
+        rows = []       # per predicate: flat list of object IDs
+        counts = []     # per predicate: number of atoms
+        order = []
+        for atom in atoms:
+            key = (atom.name, atom.arity)
+            pid = predicate_ids.get(key)
+            if pid is None:
+                pid = predicate_ids[key] = len(rows)
+                rows.append([])
+                counts.append(0)
+            order.append(pid)
+            counts[pid] += 1
+            flat = rows[pid]
+            for arg in atom.args:
+                oid = object_ids.get(arg)
+                if oid is None:
+                    oid = object_ids[arg] = len(object_ids)
+                flat.append(oid)
+        if len(object_ids) > np.iinfo(np.int32).max:
+            raise OverflowError('Too many objects for int32 IDs')
+        tables = [np.array(flat, dtype=np.int32).reshape(count, arity)
+                  for flat, count, (name, arity) in zip(rows, counts, predicate_ids)]
+        return cls(predicate_ids, object_ids, tables, order)
+
+    def to_atoms(self):
+        """
+        :return: list of Predicate objects, equal to the atoms the store was built from
+        """
+        objects = self._objects
+        decoded = []
+        for (name, arity), table in zip(self._predicates, self._tables):
+            if arity:
+                decoded.append(iter([Predicate(name, [objects[i] for i in row]) for row in table.tolist()]))
+            else:
+                decoded.append(iter([Predicate(name)] * len(table)))
+        return [next(decoded[pid]) for pid in self._order.tolist()]
+
+    @property
+    def predicates(self):
+        """
+        :return: list of (name, arity) pairs, indexed by predicate ID
+        """
+        return self._predicates[:]
+
+    @property
+    def objects(self):
+        """
+        :return: list of Term objects, indexed by object ID
+        """
+        return self._objects[:]
+
+    @property
+    def order(self):
+        """
+        :return: read-only int32 vector with the predicate ID of each atom, in order
+        """
+        return self._order
+
+    def predicate_id(self, name, arity=None):
+        """
+        :param name: name of a predicate
+        :param arity: its arity, only needed if several predicates share the name
+        :return: the ID of the predicate, or None if the store has no atom of it
+        """
+        if arity is not None:
+            return self._predicate_ids.get((name, arity))
+        ids = [i for (n, a), i in self._predicate_ids.items() if n == name]
+        if len(ids) > 1:
+            raise ValueError('Predicate {} has several arities, give one'.format(name))
+        return ids[0] if ids else None
+
+    def object_id(self, obj):
+        """
+        :param obj: a Term, or the name of an (untyped) constant
+        :return: the ID of the object, or None if no atom of the store mentions it
+        """
+        if isinstance(obj, str):
+            obj = Term.constant(obj)
+        return self._object_ids.get(obj)
+
+    def facts(self, name, arity=None):
+        """
+        :param name: name of a predicate
+        :param arity: its arity, only needed if several predicates share the name
+        :return: read-only int32 matrix with the object IDs of its atoms, one row each
+        """
+        pid = self.predicate_id(name, arity)
+        if pid is None:
+            return np.empty((0, arity or 0), dtype=np.int32)
+        return self._tables[pid]
+
+    def select(self, name, args):
+        """
+            Vectorized query of the atoms of a predicate, e.g.,
+                store.select('road', ['l1', None])  # all roads from l1
+
+        :param name: name of a predicate
+        :param args: one entry per argument: a Term, a constant name, or None (any object)
+        :return: int32 matrix with the matching rows of facts(name)
+        """
+        table = self.facts(name, len(args))
+        mask = np.ones(len(table), dtype=bool)
+        for column, arg in enumerate(args):
+            if arg is None:
+                continue
+            oid = self.object_id(arg)
+            if oid is None:
+                return table[:0]
+            mask &= table[:, column] == oid
+        return table[mask]
+
+    def __len__(self):
+        return len(self._order)
+
+    @property
+    def nbytes(self):
+        """
+        :return: bytes held by the arrays of the store
+        """
+        return self._order.nbytes + sum(table.nbytes for table in self._tables)
@@ -0,0 +1,176 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+# Canonical content fingerprints (128-bit BLAKE2b digests) of the model.
+#
+# Every part of a model is encoded as text with separators that cannot appear
+# in PDDL names and digested. Parts whose order does not matter in PDDL (init
+# facts, conjunctions, declarations...) are combined as a multiset: the sum of
+# their digests modulo 2**128 and their count, which does not depend on the
+# order and can be updated one element at a time (see Multiset).
+
+from hashlib import blake2b
+
+from pypddl.effects import Effect, Probabilistic, And, OneOf, When, Labeled, Forall
+
+
+_MASK = (1 << 128) - 1
+
+
+def digest(text):
+    """
+    :param text: canonical encoding of a part of the model
+    :return: its 128-bit digest, as an int
+    """
+    return int.from_bytes(blake2b(text.encode(), digest_size=16).digest(), 'little')
+
+
+def hexdigest(value):
+    """
+    :param value: 128-bit digest, as an int
+    :return: the digest as 32 hexadecimal digits
+    """
+    return '{:032x}'.format(value)
+
+
+class Multiset(object):
+
+    def __init__(self, digests=()):
+        """
+            Order-insensitive combination of digests, updated incrementally
+
+        :param digests: iterable of 128-bit digests (ints)
+        """
+        self.total = 0
+        self.count = 0
+        for value in digests:
+            self.add(value)
+
+    def add(self, value):
+        self.total = (self.total + value) & _MASK
+        self.count += 1
+
+    def remove(self, value):
+        self.total = (self.total - value) & _MASK
+        self.count -= 1
+
+    def digest(self, tag):
+        """
+        :param tag: name of what the multiset holds (e.g., 'init')
+        :return: digest of the multiset
+        """
+        return digest('{}\x00{:x}\x00{}'.format(tag, self.total, self.count))
+
+
+def combine(tag, digests):
+    """
+    :param tag: name of what is combined (e.g., 'predicates')
+    :param digests: iterable of digests, in any order
+    :return: digest of the multiset of digests
+    """
+    return Multiset(digests).digest(tag)
+
+
+def sequence(tag, digests):
+    """
+    :param tag: name of what is combined (e.g., 'parameters')
+    :param digests: iterable of digests, whose order matters
+    :return: digest of the sequence of digests
+    """
+    return digest(tag + ''.join('\x00{:x}'.format(value) for value in digests))
+
+
+def term_text(term):
+    if isinstance(term, str):   # arguments of (= ?x ?y) are names
+        return '{}{}\x01'.format('?' if term.startswith('?') else '=', term)
+    return '{}{}\x01{}'.format('?' if term.is_variable() else '=', term.name, term.type or '')
+
+
+def atom_digest(atom):
+    """
+    :param atom: Predicate object
+    :return: its digest
+    """
+    return digest('\x02'.join([atom.name] + [term_text(arg) for arg in atom.args]))
+
+
+def atoms_multiset(atoms):
+    """
+        Multiset of the digests of many atoms (e.g., problem.init), faster
+        than one by one, as the encodings of their terms are reused
+
+    :param atoms: iterable of Predicate objects
+    :return: Multiset object
+    """
+    texts = {}
+    total = count = 0
+    for atom in atoms:
+        parts = [atom.name]
+        for arg in atom.args:
+            text = texts.get(arg)
+            if text is None:
+                text = texts[arg] = term_text(arg)
+            parts.append(text)
+        total += int.from_bytes(blake2b('\x02'.join(parts).encode(), digest_size=16).digest(), 'little')
+        count += 1
+    multiset = Multiset()
+    multiset.total, multiset.count = total & _MASK, count
+    return multiset
+
+
+def literal_digest(literal):
+    """
+    :param literal: Literal object, or a list of them for a disjunction
+    :return: its digest
+    """
+    if isinstance(literal, list):   # (or ...) of preconditions
+        return combine('or', map(literal_digest, literal))
+    return digest('{}\x03{:x}'.format('+' if literal.is_positive() else '-', atom_digest(literal.predicate)))
+
+
+_EFFECT_DIGEST = {
+    Probabilistic: lambda e: digest('prob\x00{!r}\x00{:x}'.format(e.probability, literal_digest(e.literal))),
+    And: lambda e: combine('and', map(effect_digest, e.effects)),
+    OneOf: lambda e: combine('oneof', map(effect_digest, e.effects)),
+    When: lambda e: sequence('when', (effect_digest(e.condition), effect_digest(e.effect))),
+    Labeled: lambda e: sequence('label\x00' + e.label, (effect_digest(e.effect),)),
+    Forall: lambda e: sequence('forall', (effect_digest(e.effect),)),
+}
+
+
+def effect_digest(effect):
+    """
+    :param effect: Effect object; the order of the effects in And and OneOf does not matter
+    :return: its digest
+    """
+    return _EFFECT_DIGEST[type(effect)](effect)
+
+
+def goal_digest(goal):
+    """
+    :param goal: Literal or Effect object (e.g., labeled goals of MTP problems, or oneof goals)
+    :return: its digest
+    """
+    return effect_digest(goal) if isinstance(goal, Effect) else literal_digest(goal)
+
+
+def names_digest(tag, names_by_type):
+    """
+    :param tag: name of the declaration (e.g., 'objects')
+    :param names_by_type: mapping from type to list of names (:types, :constants, :objects)
+    :return: digest of the typed names, in any order
+    """
+    return combine(tag, (digest('{}\x01{}'.format(name, type or ''))
+                         for type, names in names_by_type.items() for name in names))
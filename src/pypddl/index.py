@@ -0,0 +1,154 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import Counter
+
+from pypddl.predicate import Predicate
+from pypddl.term import Term
+
+
+class FactIndex(object):
+
+    def __init__(self, atoms=()):
+        """
+            Index of ground atoms for membership tests and pattern queries
+
+            Atoms are indexed by predicate name and by (name, argument position,
+            argument), so a query only looks at the atoms sharing its most
+            selective argument. The index counts repeated atoms, as init lists
+            may hold some.
+
+        :param atoms: iterable of Predicate objects (e.g., problem.init)
+        """
+        self._counts = Counter()
+        self._size = 0
+        self._by_name = {}      # name --> {atom: None}, in insertion order
+        self._by_arg = {}       # (name, position, arg) --> {atom: None}
+        for atom in atoms:
+            self.add(atom)
+
+    def add(self, atom):
+        """
+        :param atom: Predicate object to index
+        """
+        self._size += 1
+        self._counts[atom] += 1
+        if self._counts[atom] > 1:
+            return
+        name = atom.name
+        self._by_name.setdefault(name, {})[atom] = None
+        for position, arg in enumerate(atom.args):
+            self._by_arg.setdefault((name, position, arg), {})[atom] = None
+
+    def discard(self, atom):
+        """
+            Remove one occurrence of atom, if indexed
+
+        :param atom: Predicate object to remove
+        """
+        count = self._counts.get(atom, 0)
+        if count == 0:
+            return
+        self._size -= 1
+        if count > 1:
+            self._counts[atom] = count - 1
+            return
+        del self._counts[atom]
+        name = atom.name
+        self.__remove(self._by_name, name, atom)
+        for position, arg in enumerate(atom.args):
+            self.__remove(self._by_arg, (name, position, arg), atom)
+
+    def update(self, atoms):
+        """
+            Make the index hold exactly atoms, only touching the atoms that differ
+
+        :param atoms: iterable of Predicate objects
+        """
+        counts = Counter(atoms)
+        for atom, count in list(self._counts.items()):
+            for _ in range(count - counts.get(atom, 0)):
+                self.discard(atom)
+        for atom, count in counts.items():
+            for _ in range(count - self._counts.get(atom, 0)):
+                self.add(atom)
+
+    @staticmethod
+    def __remove(table, key, atom):
+        atoms = table[key]
+        del atoms[atom]
+        if not atoms:
+            del table[key]
+
+    def __contains__(self, atom):
+        return atom in self._counts
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        # each distinct atom once
+        for atoms in self._by_name.values():
+            yield from atoms
+
+    def count(self, atom):
+        """
+        :param atom: Predicate object
+        :return: times the atom was added (and not discarded)
+        """
+        return self._counts.get(atom, 0)
+
+    def holds(self, name, args=()):
+        """
+        :param name: name of the predicate, e.g., 'open'
+        :param args: list of constant names or Terms, e.g., ['d5']
+        :return: True if the ground atom is indexed
+        """
+        args = [Term.constant(a) if isinstance(a, str) else a for a in args]
+        return Predicate(name, args) in self._counts
+
+    def match(self, name, args=None):
+        """
+            Atoms of a predicate matching a pattern, in insertion order, e.g.,
+                index.match('adj', [None, 'c1'])    # all (adj ?x c1)
+
+        :param name: name of the predicate
+        :param args: one entry per argument: a constant name or Term to match,
+            or None or a variable Term (e.g., Term.variable('?x')) for any
+            argument; None for all the atoms of the predicate
+        :return: list of Predicate objects, each distinct atom once
+        """
+        atoms = self._by_name.get(name, {})
+        if args is None:
+            return list(atoms)
+        bound = []
+        for position, arg in enumerate(args):
+            if arg is None:
+                continue
+            if isinstance(arg, str):
+                arg = Term.constant(arg)
+            elif arg.is_variable():
+                continue
+            candidates = self._by_arg.get((name, position, arg))
+            if candidates is None:
+                return []
+            bound.append(candidates)
+        arity = len(args)
+        if not bound:
+            return [atom for atom in atoms if atom.arity == arity]
+        bound.sort(key=len)
+        smallest, others = bound[0], bound[1:]
+        return [atom for atom in smallest
+                if atom.arity == arity and all(atom in other for other in others)]
@@ -16,9 +16,26 @@
 
 class Literal(object):
 
+    __slots__ = ('_predicate', '_positive', '_hash')
+
     def __init__(self, predicate, positive=True):
-        self._predicate = predicate
-        self._positive  = positive
+        object.__setattr__(self, '_predicate', predicate)
+        object.__setattr__(self, '_positive', positive)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Literal objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Literal objects are immutable')
+
+    def __reduce__(self):
+        return Literal, (self._predicate, self._positive)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     @property
     def predicate(self):
@@ -55,20 +72,17 @@ class Literal(object):
             return 'not {}'.format(str(self._predicate))
 
     def __eq__(self, other):
-        try:
-            if self._predicate.name == other._predicate.name \
-                    and self._predicate.args == other._predicate.args \
-                    and self._positive == other._positive:
-                return True
-            else:
-                return False
-        except:
-            if self._predicate.name == other:
-                return True
-
+        if self is other:   # shared literals
+            return True
+        if isinstance(other, Literal):
+            return self._positive == other._positive and self._predicate == other._predicate
+        return self._predicate.name == other
 
     def __hash__(self):
-        #print(hash(str(self)))
-        return hash((self.predicate, self.is_positive()))
-
-
+        # computed on first use, from the cached hash of the predicate
+        try:
+            return self._hash
+        except AttributeError:
+            value = hash((self._predicate, self._positive))
+            object.__setattr__(self, '_hash', value)
+            return value
@@ -15,14 +15,18 @@
 
 import argparse
 import copy
+import os
+import sys
 
 from pypddl.pddlparser import PDDLParser
+from pypddl.cache import ParseCache
 
 from pypddl.predicate import Predicate
 from pypddl.term      import Term
 from pypddl.literal   import Literal
 from pypddl.action    import Action
 from pypddl.problem import Problem
+from pypddl.domain import Domain
 from pypddl.mtp import multi_tier_compilation_problem, multi_tier_compilation_domain
 
 
@@ -74,6 +78,67 @@ def test_change_problem(problem):
     # print(problem.goal)
 
 
+def run_check(args):
+    """
+        Check the syntax of every file given, without building any model.
+
+    :return: exit status, 1 if some file has a syntax error
+    """
+    status = 0
+    for filename in args['domain-problem']:
+        error = PDDLParser.check(filename)
+        if error is None:
+            print('{}: ok'.format(filename))
+        else:
+            print(error)
+            status = 1
+    return status
+
+
+def run_batch(args):
+    """
+        Parse many problems of the same domain on a pool of worker processes.
+
+        The first file is the domain and every other file a problem of it. Each
+        problem is printed, written into --out-dir, or summarized in one line.
+
+    :return: exit status, 1 if some file could not be parsed
+    """
+    domain_file, problem_files = args['domain-problem'][0], args['domain-problem'][1:]
+    if args['out_dir']:
+        os.makedirs(args['out_dir'], exist_ok=True)
+
+    shared = PDDLParser.parse(domain_file)
+    if not isinstance(shared, Domain):
+        print('{}: could not be parsed'.format(domain_file))
+        return 1
+
+    status = 0
+    results = PDDLParser.parse_many(problem_files, workers=args['workers'], domain=shared)
+    for filename, parsed in results:
+        if isinstance(parsed, Exception):
+            print('{}: could not be parsed: {}'.format(filename, parsed))
+            status = 1
+            continue
+        domain, problem = parsed
+        if problem is None:
+            print('{}: could not be parsed'.format(filename))
+            status = 1
+        elif args['out_dir']:
+            with open(os.path.join(args['out_dir'], os.path.basename(filename)), 'w') as f:
+                problem.write(f)
+                f.write('\n')
+        elif args['print_problem']:
+            print('=================================== {} =================================== '.format(filename))
+            problem.write(sys.stdout)
+            print()
+        else:
+            print('{}: problem {} of domain {}, {} objects, {} init facts'.format(
+                filename, problem.name, problem.domain,
+                sum(len(o) for o in problem.objects.values()), len(problem.init)))
+    return status
+
+
 if __name__ == '__main__':
     # usage = 'python main.py <domain> [<problem>]'
     description = 'Parse and translate a planning domain and problem. '
@@ -103,6 +168,24 @@ if __name__ == '__main__':
                         action='store_true',
                         default=False,
                         help='translate labeled PDDL to MTD and MTP (default: %(default)s)')
+    parser.add_argument('--cache-dir',
+                        default='',
+                        help='directory of an on-disk cache of parsed files, reused across runs')
+    parser.add_argument('--check',
+                        action='store_true',
+                        default=False,
+                        help='only check the syntax of the files, reporting the first error of each (default: %(default)s)')
+    parser.add_argument('--batch',
+                        action='store_true',
+                        default=False,
+                        help='parse many problems of the domain given first, in parallel (default: %(default)s)')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=None,
+                        help='number of worker processes in --batch mode (default: one per CPU)')
+    parser.add_argument('--out-dir',
+                        default='',
+                        help='directory to write each translated PDDL problem in --batch mode')
 
     args = vars(parser.parse_args())    # vars returns a dictionary of the arguments
 
@@ -112,9 +195,17 @@ if __name__ == '__main__':
         args['print_domain'] = True
     #print(args)  # just print the options that will be used
 
+    if args['check']:
+        sys.exit(run_check(args))
+
+    if args['batch']:
+        sys.exit(run_batch(args))
+
+
+    cache = ParseCache(args['cache_dir']) if args['cache_dir'] else None
 
     # Parse the domain and problem given, build data structures
-    domain  = PDDLParser.parse(args['domain-problem'][0])
+    domain  = PDDLParser.parse(args['domain-problem'][0], cache=cache)
     # print("==========> Domain parsed into memory....")
 
     problem = None
@@ -128,7 +219,7 @@ if __name__ == '__main__':
     # two files have been given: domain and problem, load problem now
     if len(args['domain-problem']) == 2:
         print(args['domain-problem'][1])
-        problem = PDDLParser.parse(args['domain-problem'][1])
+        problem = PDDLParser.parse(args['domain-problem'][1], cache=cache)
         # print("==========> Problem parsed into memory....")
 
 
@@ -147,20 +238,24 @@ if __name__ == '__main__':
     if args['print_domain']:
         if not args['out_domain']:
             print('=================================== TRANSLATED PDDL DOMAIN =================================== ')
-            print(repr(domain))
+            domain.write(sys.stdout)
+            print()
             # print(domain)  # Pretty-printing
         else:
             with open(args['out_domain'], 'w') as f:
-                print(repr(domain), file=f)
+                domain.write(f)
+                f.write('\n')
 
     if args['print_problem'] and not problem == None:
         if not args['out_problem']:
             print('=================================== TRANSLATED PDDL PROBLEM =================================== ')
-            print(repr(problem))
+            problem.write(sys.stdout)
+            print()
             # print(problem)
         else:
             with open(args['out_problem'], 'w') as f:
-                print(repr(problem), file=f)
+                problem.write(f)
+                f.write('\n')
     elif args['print_problem'] and problem == None:
         print("There was no problem found in the files provided")
 
@@ -7,6 +7,7 @@ from pypddl.predicate import Predicate
 from pypddl.term      import Term
 from pypddl.literal   import Literal
 from pypddl.action    import Action
+from pypddl.effects   import Probabilistic, And, OneOf, When
 from pypddl.problem import Problem
 
 def generate_explicability_formula(d_prime_domain, current_effects, all_effects, highest_domain, hierarchy):
@@ -69,11 +70,11 @@ def extract_differences(eff1, eff2, discriminants):
     #       - Otherwise, this list is empty, meaning that this effect does not have any particualr condition
     all_predicates = {}
     for pred in eff1:
-        if isinstance(pred, tuple):
+        if isinstance(pred, Probabilistic):
             all_predicates[pred] = []
-        else:
-            left = pred[0]
-            right = pred[1]
+        else:   # When
+            left = pred.condition.effects
+            right = pred.effect.effects
             for r in right:
                 if r in all_predicates:
                     if len(all_predicates[r]) == 0:
@@ -111,18 +112,14 @@ def extract_differences(eff1, eff2, discriminants):
             #   1 - See the effect in the left part of a condition
             #   2 - See the effect in a normal predicate of the other level
             for y in eff2:
-                if isinstance(y, list):
+                if isinstance(y, When):
                     # The effect x is in the right part
-                    if x in y[1]:
+                    if x in y.effect.effects:
                         # And everything from the left part is present in the previous state
                         # We add all the when part
                         this_when = []
-                        # more than one lement
-                        if isinstance(y[0], list):
-                            for p in y[0]:
-                                this_when.append(p)
-                        else:
-                            this_when = y[0]
+                        for p in y.condition.effects:
+                            this_when.append(p)
                         difference.append(this_when)
                 else:
                     if x == y:
@@ -136,7 +133,7 @@ def extract_differences(eff1, eff2, discriminants):
                 if len(difference) > 0:
                     discriminants.append([x, difference])  # We add x or difference
                 else:
-                    discriminants.append(x[1])
+                    discriminants.append(x.literal)
 
         # It is a conditional statement
         else:
@@ -144,13 +141,13 @@ def extract_differences(eff1, eff2, discriminants):
             #   1 - See the effect in the left part of a condition
             #   2 - See the effect in a normal predicate of the other level
             for y in eff2:
-                if isinstance(y, list):
+                if isinstance(y, When):
                     # The effect x is in the right part
-                    if x in y[0][1]:
+                    if x in y.effect.effects:
                         # And everything from the left part is present in the previous state
                         # We add all the when part (which will be negated)
                         this_when = []
-                        for p in y[0][0]:
+                        for p in y.condition.effects:
                             this_when.append(p)
                         difference.append(this_when)
 
@@ -165,8 +162,8 @@ def extract_differences(eff1, eff2, discriminants):
                 if len(difference) > 0:
                     discriminants.append([x, difference])
                 else:
-                    aux = value[0][1].negative(value[0][1].predicate)
-                    discriminants.append([x, (1.0, aux)])
+                    aux = Literal.negative(value[0][1].literal.predicate)
+                    discriminants.append([x, Probabilistic(1.0, aux)])
 
     return discriminants
 
@@ -211,12 +208,12 @@ def multi_tier_compilation_domain(domain, hierarchy, goal_statement, mtp_domain_
         # *Effects*
         # 1. act predicate set to true
         # 2. reset all e_D variables
-        new_effects = [(1.0, Literal(Predicate('act', []), True))]
+        new_effects = [Probabilistic(1.0, Literal(Predicate('act', []), True))]
         for x in hierarchy:
-            new_effects += [(1.0, Literal(Predicate('e_' + x, []), False))]
+            new_effects += [Probabilistic(1.0, Literal(Predicate('e_' + x, []), False))]
 
         # *Add the action to the domain*
-        domain.add_action('continue_' + level, [], new_preconditions, [new_effects])
+        domain.add_action('continue_' + level, [], new_preconditions, And(new_effects))
 
     # For each pair of domain levels (always in decreasing order, we only accept degradation), we have one
     # *DEGRADE* action that checks the observed affects and degrades to the proper level
@@ -245,14 +242,14 @@ def multi_tier_compilation_domain(domain, hierarchy, goal_statement, mtp_domain_
                 # 1. act predicate set to true
                 # 2. reset all e_D variables
                 # 3. set to false l_Dx and set to true l_Dy
-                new_effects = [(1.0, Literal(Predicate('act', []), True))] + \
-                              [(1.0, Literal(Predicate('l_' + lev2, []), True))] + \
-                              [(1.0, Literal(Predicate('l_' + lev1, []), False))]
+                new_effects = [Probabilistic(1.0, Literal(Predicate('act', []), True))] + \
+                              [Probabilistic(1.0, Literal(Predicate('l_' + lev2, []), True))] + \
+                              [Probabilistic(1.0, Literal(Predicate('l_' + lev1, []), False))]
                 for x in hierarchy:
-                    new_effects += [(1.0, Literal(Predicate('e_' + x, []), False))]
+                    new_effects += [Probabilistic(1.0, Literal(Predicate('e_' + x, []), False))]
 
                 # *Add the action to the domain*
-                domain.add_action('degrade_' + lev1 + '_' + lev2, [], new_preconditions, [new_effects])
+                domain.add_action('degrade_' + lev1 + '_' + lev2, [], new_preconditions, And(new_effects))
 
     # We generate the fair and unfair actions
     for action in original_domain_operators:
@@ -260,11 +257,11 @@ def multi_tier_compilation_domain(domain, hierarchy, goal_statement, mtp_domain_
         different_effects = []  # effects i
         higher_domain_effects = []  # higher domain where effect i appears
 
-        # actions.effects = ("oneof", [<list of labeled effects>])
-        for domain_effects in action.effects[0][1]:    
-            # domain_effects = ("label", <level string>, [list of atomic effects])
-            level = domain_effects[1]   # extract the 
-            effects = domain_effects[2]
+        # actions.effects = And([OneOf([<Labeled effects>])])
+        for domain_effects in action.effects.effects[0].effects:
+            # domain_effects = Labeled(<level string>, And([<Probabilistic effects>]))
+            level = domain_effects.label
+            effects = domain_effects.effect.effects
             if effects not in different_effects:
                 different_effects.append(effects)
                 higher_domain_effects.append(level)
@@ -283,11 +280,11 @@ def multi_tier_compilation_domain(domain, hierarchy, goal_statement, mtp_domain_
         # 2. Negation of unfair predicate corresponding to the action
         final_effects = []
         for e, d in zip(different_effects, higher_domain_effects):
-            new_effects = [(1.0, Literal(Predicate('eff_' + d + '_' + action.name, []), True))] + \
-                          [(1.0, Literal(Predicate('act', []), False))]
-            final_effects.append(new_effects)
+            new_effects = [Probabilistic(1.0, Literal(Predicate('eff_' + d + '_' + action.name, []), True))] + \
+                          [Probabilistic(1.0, Literal(Predicate('act', []), False))]
+            final_effects.append(And(new_effects))
         domain.add_action(action.name + '_unfair_', [], new_preconditions,
-                          ("oneof", final_effects))
+                          OneOf(final_effects))
 
         # For each action in the domain, and each domain level, we have an *ACTION_LEVEL* fair action.
         # It represents the set of fair effects from a given domain level
@@ -300,7 +297,7 @@ def multi_tier_compilation_domain(domain, hierarchy, goal_statement, mtp_domain_
             # 2. act predicate
             # 3. Previous preconditions
             # 4. Negation of the unfair predicates
-            new_preconditions = action.precond + \
+            new_preconditions = list(action.precond) + \
                                 [Literal(Predicate('l_' + current_levels[-1], []), True)] + \
                                 [Literal(Predicate('act', []), True)]
             for c in original_domain_operators:
@@ -312,24 +309,24 @@ def multi_tier_compilation_domain(domain, hierarchy, goal_statement, mtp_domain_
             # 3. Unfair predicate for the lower levels
             new_effects = []
 
-            # action.effects = [('oneof', [('label', 'd3', [(1.0, (not (at c2))), (1.0, (at c0))]), ('label', 'd2', [(1.0, (not (at c2))), (1.0, (at c0)), (1.0, (scratch))]), ('label', 'd1', [(1.0, (broken))])])]
-            for domain_l in action.effects[0][1]:
-                level = domain_l[1] # e.g., d3
+            # action.effects = (oneof (d3 (and (not (at c2)) (at c0))) (d2 (and (not (at c2)) (at c0) (scratch))) (d1 (broken)))
+            for domain_l in action.effects.effects[0].effects:
+                level = domain_l.label # e.g., d3
                 effects = []
                 if level in current_levels:
-                    for x in domain_l[2]:
-                        if isinstance(x, tuple):
+                    for x in domain_l.effect.effects:
+                        if isinstance(x, Probabilistic):
                             effects.append(x)
-                    new_effects += [effects]
+                    new_effects += [And(effects)]
                 else:
                     # Unfair part of the action
-                    effects = [(1.0, Literal(Predicate('u_' + action.name, []), True))]
-                    new_effects += [effects]
+                    effects = [Probabilistic(1.0, Literal(Predicate('u_' + action.name, []), True))]
+                    new_effects += [And(effects)]
                     break
 
             # We add the action without conditional effects
             domain.add_action(action.name + '_' + lev, action.params,
-                              new_preconditions, ("oneof", new_effects))
+                              new_preconditions, OneOf(new_effects))
 
         # This part creates the actions that make the system only degrade when *really* needed
         # As a result of the compilation of conditional effects
@@ -349,59 +346,59 @@ def multi_tier_compilation_domain(domain, hierarchy, goal_statement, mtp_domain_
                     for x in aux:
                         precond += [x]
                     eff = []
-                    # action.effects = [('oneof', [('label', 'd3', [(1.0, (not (at ?o))), (1.0, (at ?d))]), ('label', 'd2', [(1.0, (not (at ?o))), (1.0, (at ?d)), (1.0, (scratch))]), ('label', 'd1', [(1.0, (scratch))])])]
-                    for effec in list(action.effects[0][1][hierarchy.index(d)][2]):
+                    # action.effects = (oneof (d3 (and (not (at ?o)) (at ?d))) (d2 (and (not (at ?o)) (at ?d) (scratch))) (d1 (scratch)))
+                    for effec in action.effects.effects[0].effects[hierarchy.index(d)].effect.effects:
                         eff.append(effec)
-                    #eff = list(action.effects[hierarchy.index(d)][1])
-                    eff += ([(1.0, Literal(Predicate('e_' + d_prime, []), True))])
-                    eff += [(1.0, Literal(Predicate('eff_' + d + '_' + action.name, []), False))]
-                    eff += [(1.0, Literal(Predicate('act', []), False))]
-                    eff += [(1.0, Literal(Predicate('u_' + action.name, []), False))]
+                    eff += ([Probabilistic(1.0, Literal(Predicate('e_' + d_prime, []), True))])
+                    eff += [Probabilistic(1.0, Literal(Predicate('eff_' + d + '_' + action.name, []), False))]
+                    eff += [Probabilistic(1.0, Literal(Predicate('act', []), False))]
+                    eff += [Probabilistic(1.0, Literal(Predicate('u_' + action.name, []), False))]
                     domain.add_action(action.name + '_eff_' + d + '_explained_by_' + d_prime,
-                                      action.params, precond, [eff])
+                                      action.params, precond, And(eff))
 
     # For each goal statement in the problem, we will have a *CHECK_GOAL* action that checks that a given goal
     # is achieved when being at a certain domain level
-    # goal_statement = [('label', 'd3', [(1.0, (at c0)), (1.0, (not (scratch))), (1.0, (not (broken)))]), ('label', 'd2', [(1.0, (at c0)), (1.0, (not (broken)))]), ('label', 'd1', [(1.0, (at c2)), (1.0, (not (broken)))])]
+    # goal_statement = [(d3 (and (at c0) (not (scratch)) (not (broken)))), (d2 (and (at c0) (not (broken)))), (d1 (and (at c2) (not (broken))))]
     for goal in goal_statement:
-        domain_level = goal[1]
-        goal_predicates = goal[2]
+        domain_level = goal.label
+        goal_predicates = goal.effect.effects
         # The preconditions will be formed by the goal statement and the proper level
         new_preconditions = []
         or_statement = False
         for p in goal_predicates:
             # If the goal statement for this level does not have an or
-            if isinstance(p, tuple):
-                new_preconditions += [p[1]]
+            if isinstance(p, Probabilistic):
+                new_preconditions += [p.literal]
             # Otherwise, we have to create as many check_goal actions as parts of the or
             # TODOL: this may be broken! (May 2022)
             else:
                 new_preconditions = []
                 or_statement = True
-                for pred in p:
-                    new_preconditions += [pred[1]]
+                for pred in p.children():
+                    new_preconditions += [pred.literal]
                 new_preconditions += [Literal(Predicate('l_' + str(domain_level), []), True)]
 
                 new_preconditions += [Literal(Predicate('act', []), True)]
 
-                new_effects = [(1.0, Literal(Predicate('end', []), True))]
+                new_effects = [Probabilistic(1.0, Literal(Predicate('end', []), True))]
 
                 domain.add_action('check_goal_' + domain_level, [],
                                   new_preconditions,
-                                  [new_effects])
+                                  And(new_effects))
 
         if not or_statement:
             new_preconditions += [Literal(Predicate('l_' + str(domain_level), []), True)]
 
             new_preconditions += [Literal(Predicate('act', []), True)]
 
-            new_effects = [(1.0, Literal(Predicate('end', []), True))]
+            new_effects = [Probabilistic(1.0, Literal(Predicate('end', []), True))]
 
-            domain.add_action('check_goal_' + domain_level, [], new_preconditions, [new_effects])
+            domain.add_action('check_goal_' + domain_level, [], new_preconditions, And(new_effects))
 
     # Write the domain
     with open(mtp_domain_file, 'w') as f:
-        print(repr(domain), file=f)
+        domain.write(f)
+        f.write('\n')
 
 
 # Compilation of the problem
@@ -412,14 +409,14 @@ def multi_tier_compilation_problem(problem, mtp_problem_file):
     #   - This relationship is ordered in the problem file
     #   - Lattice structures are denoted by '_'
     domains = []
-    for d in problem.goal:  # problem.goal shold be a list of labelled goals
-        domain = d[1]   # get the label
+    for d in problem.goal:  # problem.goal shold be a list of Labeled goals
+        domain = d.label   # get the label
         domains.append(domain)
 
     # Update the initial state
-    problem.init.append(Predicate('act'))  # act predicate
+    problem.add_to_init(Predicate('act'))  # act predicate
     # initial domain level (top model in the hierarchy)
-    problem.init.append(Predicate('l_' + (str(domains[0]))))
+    problem.add_to_init(Predicate('l_' + (str(domains[0]))))
 
     # Update the goal
     original_goal = list(problem.goal)
@@ -427,7 +424,8 @@ def multi_tier_compilation_problem(problem, mtp_problem_file):
 
     # Write the problem
     with open(mtp_problem_file, 'w') as f:
-        print(repr(problem), file=f)
+        problem.write(f)
+        f.write('\n')
 
     # Return the list/hierarchy of domain models
     return domains, original_goal
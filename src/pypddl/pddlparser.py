@@ -14,15 +14,28 @@
 # along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from ply import lex
-from ply import yacc
+import concurrent.futures
+import contextlib
+import copy
+import functools
+import hashlib
+import mmap
+import os
+import re
+import sys
+import threading
 
 from pypddl.term      import Term
 from pypddl.literal   import Literal
+from pypddl.effects   import Probabilistic, And, OneOf, When, Labeled, Forall
 from pypddl.predicate import Predicate
 from pypddl.action    import Action
 from pypddl.domain    import Domain
 from pypddl.problem   import Problem
+from pypddl.symbols   import SymbolTable
+from pypddl.errors    import PDDLSyntaxError
+from pypddl.scanner   import objects_span, decode_objects, init_span, decode_ground_atoms
+from pypddl.tokenizer import RegexLexer
 
 tokens = (
     'NAME',
@@ -133,7 +146,7 @@ def t_PROBABILITY(t):
 
 def t_newline(t):
     r'\n+'
-    t.lineno += len(t.value)
+    t.lexer.lineno += len(t.value)
 
 
 def t_error(t):
@@ -141,8 +154,18 @@ def t_error(t):
     t.lexer.skip(1)
 
 
-# build the lexer
-lex.lex()
+# Rules of the lexer in ply's order (functions first, then strings by decreasing
+# regex length), for the RegexLexer. t_NAME is shadowed by t_KEYWORD.
+_regex_rules = [
+    ('KEYWORD', t_KEYWORD.__doc__),
+    ('VARIABLE', t_VARIABLE.__doc__),
+    ('PROBABILITY', t_PROBABILITY.__doc__),
+    ('newline', t_newline.__doc__),
+    ('LPAREN', t_LPAREN),
+    ('RPAREN', t_RPAREN),
+    ('HYPHEN', t_HYPHEN),
+    ('EQUALS', t_EQUALS),
+]
 
 
 def p_pddl(p):
@@ -215,12 +238,13 @@ def p_require_def(p):
 
 
 def p_require_key_lst(p):
-    '''require_key_lst : require_key require_key_lst
+    '''require_key_lst : require_key_lst require_key
                        | require_key'''
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = [p[1]] + p[2]
+        p[0] = p[1]
+        p[0].append(p[2])
 
 
 def p_require_key(p):
@@ -271,12 +295,13 @@ def p_predicates_def(p):
 
 
 def p_predicate_def_lst(p):
-    '''predicate_def_lst : predicate_def predicate_def_lst
+    '''predicate_def_lst : predicate_def_lst predicate_def
                          | predicate_def'''
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = [p[1]] + p[2]
+        p[0] = p[1]
+        p[0].append(p[2])
 
 
 def p_predicate_def(p):
@@ -284,22 +309,24 @@ def p_predicate_def(p):
                      | LPAREN NAME variables_lst RPAREN
                      | LPAREN NAME RPAREN'''
     if len(p) == 4:
-        p[0] = Predicate(p[2])
+        p[0] = p.parser.symbols.atom(p[2])
     elif len(p) == 5:
-        p[0] = Predicate(p[2], p[3])
+        p[0] = p.parser.symbols.atom(p[2], p[3])
 
 
 def p_actions_def(p):
-    '''actions_def : action_def_lst'''
-    p[0] = {"actions" : p[1]}
+    '''actions_def : action_def_lst
+                   | empty'''
+    p[0] = {"actions" : p[1] if p[1] is not None else []}
 
 def p_action_def_lst(p):
-    '''action_def_lst : action_def action_def_lst
-                      | empty'''
+    '''action_def_lst : action_def_lst action_def
+                      | action_def'''
     if len(p) == 2:
-        p[0] = []
+        p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = [p[1]] + p[2]
+        p[0] = p[1]
+        p[0].append(p[2])
 
 
 def p_action_def(p):
@@ -338,7 +365,7 @@ def p_precond_def(p):
 def p_effects_def(p):
     '''effects_def : EFFECT_KEY act_effects_lst'''  # :effect ....
     if len(p) == 3:
-        p[0] = p[2]
+        p[0] = And(p[2])
 
 # forall is not well done, only at the top level
 # forall is also not accounted in prec
@@ -350,39 +377,41 @@ def p_act_effects_lst(p):   # always returns a list of effects: all must happen!
                 | LPAREN ONEOF_KEY oneof_effects_lst RPAREN
                 | LPAREN WHEN_KEY deterministic_effect act_effects_lst RPAREN'''
     if len(p) == 2:
-        p[0] = p[1] # p[1] is a list of on literal effect with probability: [(prob, literal)]
+        p[0] = p[1] # p[1] is a list of one atomic effect: [Probabilistic(prob, literal)]
     elif len(p) == 5 and p[2] == 'and': # this is not nice, we should use AND_KEY
         p[0] = p[3] # p[3] will be a list as per and rule
     elif len(p) == 5 and p[2] == 'oneof':   # this is not nice, we should use ONEOF_KEY
-        p[0] = [("oneof", p[3])]
+        p[0] = [OneOf(p[3])]
+    elif len(p) == 5 and p[2] == 'forall':   # forall
+        p[0] = [Forall(And(p[3]))]
     elif len(p) == 6 and p[2] == 'when':   # when
-        p[0] = [("when", p[3], p[4])]
-    elif len(p) == 6 and p[2] == 'forall':   # forall
-        p[0] = [("forall", p[3])]
+        p[0] = [When(And(p[3]), And(p[4]))]
 
 def p_and_effects_lst(p):   # a list of effects
     '''and_effects_lst : act_effects_lst
-                    | act_effects_lst and_effects_lst'''
+                    | and_effects_lst act_effects_lst'''
     if len(p) == 2:
         p[0] = p[1] # p[1] yields a list
     if len(p) == 3:
-        p[0] = p[1] + p[2]  # both are lists
+        p[0] = p[1]
+        p[0].extend(p[2])  # both are lists
 
 def p_oneof_effects_lst(p):   # and AND of effects: all must happen
     '''oneof_effects_lst : oneof_effect
-                    | oneof_effect oneof_effects_lst'''
+                    | oneof_effects_lst oneof_effect'''
     if len(p) == 2:
         p[0] = p[1]
     if len(p) == 3:
-        p[0] = p[1] + p[2]
+        p[0] = p[1]
+        p[0].extend(p[2])
 
 def p_oneof_effect(p):   # list of effects or labeled effects
     '''oneof_effect : act_effects_lst
                     | LPAREN NAME act_effects_lst RPAREN'''
     if len(p) == 2:
-        p[0] = [p[1]]
+        p[0] = [And(p[1])]
     if len(p) == 5:
-        p[0] = [("label", p[2], p[3])]
+        p[0] = [Labeled(p[2], And(p[3]))]
 
 
 
@@ -398,20 +427,21 @@ def p_deterministic_effect(p):
         p[0] = p[3] # effect description has an AND
 
 def p_atomic_effects_lst(p):
-    '''atomic_effects_lst : atomic_effect atomic_effects_lst
+    '''atomic_effects_lst : atomic_effects_lst atomic_effect
                    | atomic_effect'''
     if len(p) == 2:
         p[0] = p[1]
     elif len(p) == 3:
-        p[0] = p[1] + p[2]
+        p[0] = p[1]
+        p[0].extend(p[2])
 
 def p_atomic_effect(p):
     '''atomic_effect : literal
               | LPAREN PROBABILISTIC_KEY PROBABILITY literal RPAREN'''  # needs to change
     if len(p) == 2:
-        p[0] = [(1.0, p[1])]
+        p[0] = [Probabilistic(1.0, p[1])]
     elif len(p) == 6:
-        p[0] = [(p[3], p[4])]
+        p[0] = [Probabilistic(p[3], p[4])]
 
 
 
@@ -421,14 +451,15 @@ def p_atomic_effect(p):
 ###################################################3
 
 def p_literals_lst(p):
-    '''literals_lst : literal literals_lst
+    '''literals_lst : literals_lst literal
                     | literal
-                    | or_literal literals_lst
+                    | literals_lst or_literal
                     | or_literal'''
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = [p[1]] + p[2]
+        p[0] = p[1]
+        p[0].append(p[2])
 
 
 def p_or_literal(p):
@@ -441,9 +472,9 @@ def p_literal(p):
     '''literal : LPAREN NOT_KEY predicate RPAREN
                | predicate'''
     if len(p) == 2:
-        p[0] = Literal.positive(p[1])
+        p[0] = p.parser.symbols.literal(p[1], True)
     elif len(p) == 5:
-        p[0] = Literal.negative(p[3])
+        p[0] = p.parser.symbols.literal(p[3], False)
 
 
 def p_predicate(p):
@@ -453,100 +484,104 @@ def p_predicate(p):
                  | LPAREN NAME constants_lst RPAREN
                  | LPAREN EQUALS VARIABLE VARIABLE RPAREN'''
     if len(p) == 4:
-        p[0] = Predicate(p[2])
+        p[0] = p.parser.symbols.atom(p[2])
     elif len(p) == 5:
-        p[0] = Predicate(p[2], p[3])
+        p[0] = p.parser.symbols.atom(p[2], p[3])
     elif len(p) == 6:
-        p[0] = Predicate('=', [p[3], p[4]])
+        p[0] = p.parser.symbols.atom('=', [p[3], p[4]])
 
 def p_variables_or_constants_lst(p):
-    '''variables_or_constants_lst : variable variables_or_constants_lst
-                                | constant variables_or_constants_lst
+    '''variables_or_constants_lst : variables_or_constants_lst variable
+                                | variables_or_constants_lst constant
                                 | variable
                                 | constant
                                 '''
     if len(p) == 2:
-        p[0] = [ Term.variable(p[1]) ]
+        p[0] = [ p[1] ]
     elif len(p) == 3:
-        p[0] = [ Term.variable(p[1]) ] + p[2]
+        p[0] = p[1]
+        p[0].append(p[2])
 
 
 
 # not used
 def p_ground_predicates_lst(p):
-    '''ground_predicates_lst : ground_predicate ground_predicates_lst
+    '''ground_predicates_lst : ground_predicates_lst ground_predicate
                              | ground_predicate'''
     if len(p) == 2:
         p[0] = [p[1]]
     elif len(p) == 3:
-        p[0] = [p[1]] + p[2]
+        p[0] = p[1]
+        p[0].append(p[2])
 
 # not used
 def p_ground_predicate(p):
     '''ground_predicate : LPAREN NAME constants_lst RPAREN
                         | LPAREN NAME RPAREN'''
     if len(p) == 4:
-        p[0] = Predicate(p[2])
+        p[0] = p.parser.symbols.atom(p[2])
     elif len(p) == 5:
-        p[0] = Predicate(p[2], p[3])
+        p[0] = p.parser.symbols.atom(p[2], p[3])
 
 
 def p_typed_constants_lst(p):
-    '''typed_constants_lst : constants_lst HYPHEN type typed_constants_lst
+    '''typed_constants_lst : typed_constants_lst constants_lst HYPHEN type
                            | constants_lst HYPHEN type'''
-    p[0] = p[1]
-    for const in p[0]:    # set the type of each var in the list
-            const.type = p[3]
-    if len(p) == 5:
-        p[0] = p[0] + p[4]
+    symbols = p.parser.symbols
+    if len(p) == 4:
+        p[0] = [symbols.constant(c.name, p[3]) for c in p[1]]
+    elif len(p) == 5:   # constants are interned, so typed ones are new terms
+        p[0] = p[1]
+        p[0].extend(symbols.constant(c.name, p[4]) for c in p[2])
 
 
 def p_typed_variables_lst(p):
-    '''typed_variables_lst : variables_lst HYPHEN type typed_variables_lst
+    '''typed_variables_lst : typed_variables_lst variables_lst HYPHEN type
                            | variables_lst HYPHEN type'''
-    p[0] = p[1]
-    for var in p[0]:    # set the type of each var in the list
-            var.type = p[3]
-    if len(p) == 5:
-        p[0] = p[0] + p[4]
+    if len(p) == 4:
+        p[0] = [Term.variable(v.name, p[3]) for v in p[1]]
+    elif len(p) == 5:   # terms are immutable, so typed vars are new terms
+        p[0] = p[1]
+        p[0].extend(Term.variable(v.name, p[4]) for v in p[2])
 
 
 def p_constants_lst(p):
-    '''constants_lst : constant constants_lst
+    '''constants_lst : constants_lst constant
                      | constant'''
     if len(p) == 2:
         p[0] = [ p[1] ]
     elif len(p) == 3:
-        p[0] = [ p[1] ] + p[2]
+        p[0] = p[1]
+        p[0].append(p[2])
 
 
 def p_variables_lst(p):
-    '''variables_lst : variable variables_lst
+    '''variables_lst : variables_lst variable
                      | variable'''
     if len(p) == 2:
         p[0] = [ p[1] ]
     elif len(p) == 3:
-        p[0] = [ p[1] ] + p[2]
+        p[0] = p[1]
+        p[0].append(p[2])
 
 def p_names_lst(p):
-    '''names_lst : NAME names_lst
+    '''names_lst : names_lst NAME
                  | NAME'''
-    if len(p) == 1:
-        p[0] = []
-    elif len(p) == 2:
-        p[0] = [p[1]]
+    if len(p) == 2:
+        p[0] = [p.parser.symbols.name(p[1])]
     elif len(p) == 3:
-        p[0] = [p[1]] + p[2]
+        p[0] = p[1]
+        p[0].append(p.parser.symbols.name(p[2]))
 
 
 def p_type(p):
     '''type : NAME'''
-    p[0] = p[1]
+    p[0] = p.parser.symbols.name(p[1])
 
 
 def p_constant(p):
     '''constant : NAME'''
-    p[0] = Term.constant(p[1])
+    p[0] = p.parser.symbols.constant(p[1])
 
 def p_variable(p):
     '''variable : VARIABLE'''
@@ -575,13 +610,20 @@ def p_plan_problem_def(p):
 
 def p_objects_def(p):
     '''objects_def : LPAREN OBJECTS_KEY typed_constants_lst RPAREN
-                   | LPAREN OBJECTS_KEY constants_lst RPAREN'''
-    p[0] = p[3]
+                   | LPAREN OBJECTS_KEY constants_lst RPAREN
+                   | LPAREN OBJECTS_KEY RPAREN'''
+    if len(p) == 4:     # emptied section, decoded by the scanner
+        p[0] = p.parser.sections.pop('objects', [])
+    elif len(p) == 5:
+        p[0] = p[3]
 
 def p_init_def(p):
     '''init_def : LPAREN INIT_KEY LPAREN AND_KEY ground_predicates_lst RPAREN RPAREN
-                | LPAREN INIT_KEY ground_predicates_lst RPAREN'''
-    if len(p) == 5:
+                | LPAREN INIT_KEY ground_predicates_lst RPAREN
+                | LPAREN INIT_KEY RPAREN'''
+    if len(p) == 4:     # emptied section, decoded (or to be decoded) by the scanner
+        p[0] = p.parser.sections.pop('init', [])
+    elif len(p) == 5:
         p[0] = p[3]
     elif len(p) == 8:
         p[0] = p[5]
@@ -605,39 +647,565 @@ def p_error(p):
     print("Error: syntax error when parsing '{}'".format(p))
 
 
+# The lexer and LALR tables are generated at build time (see setup.py) and
+# shipped next to this module. They are only loaded, or generated if missing,
+# on the first parse so that importing this module stays cheap.
+_TABLES_DIR = os.path.dirname(os.path.abspath(__file__))
+_LEXTAB = 'lextab'
+_PARSETAB = 'parsetab.pickle'
+_INIT_PARSETAB = 'parsetab_init.pickle'   # parser of :init sections alone, see _get_init_parser
+
+# Master lexer and parsers, built once and only ever used as templates: each
+# PDDLParser instance parses with its own clones of them.
+_lexer = None
+_regex_lexer = None
+_parser = None
+_init_parser = None
+_reductions = None  # (length, nonterminal) of each production, for checking only
+_build_lock = threading.Lock()
+
+
+def _build(outputdir=_TABLES_DIR):
+    """
+        Build the lexer and parser, loading their tables from outputdir.
+
+        ply is imported here rather than at module level since importing it
+        costs more than loading the tables themselves. The lexer is loaded in
+        optimized mode. The parser tables are checked against the grammar
+        signature, which is all ply's optimized mode would skip, so stale
+        tables are regenerated instead of silently used.
+
+    :return: a (lexer, parser) tuple
+    """
+    from ply import lex
+    from ply import yacc
+
+    module = sys.modules[__name__]
+    lexer = lex.lex(module=module, optimize=True,
+                    lextab='{}.{}'.format(__package__, _LEXTAB), outputdir=outputdir)
+    parser = yacc.yacc(module=module, debug=False, write_tables=True,
+                       picklefile=os.path.join(outputdir, _PARSETAB))
+    return lexer, parser
+
+
+def _build_init_parser(outputdir=_TABLES_DIR):
+    # LALR tables of the grammar started at init_def, so documents parsed by
+    # the main parser are still only domains and problems. Rules unreachable
+    # from init_def are expected, hence the silent error log.
+    from ply import yacc
+
+    return yacc.yacc(module=sys.modules[__name__], start='init_def', debug=False, write_tables=True,
+                     picklefile=os.path.join(outputdir, _INIT_PARSETAB), errorlog=yacc.NullLogger())
+
+
+def write_tables(outputdir):
+    """
+        Generate the lexer and parser tables into outputdir (used by setup.py).
+
+    :param outputdir: directory of the pypddl package being built
+    """
+    from ply import lex
+    from ply import yacc
+
+    module = sys.modules[__name__]
+    lex.lex(module=module).writetab(_LEXTAB, outputdir)
+    yacc.yacc(module=module, debug=False, write_tables=True,
+              picklefile=os.path.join(outputdir, _PARSETAB))
+    _build_init_parser(outputdir)
+
+
+def _get_parser(lexer='regex'):
+    """
+    :param lexer: 'regex' for the RegexLexer, 'ply' for the lexer generated by ply
+    :return: the master (lexer, parser) pair
+    """
+    global _lexer, _regex_lexer, _parser, _reductions
+    if _parser is None:
+        with _build_lock:   # ply's table loading is not thread-safe
+            if _parser is None:
+                _lexer, parser = _build()
+                _regex_lexer = RegexLexer(_regex_rules, reserved, converters={'PROBABILITY': float},
+                                          ignore=t_ignore, errorf=t_error)
+                _reductions = [(p.len, p.name) for p in parser.productions]
+                _parser = parser
+    if lexer == 'regex':
+        return _regex_lexer, _parser
+    if lexer == 'ply':
+        return _lexer, _parser
+    raise ValueError("unknown lexer '{}', expected 'regex' or 'ply'".format(lexer))
+
+
+def _get_init_parser():
+    """
+        The parser of :init sections, only needed when a lazily skipped
+        section is not a flat list of atoms, so built on first use.
+
+    :return: the master parser of init_def
+    """
+    global _init_parser
+    _get_parser()
+    if _init_parser is None:
+        with _build_lock:
+            if _init_parser is None:
+                _init_parser = _build_init_parser()
+    return _init_parser
+
+
+# Modules whose source decides what a parse returns: the grammar, lexers and
+# scanner, and the model classes that cached (pickled) results are made of.
+# Tests, tools and the generated tables are left out, so that writing the
+# tables on the first run or editing a test keeps cached entries valid.
+_GRAMMAR_MODULES = ('pddlparser', 'tokenizer', 'scanner', 'symbols', 'errors',
+                    'term', 'predicate', 'literal', 'effects', 'action', 'domain', 'problem',
+                    'facts', 'index', 'fingerprint')
+
+
+@functools.lru_cache(maxsize=None)
+def grammar_version():
+    """
+        Digest identifying the grammar and the object model it builds.
+
+        It covers the source of the modules in _GRAMMAR_MODULES, so any change
+        to the grammar rules or to the model classes yields a new version. Used
+        to key caches of parsed models.
+
+    :return: hex digest string
+    """
+    digest = hashlib.sha256()
+    for name in _GRAMMAR_MODULES:
+        with open(os.path.join(_TABLES_DIR, name + '.py'), 'rb') as f:
+            digest.update(name.encode() + b'\x00')
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# Comments run from ';' to the end of the line. Carriage returns are dropped as
+# well, so files with DOS line endings lex exactly like their Unix counterparts.
+_NOISE_RE = re.compile(rb';[^\n]*|\r')
+_TEXT_NOISE_RE = re.compile(r';[^\n]*|\r')
+
+
+def _normalize(buffer):
+    """
+        Turn raw PDDL bytes into the text handed to the lexer.
+
+        Comments are stripped and the text lowercased in bulk, in one pass over
+        the buffer each, so the cost is linear in the input size.
+
+    :param buffer: any bytes-like object (bytes, bytearray, memoryview or mmap)
+    :return: a single contiguous string ready to be lexed
+    """
+    return _NOISE_RE.sub(b'', buffer).lower().decode('utf-8')
+
+
+def _normalize_text(text):
+    """
+        Same as _normalize, for PDDL that is already a string.
+    """
+    return _TEXT_NOISE_RE.sub('', text).lower()
+
+
+def _read_file(filename):
+    """
+        Read and normalize a PDDL file, memory-mapping it to avoid an extra copy.
+
+    :param filename: path to the PDDL file
+    :return: the normalized text of the file
+    """
+    with open(filename, 'rb') as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            return ''
+        with buffer:
+            return _normalize(buffer)
+
+
+def _elide(data, spans):
+    """
+        Empty the given sections of data, keeping the line numbers of the rest.
+
+    :param data: normalized PDDL text
+    :param spans: (start, end) offsets of the sections bodies, in order
+    :return: the text without the sections bodies
+    """
+    pieces = []
+    pos = 0
+    for start, end in spans:
+        pieces.append(data[pos:start])
+        pieces.append('\n' * data.count('\n', start, end))
+        pos = end
+    pieces.append(data[pos:])
+    return ''.join(pieces)
+
+
+def _decode_init(body, symbols):
+    """
+        Decode the body of an :init section skipped by a lazy parse.
+
+        Flat lists of ground atoms, by far the common case, are decoded by the
+        scanner without lexing; anything else goes through the grammar.
+
+    :param body: normalized text between the :init keyword and its closing parenthesis
+    :param symbols: SymbolTable of the parse that skipped the section
+    :return: list of Predicate objects
+    """
+    init = decode_ground_atoms(body, symbols, reserved)
+    if init is None:
+        parser = copy.copy(_get_init_parser())     # shares the tables, not the parsing stacks
+        lexer = _regex_lexer.clone()
+        lexer.lineno = 1
+        parser.symbols = symbols
+        parser.sections = {}
+        init = parser.parse('(:init ' + body + ')', lexer=lexer)
+        if not isinstance(init, list):
+            raise ValueError('syntax error in the :init section')
+    return init
+
+
+class _pooled(object):
+    """
+        Method decorator for PDDLParser: on an instance it is a plain method,
+        on the class it runs on a parser borrowed from the shared pool, so that
+        PDDLParser.parse(filename) keeps working and is thread-safe.
+    """
+
+    def __init__(self, method):
+        self._method = method
+        functools.update_wrapper(self, method)
+
+    def __get__(self, instance, owner):
+        if instance is not None:
+            return self._method.__get__(instance, owner)
+
+        @functools.wraps(self._method)
+        def pooled(*args, **kwargs):
+            with owner.pool().parser() as parser:
+                return self._method(parser, *args, **kwargs)
+        return pooled
 
 
+class PDDLParser(object):
 
+    def __init__(self, lexer='regex'):
+        """
+            Construct a reentrant parser.
 
+            Each instance owns its lexer and parser state, while the lexer and
+            LALR tables, which are read-only, are shared by all instances. An
+            instance must not be used by two threads at once, but any number of
+            instances can parse concurrently without locking.
 
-
-
-
-
-# build parser
-yacc.yacc()
-
-
-class PDDLParser(object):
+        :param lexer: 'regex' (default) to tokenize with one master regular
+            expression, or 'ply' for the lexer generated by ply; both produce
+            the same tokens
+        """
+        lexer, parser = _get_parser(lexer)
+        self._lexer = lexer.clone()
+        self._parser = copy.copy(parser)   # shares the tables, not the parsing stacks
 
     @classmethod
-    def parse(cls, filename):
-        data = cls.__read_input(filename)
-        return yacc.parse(data)
+    def pool(cls):
+        """
+        :return: the PDDLParserPool used when parsing through the class
+        """
+        return _default_pool
+
+    @_pooled
+    def parse(self, filename, cache=None, symbols=None, lazy=False):
+        """
+            Parse a PDDL file.
+
+        :param filename: path to the PDDL file
+        :param cache: optional ParseCache consulted before lexing and parsing
+        :param symbols: optional SymbolTable to intern names and constants in,
+            shared across calls (by default each file gets its own table)
+        :param lazy: skip the :init section of problems and decode it on first
+            access to Problem.init instead, so reading the name, domain, objects
+            and goal of a large problem costs little more than reading the file
+            (syntax errors in :init then raise ValueError on that access)
+        :return: a Domain, a Problem or a (Domain, Problem) tuple, or None if
+            the file has syntax errors
+        """
+        return self.__parse_normalized(_read_file(filename), cache, symbols, lazy)
+
+    @_pooled
+    def parse_string(self, text, cache=None, symbols=None, lazy=False):
+        """
+            Parse PDDL held in a string, without touching the filesystem.
+
+            Takes the same keyword arguments and returns the same as parse.
+        """
+        return self.__parse_normalized(_normalize_text(text), cache, symbols, lazy)
+
+    @_pooled
+    def parse_bytes(self, data, cache=None, symbols=None, lazy=False):
+        """
+            Parse UTF-8 encoded PDDL held in any bytes-like object (bytes,
+            bytearray, memoryview, mmap), without touching the filesystem.
+
+            Takes the same keyword arguments and returns the same as parse.
+        """
+        return self.__parse_normalized(_normalize(data), cache, symbols, lazy)
+
+    @_pooled
+    def parse_stream(self, stream, cache=None, symbols=None, lazy=False):
+        """
+            Parse PDDL read from a file-like object, in text or binary mode
+            (e.g., a socket file or sys.stdin).
+
+            Takes the same keyword arguments and returns the same as parse.
+        """
+        data = stream.read()
+        if isinstance(data, str):
+            return self.parse_string(data, cache=cache, symbols=symbols, lazy=lazy)
+        return self.parse_bytes(data, cache=cache, symbols=symbols, lazy=lazy)
+
+    @_pooled
+    def check(self, filename):
+        """
+            Check the syntax of a PDDL file, stopping at the first error.
+
+            The tokens only drive the LALR tables of the grammar: no semantic
+            action runs and no model is built, so checking is much cheaper than
+            parsing. Illegal characters, which parse only reports and skips, are
+            errors here.
+
+        :param filename: path to the PDDL file
+        :return: None if the file is syntactically valid, or the PDDLSyntaxError
+            of its first error
+        """
+        error = self.__check_normalized(_read_file(filename))
+        if error is not None:
+            error.filename = filename
+        return error
+
+    @_pooled
+    def check_string(self, text):
+        """
+            Same as check, for PDDL held in a string.
+        """
+        return self.__check_normalized(_normalize_text(text))
+
+    def __check_normalized(self, data):
+        # data is already normalized (see _read_file and _normalize_text)
+        self._lexer.input(data)
+        self._lexer.lineno = 1
+        self._lexer.lexerrorf = self.__syntax_error
+        try:
+            self.__recognize()
+        except PDDLSyntaxError as error:
+            return error
+        finally:
+            self._lexer.lexerrorf = t_error
+            self._lexer.input('')
+        return None
+
+    def __recognize(self):
+        # LR automaton of the parser without its symbol stack and semantic actions
+        action, goto, reductions = self._parser.action, self._parser.goto, _reductions
+        states = [0]
+        state = 0
+        next_token = self._lexer.token
+        while True:
+            token = next_token()
+            type = token.type if token is not None else '$end'
+            while True:
+                move = action[state].get(type)
+                if move is None:
+                    self.__syntax_error(token)
+                if move > 0:    # shift
+                    states.append(move)
+                    state = move
+                    break
+                if move == 0:   # accept
+                    return
+                length, name = reductions[-move]
+                if length:
+                    del states[-length:]
+                state = goto[states[-1]][name]
+                states.append(state)
+
+    def __syntax_error(self, token):
+        # error function of the lexer and of the checker: token is None at the end of the input
+        if token is None:
+            lineno, lexpos, value = self._lexer.lineno, len(self._lexer.lexdata), None
+        else:
+            lineno, lexpos = token.lineno, token.lexpos
+            value = token.value[0] if token.type == 'error' else str(token.value)
+        column = lexpos - self._lexer.lexdata.rfind('\n', 0, lexpos)
+        raise PDDLSyntaxError(lineno, column, value)
 
-    @classmethod
-    def __read_input(cls, filename):
-        with open(filename, 'r', encoding='utf-8') as file:
-            data = ''
-            for line in file:
-                line = line.rstrip().lower()
-                line = cls.__strip_comments(line)
-                data += '\n' + line
-        return data
+    def __parse_normalized(self, data, cache, symbols, lazy=False):
+        if cache is not None:
+            return cache.fetch(data, functools.partial(self.__parse_text, symbols=symbols, lazy=lazy))
+        return self.__parse_text(data, symbols, lazy)
 
     @classmethod
-    def __strip_comments(cls, line):
-        pos = line.find(';')
-        if pos != -1:
-            line = line[:pos]
-        return line
+    def parse_many(cls, filenames, workers=None, domain=None, ordered=True):
+        """
+            Parse many files on a pool of worker processes.
+
+            When domain is given, it is parsed once here and sent to every
+            worker at start-up, and each file is then parsed as a problem of
+            that domain, in a ProblemSession. Workers only send the problems
+            back: each is paired with the one Domain object of this process,
+            giving the same (Domain, Problem) tuple a combined domain+problem
+            file gives. A domain that cannot be parsed raises ValueError
+            before any file is parsed.
+
+            A file that cannot be parsed does not stop the others: its result
+            is the exception raised (e.g., an OSError if it is missing).
+
+        :param filenames: paths of the files to parse
+        :param workers: number of worker processes (default: one per CPU);
+            with 1 the files are parsed in this process
+        :param domain: optional Domain object, or path of the domain, shared
+            by all the problems
+        :param ordered: yield in the order of filenames, otherwise as soon as
+            each file is parsed
+        :return: generator of (filename, parsed) pairs, where parsed is what
+            parse would return for the file, or the exception raised
+        """
+        filenames = list(filenames)
+        workers = workers or os.cpu_count() or 1
+        # a session of this generator's own: the module one belongs to worker processes
+        session = _session(domain)
+        shared = session.domain if session is not None else None
+        if workers == 1 or len(filenames) <= 1:
+            for filename in filenames:
+                yield filename, _paired(shared, _parse_in_session(session, filename))
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                    initargs=(shared,)) as executor:
+            if ordered:
+                chunksize = max(1, len(filenames) // (workers * 4))
+                for filename, parsed in zip(filenames, executor.map(_parse_in_worker, filenames, chunksize=chunksize)):
+                    yield filename, _paired(shared, parsed)
+            else:
+                futures = {executor.submit(_parse_in_worker, f): f for f in filenames}
+                for future in concurrent.futures.as_completed(futures):
+                    yield futures[future], _paired(shared, future.result())
+
+    def __parse_text(self, data, symbols=None, lazy=False):
+        if symbols is None:
+            symbols = SymbolTable()
+
+        # Flat :objects and :init sections, the bulk of large problems, are
+        # decoded by the scanner and emptied before parsing; the grammar rules
+        # of the emptied sections then take the decoded lists. Sections the
+        # scanner cannot decode are left to the grammar.
+        sections = {}
+        spans = []
+        span = objects_span(data)
+        if span is not None:
+            objects = decode_objects(data[span[0]:span[1]], symbols, reserved)
+            if objects is not None:
+                sections['objects'] = objects
+                spans.append(span)
+        span = init_span(data)
+        if span is not None and (not spans or spans[0][1] < span[0]):
+            body = data[span[0]:span[1]]
+            if lazy:
+                init = functools.partial(_decode_init, body, symbols)
+            else:
+                init = decode_ground_atoms(body, symbols, reserved)
+            if init is not None:
+                sections['init'] = init
+                spans.append(span)
+        if spans:
+            data = _elide(data, spans)
+
+        self._lexer.lineno = 1
+        self._parser.symbols = symbols
+        self._parser.sections = sections
+        try:
+            return self._parser.parse(data, lexer=self._lexer)
+        finally:
+            self._lexer.input('')   # do not keep the input alive while idle
+            self._parser.symbols = None
+            self._parser.sections = None
+
+
+class PDDLParserPool(object):
+
+    def __init__(self, size=8):
+        """
+            A pool of reusable PDDLParser instances.
+
+            A parser is created whenever none is idle, and at most size idle
+            parsers are kept for reuse. Taking and returning parsers relies on
+            atomic list operations only, so the pool needs no lock.
+
+        :param size: maximum number of idle parsers kept in the pool
+        """
+        self._size = size
+        self._idle = []
+
+    @property
+    def size(self):
+        return self._size
+
+    @contextlib.contextmanager
+    def parser(self):
+        """
+            Borrow a parser for the duration of a with block:
+
+                with pool.parser() as parser:
+                    domain = parser.parse('domain.pddl')
+        """
+        try:
+            parser = self._idle.pop()
+        except IndexError:
+            parser = PDDLParser()
+        try:
+            yield parser
+        finally:
+            if len(self._idle) < self._size:
+                self._idle.append(parser)
+
+    def parse(self, filename):
+        with self.parser() as parser:
+            return parser.parse(filename)
+
+
+_default_pool = PDDLParserPool()
+
+
+# Session on the domain parsed once by each parse_many worker process
+_worker_session = None
+
+
+def _session(domain):
+    # domain: Domain object, path of the domain, or None
+    if not domain:
+        return None
+    from pypddl.session import ProblemSession
+    return ProblemSession(domain)
+
+
+def _parse_in_session(session, filename):
+    # what parse returns (only the problem in a session), or the exception raised
+    try:
+        if session is None:
+            return PDDLParser.parse(filename)
+        return session.parse(filename)
+    except Exception as error:
+        return error
+
+
+def _paired(domain, parsed):
+    if domain is None or isinstance(parsed, Exception):
+        return parsed
+    return domain, parsed
+
+
+def _init_worker(domain):
+    # executor initializer, run once in each worker process with the parsed domain
+    global _worker_session
+    _worker_session = _session(domain)
+
+
+def _parse_in_worker(filename):
+    return _parse_in_session(_worker_session, filename)
@@ -13,22 +13,40 @@
 # You should have received a copy of the GNU General Public License
 # along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
 
-
 from pypddl.term import Term
 
 
 class Predicate(object):
 
-    def __init__(self, name, args=[]):
+    __slots__ = ('_name', '_args', '_hash')
+
+    def __init__(self, name, args=()):
         """
             Construct a Predicate object
 
+            Predicates are immutable, so equal atoms can share one object
+            (see SymbolTable.atom, which the parser uses).
+
         :param name: string with the name of the predicate
         :param args: list of Term objects
         """
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_args', tuple(args))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Predicate objects are immutable')
 
-        self._name = name
-        self._args = args
+    def __delattr__(self, name):
+        raise AttributeError('Predicate objects are immutable')
+
+    def __reduce__(self):
+        return Predicate, (self._name, self._args)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     @property
     def name(self):
@@ -36,7 +54,7 @@ class Predicate(object):
 
     @property
     def args(self):
-        return self._args[:]
+        return self._args
 
     @property
     def arity(self):
@@ -63,12 +81,17 @@ class Predicate(object):
             return '({0} {1})'.format(self._name, ' '.join(map(str, self._args)))
 
     def __eq__(self, other):
-        if self.name == other.name \
-                and self.args == other.args:
+        if self is other:   # shared atoms
             return True
-        else:
-            return False
+        if isinstance(other, Predicate):
+            return self._name == other._name and self._args == other._args
+        return NotImplemented
 
     def __hash__(self):
-        #print(hash(str(self)))
-        return hash((self.name,str(self.args)))
\ No newline at end of file
+        # computed on first use from the name and the (interned) terms
+        try:
+            return self._hash
+        except AttributeError:
+            value = hash((self._name, self._args))
+            object.__setattr__(self, '_hash', value)
+            return value
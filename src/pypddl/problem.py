@@ -13,10 +13,17 @@
 # You should have received a copy of the GNU General Public License
 # along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
 
+import copy
+import functools
 import itertools
+from types import MappingProxyType
 
 from pypddl.predicate import Predicate
 from pypddl.literal import Literal
+from pypddl.facts import FactStore
+from pypddl.index import FactIndex
+from pypddl import fingerprint
+from pypddl import writer
 
 from pypddl.term import Term
 
@@ -29,18 +36,74 @@ class Problem(object):
         :param name: string name of the planning problem (e.g., 'BLOCKS-4-1')
         :param domain: string name of the planning domain (e.g., 'blocks')
         :param objects: dictionary, from type --> object names (e.g., {'block': ['d', 'b'], 'door': ['h']})
-        :param init: a list of Predicate objects (what is true)
-        :param goal: list of Literal objects (what has to be true or false)
+        :param init: a list of Predicate objects (what is true), or a function
+            returning that list, called on first access to init (lazy parsing),
+            or a FactStore, decoded on first access to init
+        :param goal: list of Literal objects (what has to be true or false), or
+            list of Labeled effects, one per model level (MTP problems)
+
+            objects is returned as a read-only mapping; use add_object to add
+            objects, which keeps objects_of_type up to date.
         """
         self._name = name
         self._domain = domain
         self._objects = {}  # empty dictionary
         for obj in objects:
             self._objects[obj.type] = self._objects.get(obj.type, [])
-            self._objects[obj.type].append(str(obj.value))
-        self._init = init
+            self._objects[obj.type].append(str(obj.name))
+        self._index = None
+        self._by_type = (None, None, {})    # (domain, its type closure, type --> names)
+        self._shared = set()    # fields shared with clones, copied before changing them
+        self._init_tail = []    # atoms added to a shared init, appended when init is read
+        self.init = init
         self._goal = goal
 
+    def __getstate__(self):
+        init = self.init    # decodes a lazy init and appends a pending tail first
+        state = self.__dict__.copy()
+        state['_init'], state['_init_loader'] = init, None     # loaders are not picklable
+        state['_init_tail'] = []
+        state['_index'] = None      # rebuilt on demand
+        state['_by_type'] = (None, None, {})
+        state['_shared'] = set()
+        return state
+
+    def clone(self):
+        """
+            Cheap copy of the problem to derive variants from (e.g., with the
+            MTP compilation, which changes the problem in place)
+
+            The copy shares the objects, init and goal lists with this problem
+            until either of them changes them with add_object, add_to_init or
+            add_to_goal (copy-on-write); appending to problem.init or
+            problem.goal directly would change both. A lazy init is decoded
+            once for both, and atoms added to a shared init are kept apart
+            until init is read, so variants that are only extended and written
+            hold no copy of it.
+
+        :return: Problem object
+        """
+        if self._init_loader is not None:
+            self._init_loader = functools.lru_cache(maxsize=None)(self._init_loader)
+        clone = object.__new__(Problem)
+        clone.__dict__.update(self.__dict__)
+        clone._index = None
+        clone._by_type = (None, None, {})
+        clone._init_tail = list(self._init_tail)
+        clone._init_digests = copy.copy(self._init_digests)
+        self._shared.update(('_objects', '_init', '_goal'))
+        clone._shared = set(self._shared)
+        return clone
+
+    def __own(self, field):
+        # copy a field shared with clones before changing it
+        if field in self._shared:
+            if field == '_objects':     # dict of lists
+                self._objects = {t: list(objects) for t, objects in self._objects.items()}
+            else:
+                setattr(self, field, list(getattr(self, field)))
+            self._shared.discard(field)
+
     @property
     def name(self):
         return self._name
@@ -51,23 +114,89 @@ class Problem(object):
 
     @property
     def objects(self):
-        return self._objects
+        return MappingProxyType(self._objects)
+
+    def objects_of_type(self, type, domain=None):
+        """
+            Objects that can bind a parameter of the given type, e.g.,
+                problem.objects_of_type('locatable', domain)
+
+            With the domain, they include the objects of all the subtypes of
+            type and the domain :constants of those types; 'object' covers all
+            the objects, typed or not. The answer is cached until objects are
+            added or the types or constants of the domain change.
+
+        :param type: name of a type
+        :param domain: Domain object of the problem, or None to ignore subtypes
+            and constants
+        :return: tuple of object names, problem objects first
+        """
+        closure = domain.type_closure if domain is not None else None
+        cached_domain, cached_closure, by_type = self._by_type
+        if cached_domain is not domain or cached_closure is not closure:
+            by_type = {}
+            self._by_type = (domain, closure, by_type)
+        names = by_type.get(type)
+        if names is None:
+            names = by_type[type] = self.__objects_of_type(type, domain)
+        return names
+
+    def __objects_of_type(self, type, domain):
+        types = domain.subtypes(type) if domain is not None else {type}
+        if type == 'object':
+            types = set(types) | {None, ''}     # untyped objects and constants
+        names = [name for t, objects in self._objects.items() if t in types for name in objects]
+        if domain is not None:
+            names += [name for t, constants in domain.constants.items() if t in types for name in constants]
+        return tuple(dict.fromkeys(names))
 
     @property
     def init(self):
+        if self._init_loader is not None:
+            self._init, self._init_loader = self._init_loader(), None
+        if self._init_tail:     # the shared list is copied once, when read
+            self._init = self._init + self._init_tail
+            self._init_tail = []
+            self._shared.discard('_init')
         return self._init
 
+    @property
+    def index(self):
+        """
+            FactIndex of init, built on first access and then kept up to date
+            by the init setter and add_to_init (init.append bypasses it).
+
+        :return: FactIndex object
+        """
+        if self._index is None:
+            self._index = FactIndex(self.init)
+        return self._index
+
     @property
     def goal(self):
         return self._goal
 
     @init.setter
     def init(self, init):
-        self._init = init
+        self._shared.discard('_init')
+        self._init_tail = []
+        self._init_digests = None   # Multiset of the digests of init, kept up to date once computed
+        self._fingerprint = None
+        if isinstance(init, FactStore):
+            init = init.to_atoms
+        if callable(init):
+            self._init, self._init_loader = None, init
+            self._index = None      # rebuilt from the decoded atoms
+        else:
+            self._init, self._init_loader = init, None
+            if self._index is not None:
+                self._index.update(init)
 
     @goal.setter
     def goal(self, goal):
         self._goal = goal
+        self._fingerprint = None
+        self._shared.discard('_goal')
 
 
     def __str__(self):
@@ -76,64 +205,76 @@ class Problem(object):
         problem_str += '>> objects:\n'
         for type, objects in self._objects.items():
             problem_str += '{0} -> {1}\n'.format(type, ', '.join(sorted(objects)))
-        problem_str += '>> init:\n{0}\n'.format(', '.join(sorted(map(str, self._init))))
+        problem_str += '>> init:\n{0}\n'.format(', '.join(sorted(map(str, self.init))))
         problem_str += '>> goal:\n{0}\n'.format(', '.join(sorted(map(str, self._goal))))
         return problem_str
 
     def __repr__(self):
-        #a = list(self._objects.keys())[0]
-        objects_txt = None
-        if len(self.objects) > 0:
-            if len(self._objects) > 1 or not list(self._objects.keys())[0] == None:
-                objects_txt = ' '.join('{} - {}'.format(' '.join(self._objects[o]), o) for o in self._objects.keys())
-            else:
-                objects_txt = ' '.join(self._objects[None])
-
-        # extract goal
-        goal_str = ""
-        # print("============================")
-        # print(self.goal)
-        # print("============================")
-        
-        if isinstance(self.goal[0], Literal): # normal goal definition: list of pypddl.literal.Literal
-            goal_str = '\n\t\t'.join(repr(pred) for pred in self.goal)
-        else: # must be a list of tuples ("label", label name, lists lists of literal effects] - MTP problems with goals per level
-            for g in self.goal:
-                if isinstance(g, tuple) and g[0] == 'label': 
-                    label = g[1]
-                    atomic_effects = g[2]   # must be a list of atomic effects (prob, literal)                    
-                    goal_str += f"({label} (and {' '.join(repr(pred[1]) for pred in atomic_effects)}))\n\t\t"
-                else:
-                    print(f"Something is wrong with the :goal, expected labelled goals: {g}")
-                    exit(1)
-
-        pddl_str = '(define (problem {problem_name})\n' \
-                   '\t(:domain {domain})\n' \
-                   '\t(:objects {objects})\n' \
-                   '\t(:init\n' \
-                   '\t\t{init})\n' \
-                   '\t(:goal (and \n' \
-                   '\t\t{goal}))\n' \
-                   ')'. \
-            format(problem_name=self._name,
-                   domain=self._domain,
-                   objects=objects_txt,
-                   init='\n\t\t'.join(repr(pred) for pred in self._init),
-                   goal=goal_str
-                   )
-
-        pddl_str_cleaned = pddl_str.replace('\t(:objects None)\n','') # Delete the object definition line if there are no objects
-        return pddl_str_cleaned
+        return ''.join(writer.problem_chunks(self))
+
+    def write(self, file, buffer_size=1 << 16):
+        """
+            Write the PDDL text of the problem (its repr) to file, in chunks,
+            without building it as one string
+
+        :param file: file-like object (e.g., open(filename, 'w'))
+        :param buffer_size: characters gathered before each write
+        """
+        writer.write_chunks(writer.problem_chunks(self), file, buffer_size)
 
 
     def add_object(self, name_obj, type_obj):
+        self.__own('_objects')
         if type_obj in self._objects:
             self._objects[type_obj].append(name_obj)
         else:
-            self._objects[type] = [name_obj]
+            self._objects[type_obj] = [name_obj]
+        self._by_type = (None, None, {})
+        self._fingerprint = None
+
+    def fingerprint(self):
+        """
+            Canonical content digest of the problem, cached until it changes
+            through the setters and add_ methods. The order of the objects,
+            init facts and goals does not matter. The digests of the init facts
+            are summed once and then updated by add_to_init, without going over
+            init again.
+
+        :return: 128-bit digest as 32 hexadecimal digits
+        """
+        if self._fingerprint is None:
+            if self._init_digests is None:
+                self._init_digests = fingerprint.atoms_multiset(self.init)
+            self._fingerprint = fingerprint.hexdigest(fingerprint.sequence(
+                'problem\x00{}\x00{}'.format(self._name, self._domain), (
+                    fingerprint.names_digest('objects', self._objects),
+                    self._init_digests.digest('init'),
+                    fingerprint.combine('goal', map(fingerprint.goal_digest, self._goal)))))
+        return self._fingerprint
+
+    def compact(self):
+        """
+            Move init into an array-backed FactStore (needs numpy), releasing the
+            list of Predicate objects. Accessing init decodes the list again.
+
+        :return: the FactStore holding init
+        """
+        store = FactStore.from_atoms(self.init)
+        digests, cached = self._init_digests, self._fingerprint
+        self.init = store
+        self._init_digests, self._fingerprint = digests, cached     # same atoms
+        return store
 
     def add_to_init(self, pred):
-        self._init.append(pred)
+        if '_init' in self._shared:
+            self._init_tail.append(pred)
+        else:
+            self.init.append(pred)
+        if self._index is not None:
+            self._index.add(pred)
+        if self._init_digests is not None:
+            self._init_digests.add(fingerprint.atom_digest(pred))
+        self._fingerprint = None
     def add_to_init_text(self, name, constants_args):
         """
         Adds a predicate (positive literal) to the init set
@@ -146,13 +287,15 @@ class Problem(object):
         """
         args2 = []
         for a in constants_args:
-            args2.append(Term(value=a))
-        self._init.append(Predicate(name, args2))
+            args2.append(Term.constant(a))
+        self.add_to_init(Predicate(name, args2))
 
 
 
     def add_to_goal(self, literal):
+        self.__own('_goal')
         self._goal.append(literal)
+        self._fingerprint = None
     def add_to_goal_text(self, name, constants_args):
         """
         Adds a predicate (positive literal) to the goal set
@@ -165,5 +308,5 @@ class Problem(object):
         """
         args2 = []
         for a in constants_args:
-            args2.append(Term(value=a))
-        self._goal.append(Predicate(name, args2))
+            args2.append(Term.constant(a))
+        self.add_to_goal(Literal.positive(Predicate(name, args2)))
@@ -0,0 +1,166 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+# Scanners for the flat sections of PDDL problems, working directly on the
+# normalized text (lowercase, no comments) without going through the grammar.
+
+import re
+
+from pypddl.predicate import Predicate
+
+
+_NAME = r'[a-zA-z_][a-zA-Z_0-9\-]*'     # same as the NAME token of the lexer
+
+_OBJECTS_RE = re.compile(r'\(\s*:objects(?![a-zA-Z_0-9\-])')
+_INIT_RE = re.compile(r'\(\s*:init(?![a-zA-Z_0-9\-])')
+_GOAL_RE = re.compile(r'\(\s*:goal(?![a-zA-Z_0-9\-])')
+_AND_RE = re.compile(r'\s*\(\s*and(?![a-zA-Z_0-9\-])')
+
+# names and hyphens, each after some whitespace
+_TYPED_NAMES_RE = re.compile(r'(?:\s+(?:{0}|-))*\s*'.format(_NAME))
+
+# one ground atom: its predicate name and its arguments
+_ATOM = r'\s*\(\s*({0})((?:\s+{0})*)\s*\)'.format(_NAME)
+_ATOM_RE = re.compile(_ATOM)
+
+
+def objects_span(text):
+    """
+        Locate the body of the :objects section of a problem.
+
+    :param text: normalized PDDL text
+    :return: (start, end) offsets of the body, or None if there is no
+        :objects section or it holds parentheses
+    """
+    objects = _OBJECTS_RE.search(text)
+    if objects is None:
+        return None
+    end = text.find(')', objects.end())
+    if end == -1 or '(' in text[objects.end():end]:
+        return None
+    return objects.end(), end
+
+
+def decode_objects(body, symbols, reserved=()):
+    """
+        Decode a list of object names, possibly typed, e.g., 'b1 b2 - block t1 - table'.
+
+        Either all the names are typed or none is, as the grammar requires.
+        Anything else makes the decoding give up so that the caller can fall
+        back to the grammar.
+
+    :param body: normalized text of the list of objects
+    :param symbols: SymbolTable to intern the objects in
+    :param reserved: words that cannot be names (the keywords of the lexer)
+    :return: list of constant Term objects, in order, or None
+    """
+    if _TYPED_NAMES_RE.fullmatch(' ' + body) is None:
+        return None
+    words = body.split()
+    if not words or not set(words).isdisjoint(reserved):
+        return None
+    if '-' not in words:
+        constants = symbols.constants
+        return [constants[w] for w in words]
+
+    objects = []
+    names = []
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word != '-':
+            names.append(word)
+            i += 1
+            continue
+        if not names or i + 1 == len(words) or words[i + 1] == '-':
+            return None
+        type = words[i + 1]
+        objects.extend(symbols.constant(n, type) for n in names)
+        names = []
+        i += 2
+    if names:   # untyped names after typed ones
+        return None
+    return objects
+
+
+def init_span(text):
+    """
+        Locate the body of the :init section of a problem.
+
+        Problems list :init right before :goal, so the body runs from the
+        :init keyword to the last parenthesis before (:goal.
+
+    :param text: normalized PDDL text
+    :return: (start, end) offsets of the body, or None if there is no :init
+    """
+    init = _INIT_RE.search(text)
+    if init is None:
+        return None
+    goal = _GOAL_RE.search(text, init.end())
+    if goal is None:
+        return None
+    end = text.rfind(')', init.end(), goal.start())
+    if end == -1:
+        return None
+    return init.end(), end
+
+
+def decode_ground_atoms(body, symbols, reserved=()):
+    """
+        Decode a flat list of ground atoms, e.g. the body of an :init section.
+
+        The list may be wrapped in (and ...). Anything else, like nested
+        constructs, variables or keywords used as names, makes the decoding
+        give up so that the caller can fall back to the grammar.
+
+    :param body: normalized text of the list of atoms
+    :param symbols: SymbolTable to intern the predicate names and constants in
+    :param reserved: words that cannot be names (the keywords of the lexer)
+    :return: list of Predicate objects, in order, or None
+    """
+    start, end = 0, len(body)
+    wrapper = _AND_RE.match(body)
+    if wrapper is not None:
+        start = wrapper.end()
+        end = body.rfind(')')
+        if end < start or body[end + 1:].strip():
+            return None
+
+    # one pass of the regex gives [gap, name, args, gap, name, args, ..., gap]
+    parts = _ATOM_RE.split(body[start:end])
+    preds, argss = parts[1::3], parts[2::3]
+    if ''.join(parts[0::3]).strip():
+        return None     # something that is not a flat atom
+    if not set(preds).union(' '.join(argss).split()).isdisjoint(reserved):
+        return None
+
+    atoms = []
+    append = atoms.append
+    names = symbols.names
+    constants = symbols.constants
+    interned = symbols.atoms
+    argument_tuples = symbols.argument_tuples
+    for pred, args in zip(preds, argss):
+        name = names[pred]
+        args = tuple([constants[a] for a in args.split()])
+        table = interned[name]
+        atom = table.get(args)
+        if atom is None:    # same as symbols.atom(name, args), inlined
+            args = argument_tuples.setdefault(args, args)
+            atom = table[args] = Predicate(name, args)
+        append(atom)
+    if wrapper is not None and not atoms:
+        return None
+    return atoms
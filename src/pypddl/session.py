@@ -0,0 +1,75 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from pypddl.pddlparser import PDDLParser
+from pypddl.symbols    import SymbolTable
+from pypddl.domain     import Domain
+
+
+class ProblemSession(object):
+
+    def __init__(self, domain):
+        """
+            Construct a session to parse many problems of one domain
+
+            The problems parsed in the session share the predicate names, type
+            names and constants of the domain, interned once in the symbol table
+            of the session, instead of re-creating them for each problem. Each
+            problem interns the rest of its symbols (objects, atoms, literals)
+            in a table of its own on top of that one, so that the session does
+            not keep them once the problem is gone.
+
+                session = ProblemSession(PDDLParser.parse('domain.pddl'))
+                problems = [session.parse(f) for f in problem_files]
+
+        :param domain: the Domain object the problems belong to, or the path
+            of the domain file
+        """
+        if isinstance(domain, str):
+            filename, domain = domain, PDDLParser.parse(domain)
+            if not isinstance(domain, Domain):
+                raise ValueError('{}: could not be parsed as a domain'.format(filename))
+        self._domain = domain
+        self._symbols = SymbolTable()
+        self._symbols.add_domain(domain)
+
+    @property
+    def domain(self):
+        return self._domain
+
+    @property
+    def symbols(self):
+        """
+        :return: SymbolTable with the symbols of the domain, shared by the problems
+        """
+        return self._symbols
+
+    def parse(self, filename, cache=None, lazy=False):
+        """
+        :param filename: path to a problem file of the session domain
+        :param cache: optional ParseCache (cached problems do not share symbols)
+        :param lazy: decode the :init section on first access (see PDDLParser.parse)
+        :return: the Problem object, or None if the file has syntax errors
+        """
+        return PDDLParser.parse(filename, cache=cache, symbols=SymbolTable(self._symbols), lazy=lazy)
+
+    def parse_many(self, filenames):
+        """
+        :param filenames: paths to problem files of the session domain
+        :return: generator of (filename, Problem) pairs, in order
+        """
+        for filename in filenames:
+            yield filename, self.parse(filename)
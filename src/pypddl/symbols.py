@@ -0,0 +1,170 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from pypddl.term import Term
+from pypddl.predicate import Predicate
+from pypddl.literal import Literal
+
+
+class _Interned(dict):
+    """
+        Dictionary creating its missing entries with a factory, so that looking
+        up an interned symbol is a plain subscript, with no Python-level call.
+    """
+
+    def __init__(self, factory):
+        super().__init__()
+        self._factory = factory
+
+    def __missing__(self, key):
+        value = self[key] = self._factory(key)
+        return value
+
+
+class SymbolTable(object):
+
+    def __init__(self, parent=None):
+        """
+            Construct an intern table for the symbols found while parsing
+
+            Equal predicate names, type names and object names are mapped to
+            a single string object, each ground constant (name and type) to a
+            single Term object, and equal atoms and literals to a single
+            Predicate and Literal object (flyweights). Atoms of different
+            predicates with the same arguments share one argument tuple, e.g.,
+            (road a b) and (path a b). The parser uses one table per file by
+            default.
+
+            A table with a parent first looks names and constants up in it,
+            and keeps what it interns itself, atoms and literals included, to
+            itself: ProblemSession gives each problem such a table, whose parent
+            holds the symbols of the domain, so the problems share those and
+            the session does not grow with every problem parsed.
+
+        :param parent: optional SymbolTable, which is never changed through this one
+        """
+        names = parent._names if parent is not None else {}
+        constants = parent._constants if parent is not None else {}
+        self._names = _Interned(lambda name: names.get(name, name))
+        self._constants = _Interned(lambda name: constants[name] if name in constants
+                                    else Term.constant(self._names[name]))
+        self._parent_typed_constants = parent._typed_constants if parent is not None else {}
+        self._typed_constants = {}
+        self._atoms = _Interned(lambda name: {})
+        self._argument_tuples = {}
+        self._literals = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    @property
+    def names(self):
+        """
+        :return: mapping from names to their interned string, which interns
+            the names looked up for the first time
+        """
+        return self._names
+
+    @property
+    def constants(self):
+        """
+        :return: mapping from names to their interned untyped constant Term,
+            which creates the constants looked up for the first time
+        """
+        return self._constants
+
+    @property
+    def atoms(self):
+        """
+        :return: mapping from interned predicate names to the dictionary from
+            argument tuples to the interned Predicate
+        """
+        return self._atoms
+
+    @property
+    def argument_tuples(self):
+        """
+        :return: dictionary from argument tuples to the interned equal tuple,
+            which the interned Predicates hold as their arguments
+        """
+        return self._argument_tuples
+
+    def name(self, name):
+        """
+        :param name: a predicate, type or object name
+        :return: the interned string equal to name
+        """
+        return self._names[name]
+
+    def constant(self, name, type=None):
+        """
+        :param name: name of the constant (e.g., 'b1')
+        :param type: type of the constant, if any (e.g., 'block')
+        :return: the interned constant Term with that name and type
+        """
+        if type is None:
+            return self._constants[name]
+        key = (name, type)
+        term = self._typed_constants.get(key)
+        if term is None:
+            term = self._parent_typed_constants.get(key)
+            if term is None:
+                term = Term.constant(self._names[name], self._names[type])
+            self._typed_constants[key] = term
+        return term
+
+    def atom(self, name, args=()):
+        """
+        :param name: name of the predicate
+        :param args: list of Term objects
+        :return: the interned Predicate with that name and arguments
+        """
+        name = self._names[name]
+        args = tuple(args)
+        atoms = self._atoms[name]
+        pred = atoms.get(args)
+        if pred is None:
+            args = self._argument_tuples.setdefault(args, args)
+            pred = atoms[args] = Predicate(name, args)
+        return pred
+
+    def literal(self, predicate, positive=True):
+        """
+        :param predicate: a Predicate object, as returned by atom()
+        :param positive: whether the literal is positive
+        :return: the interned Literal of predicate with that sign
+        """
+        key = (id(predicate), positive)     # the literal keeps predicate alive
+        literal = self._literals.get(key)
+        if literal is None:
+            literal = self._literals[key] = Literal(predicate, positive)
+        return literal
+
+    def add_domain(self, domain):
+        """
+            Intern the predicate names, type names and constants of a domain.
+
+        :param domain: a Domain object
+        """
+        for pred in domain.predicates:
+            self.name(pred.name)
+        for supertype, subtypes in domain._types.items():
+            self.name(supertype)
+            for t in subtypes:
+                self.name(t)
+        for type, constants in domain._constants.items():
+            for c in constants:
+                self.constant(c)
@@ -13,10 +13,19 @@
 # You should have received a copy of the GNU General Public License
 # along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
 
+import threading
+import weakref
+
 
 class Term(object):
 
-    def __init__(self, **kwargs):
+    __slots__ = ('_name', '_type', '_variable', '_constant', '_hash', '__weakref__')
+
+    # flyweight table: (name, type, var) --> the only live Term with them
+    _interned = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+
+    def __new__(cls, **kwargs):
         """
             Construct a Term object
 
@@ -24,16 +33,47 @@ class Term(object):
             for typed variables like ?x - block, name is '?x' and type is 'block'
             constants like 'east' do not have ? in their name
 
+            Terms are immutable and interned: constructing a term equal to a
+            live one returns that same object, so equal terms are identical.
 
         :param kwargs: up to three kwarg arguments that are all strings:
             name = the name of the term if variable (for example '?x' or 'table')
             type = the type of the term (for example 'blocks')
             var  = is this a variable? (otherwise it is a constant)
         """
-        self._name  = kwargs.get('name')    # name of the term (includes ? for vars)
-        self._type  = kwargs.get('type',  None) # subtype of term
-        self._variable = kwargs.get('var', True)    # is it a var or a constat?
-        self._constant = True if not self._variable else False
+        name = kwargs.get('name')           # name of the term (includes ? for vars)
+        type = kwargs.get('type', None)     # subtype of term
+        variable = kwargs.get('var', True)  # is it a var or a constat?
+        key = (name, type, variable)
+        term = cls._interned.get(key)
+        if term is None:
+            with cls._lock:
+                term = cls._interned.get(key)
+                if term is None:
+                    term = object.__new__(cls)
+                    object.__setattr__(term, '_name', name)
+                    object.__setattr__(term, '_type', type)
+                    object.__setattr__(term, '_variable', variable)
+                    object.__setattr__(term, '_constant', True if not variable else False)
+                    object.__setattr__(term, '_hash', hash(key))
+                    cls._interned[key] = term
+        return term
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Term objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Term objects are immutable')
+
+    def __reduce__(self):
+        # unpickled terms are interned again
+        return _term, (self._name, self._type, self._variable)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     @classmethod
     def variable(cls, name, type=None):
@@ -60,10 +100,6 @@ class Term(object):
     def is_constant(self):
         return self._constant
 
-    @type.setter
-    def type(self, type):
-        self._type = type
-
 
     
     def __str__(self):
@@ -87,5 +123,12 @@ class Term(object):
             return '{0}'.format(self._name)
 
     def __eq__(self, other):
-        if self._name == other._name and self._type == other._type:
-            return True
+        # equal terms are the same object
+        return self is other
+
+    def __hash__(self):
+        return self._hash
+
+
+def _term(name, type, variable):
+    return Term(name=name, type=type, var=variable)
@@ -0,0 +1,148 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+import functools
+import re
+
+
+class LexToken(object):
+    """
+        Token produced by RegexLexer, with the attributes and printing of ply's
+        LexToken so that the ply parser and the error rules handle both alike.
+    """
+
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer')
+
+    def __init__(self, type, value, lineno, lexpos):
+        self.type = type
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+
+    def __str__(self):
+        return 'LexToken(%s,%r,%d,%d)' % (self.type, self.value, self.lineno, self.lexpos)
+
+    def __repr__(self):
+        return str(self)
+
+
+class RegexLexer(object):
+
+    def __init__(self, rules, keywords, converters=None, ignore=' \t', errorf=None):
+        """
+            A drop-in replacement of ply's lexer scanning the whole input with
+            one master regular expression.
+
+            The rules are tried in order, as ply does, and are joined into one
+            alternation of named groups, so each token costs a single regex
+            match instead of ply's per-token dispatch. A group for runs of
+            ignored characters and a final catch-all group, which hands any
+            other character to the error function, complete the alternation.
+
+            Tokens of the KEYWORD rule are typed by looking their text up in
+            keywords (NAME if missing), tokens of the newline rule only count
+            lines, and all other tokens are typed after their rule.
+
+        :param rules: list of (token type, regular expression) pairs, in priority order
+        :param keywords: dictionary from reserved words to their token types
+        :param converters: dictionary from token types to functions converting
+            their text into the token value (e.g., {'PROBABILITY': float})
+        :param ignore: characters skipped between tokens
+        :param errorf: function called with an 'error' token on illegal
+            characters; like ply's t_error it must skip them (lexer.skip)
+        """
+        self._rules = rules
+        self._keywords = keywords
+        self._converters = converters or {}
+        self._ignore = ignore
+        self._master = re.compile('{0}|(?P<ignore>[{1}]+)|(?P<error>.)'.format(
+            '|'.join('(?P<{0}>{1})'.format(type, regex) for type, regex in rules), re.escape(ignore)),
+            re.DOTALL)
+        self.lexerrorf = errorf
+        self.lineno = 1
+        self.input('')
+
+    def clone(self):
+        """
+        :return: a new lexer with the same rules, sharing the compiled regex
+        """
+        lexer = object.__new__(RegexLexer)
+        lexer.__dict__.update(self.__dict__)
+        lexer.input('')
+        return lexer
+
+    def input(self, data):
+        """
+            Start scanning data. The tokens are then read with token().
+
+        :param data: the string to scan
+        """
+        if not isinstance(data, str):
+            raise ValueError('Expected a string')
+        self.lexdata = data
+        self.lexpos = 0
+        # next on the token generator, called from C without a Python frame
+        self.token = functools.partial(next, self.__scan(data), None)
+
+    def skip(self, n):
+        self.lexpos += n
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        token = self.token()
+        if token is None:
+            raise StopIteration
+        return token
+
+    def __scan(self, data):
+        finditer = self._master.finditer
+        keywords = self._keywords
+        converters = self._converters
+        lineno = self.lineno
+        pos = 0
+        while True:
+            for m in finditer(data, pos):
+                type = m.lastgroup
+                if type == 'KEYWORD':
+                    value = m.group()
+                    yield LexToken(keywords.get(value, 'NAME'), value, lineno, m.start())
+                elif type == 'ignore':
+                    continue
+                elif type == 'newline':
+                    lineno += m.end() - m.start()
+                    self.lineno = lineno
+                elif type == 'error':
+                    start = m.start()
+                    token = LexToken('error', data[start:], lineno, start)
+                    token.lexer = self
+                    self.lexpos = start
+                    token = self.lexerrorf(token) if self.lexerrorf else None
+                    if self.lexpos == start:
+                        raise ValueError("Illegal character '{0}' at index {1}".format(data[start], start))
+                    pos = self.lexpos
+                    lineno = self.lineno
+                    if token:
+                        yield token
+                    break   # resume the scan where the error function left it
+                else:
+                    value = m.group()
+                    if type in converters:
+                        value = converters[type](value)
+                    yield LexToken(type, value, lineno, m.start())
+            else:
+                self.lexpos = len(data)
+                return
@@ -1,11 +1,33 @@
 from distutils.command import clean
 import unittest
+import unittest.mock
 
+import concurrent.futures
+import contextlib
+import copy
+import io
+import os
+import pickle
 import re
+import struct
+import tempfile
 
-from pypddl.pddlparser import PDDLParser
+from pypddl.pddlparser import PDDLParser, PDDLParserPool, reserved
+from pypddl.errors import PDDLSyntaxError
+from pypddl.cache import ParseCache
+from pypddl.session import ProblemSession
+from pypddl.symbols import SymbolTable
+from pypddl.scanner import decode_objects, decode_ground_atoms
 from pypddl.mtp import multi_tier_compilation_domain, multi_tier_compilation_problem
 from pypddl.problem import Problem
+from pypddl.term import Term
+from pypddl.predicate import Predicate
+from pypddl.literal import Literal
+from pypddl import facts
+from pypddl import main
+from pypddl import binary
+from pypddl import columnar
+from pypddl.effects import Probabilistic, And, OneOf, When, Labeled, Forall, walk, literals, to_legacy, from_legacy
 
 # Check if the MTP compilation is correct
 class TestMtpCompilation(unittest.TestCase):
@@ -357,6 +379,884 @@ class TestPrint(unittest.TestCase):
     #     new_domain_string = repr(domain)
     #     self.assertEqual(test_domain_string,new_domain_string)
 
+# Check that long sections are parsed in order (the list rules are left-recursive)
+class TestLongSections(unittest.TestCase):
+
+    def test_long_init_and_objects(self):
+        n = 5000
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'problem.pddl')
+            with open(filename, 'w') as f:
+                f.write('(define (problem long) (:domain doors)\n(:objects\n')
+                f.write(''.join('l{} - location\n'.format(i) for i in range(n)))
+                f.write('d0 d1 - door)\n(:init\n')
+                f.write(''.join('(open d{0} l{0})\n'.format(i) for i in range(n)))
+                f.write(')\n(:goal (and (player-at l0) (player-at l1))))\n')
+            problem = PDDLParser.parse(filename)
+
+        self.assertEqual(['l{}'.format(i) for i in range(n)], problem.objects['location'])
+        self.assertEqual(['d0', 'd1'], problem.objects['door'])
+        self.assertEqual(['(open d{0} l{0})'.format(i) for i in range(n)], [repr(p) for p in problem.init])
+        self.assertEqual(['(player-at l0)', '(player-at l1)'], [repr(l) for l in problem.goal])
+
+# Check that parser instances can be used concurrently
+class TestConcurrentParsing(unittest.TestCase):
+
+    FILES = ['pddl/blocksworld/domain.pddl', 'pddl/blocksworld/problems/probBLOCKS-04-0.pddl',
+             'pddl/triangle-tireworld/domain.ppddl', 'pddl/triangle-tireworld/problems/p01.ppddl',
+             'pddl/mtp-example/labeled-domain.pddl', 'pddl/logistics/problems/strips-log-x-1.pddl']
+
+    def test_instances_are_independent(self):
+        expected = [repr(PDDLParser.parse(f)) for f in self.FILES]
+        parser = PDDLParser()
+        self.assertEqual(expected, [repr(parser.parse(f)) for f in self.FILES])
+        self.assertIsNot(parser._lexer, PDDLParser()._lexer)
+
+    def test_threads(self):
+        expected = [repr(PDDLParser.parse(f)) for f in self.FILES]
+        pool = PDDLParserPool(size=2)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda f: repr(pool.parse(f)), self.FILES * 10))
+        self.assertEqual(expected * 10, results)
+        self.assertLessEqual(len(pool._idle), 2)
+
+# Check batch parsing on a pool of processes
+class TestBatchParsing(unittest.TestCase):
+
+    def test_parse_many(self):
+        problems = ['pddl/earth_observation/p0{}.pddl'.format(i) for i in range(1, 7)]
+        expected = [repr(PDDLParser.parse(f)) for f in problems]
+
+        results = list(PDDLParser.parse_many(problems, workers=2))
+        self.assertEqual(problems, [f for f, _ in results])
+        self.assertEqual(expected, [repr(p) for _, p in results])
+
+        results = list(PDDLParser.parse_many(problems, workers=2, ordered=False,
+                                             domain='pddl/earth_observation/domain.pddl'))
+        self.assertEqual(sorted(problems), sorted(f for f, _ in results))
+        for filename, (domain, problem) in results:
+            self.assertEqual('earth_observation', domain.name)
+            self.assertEqual(expected[problems.index(filename)], repr(problem))
+
+    def test_shared_domain_and_failures(self):
+        problems = ['pddl/earth_observation/p01.pddl', 'pddl/earth_observation/missing.pddl',
+                    'pddl/earth_observation/p02.pddl']
+        for workers in (1, 2):
+            results = dict(PDDLParser.parse_many(problems, workers=workers,
+                                                 domain='pddl/earth_observation/domain.pddl'))
+            self.assertIsInstance(results[problems[1]], OSError)
+            (first, p01), (second, p02) = results[problems[0]], results[problems[2]]
+            self.assertIs(first, second)    # one Domain object for all the problems
+            self.assertEqual(['p01', 'p02'], [p01.name, p02.name])
+
+    def test_batch_status(self):
+        args = {'domain-problem': ['pddl/earth_observation/domain.pddl', 'pddl/earth_observation/p01.pddl'],
+                'workers': 1, 'out_dir': '', 'print_problem': False}
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(0, main.run_batch(args))
+            args['domain-problem'].append('pddl/earth_observation/missing.pddl')
+            self.assertEqual(1, main.run_batch(args))
+        self.assertIn('missing.pddl: could not be parsed', out.getvalue())
+
+    def test_unparsable_domain(self):
+        problems = ['pddl/earth_observation/p01.pddl', 'pddl/earth_observation/p02.pddl']
+        with tempfile.TemporaryDirectory() as directory:
+            bad = os.path.join(directory, 'domain.pddl')
+            with open(bad, 'w') as file:
+                file.write('(define (domain broken) (:predicates (at ?x)')
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                for workers in (1, 2):
+                    with self.assertRaisesRegex(ValueError, 'could not be parsed'):
+                        list(PDDLParser.parse_many(problems, workers=workers, domain=bad))
+                args = {'domain-problem': [bad] + problems, 'workers': 2, 'out_dir': '', 'print_problem': False}
+                self.assertEqual(1, main.run_batch(args))
+            self.assertIn('domain.pddl: could not be parsed', out.getvalue())
+
+    def test_in_process_generators(self):
+        # each in-process generator parses with its own domain, whatever others do meanwhile
+        blocks = PDDLParser.parse_many(['pddl/blocksworld/problems/probBLOCKS-04-0.pddl'] * 2, workers=1,
+                                       domain='pddl/blocksworld/domain.pddl')
+        self.assertEqual('blocks', next(blocks)[1][0].name)
+        robot = list(PDDLParser.parse_many(['pddl/robot/rooms/problem01.pddl'] * 2, workers=1,
+                                           domain='pddl/robot/domain.pddl'))
+        self.assertEqual('robot', robot[0][1][0].name)
+        domain, problem = next(blocks)[1]
+        self.assertEqual('blocks', domain.name)
+
+# Check the on-disk cache of parsed models
+class TestParseCache(unittest.TestCase):
+
+    def test_grammar_version_sources(self):
+        # generated tables and tests do not change the version, every model module does
+        from pypddl import pddlparser
+        package = os.path.dirname(pddlparser.__file__)
+        modules = set(pddlparser._GRAMMAR_MODULES)
+        self.assertTrue(modules.isdisjoint({'lextab', 'unit_tests', 'main'}))
+        for name in modules:
+            self.assertTrue(os.path.isfile(os.path.join(package, name + '.py')))
+        self.assertEqual(64, len(pddlparser.grammar_version()))
+
+    def test_hits_and_misses(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ParseCache(tmp)
+            files = ['pddl/blocksworld/domain.pddl', 'pddl/blocksworld/problems/probBLOCKS-04-0.pddl']
+            for _ in range(3):
+                for f in files:
+                    self.assertEqual(repr(PDDLParser.parse(f)), repr(PDDLParser.parse(f, cache=cache)))
+            self.assertEqual((4, 2), (cache.hits, cache.misses))
+
+            # same normalized content (comments and case do not matter): same entry
+            copy = os.path.join(tmp, 'copy.pddl')
+            with open(files[0]) as f, open(copy, 'w') as g:
+                g.write(f.read().upper() + '; a copy')
+            PDDLParser.parse(copy, cache=cache)
+            self.assertEqual((5, 2), (cache.hits, cache.misses))
+
+    def test_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ParseCache(tmp, max_bytes=1)
+            PDDLParser.parse('pddl/blocksworld/domain.pddl', cache=cache)
+            PDDLParser.parse('pddl/doors/domain.pddl', cache=cache)
+            self.assertEqual(0, len([f for f in os.listdir(tmp) if f.endswith(ParseCache.SUFFIX)]))
+
+    def test_size_accounting(self):
+        def disk_size(tmp):
+            return sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp) if f.endswith(ParseCache.SUFFIX))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ParseCache(tmp)
+            PDDLParser.parse('pddl/blocksworld/domain.pddl', cache=cache)
+            PDDLParser.parse('pddl/doors/domain.pddl', cache=cache)
+            # a corrupt entry is parsed again and rewritten, replacing its old size
+            entry = os.path.join(tmp, os.listdir(tmp)[0])
+            with open(entry, 'wb') as f:
+                f.write(b'corrupt' * 1000)
+            cache._size = disk_size(tmp)
+            PDDLParser.parse('pddl/blocksworld/domain.pddl', cache=cache)
+            PDDLParser.parse('pddl/doors/domain.pddl', cache=cache)
+            self.assertEqual(disk_size(tmp), cache._size)
+
+    def test_eviction_of_removed_entries(self):
+        # entries removed by another process between listing and stat are skipped
+        class Removed(object):
+            name, path = 'removed' + ParseCache.SUFFIX, '/nonexistent/removed' + ParseCache.SUFFIX
+
+            def stat(self):
+                raise FileNotFoundError(self.path)
+
+        scandir = os.scandir
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ParseCache(tmp, max_bytes=1)
+            with unittest.mock.patch('pypddl.cache.os.scandir', lambda d: list(scandir(d)) + [Removed()]):
+                PDDLParser.parse('pddl/blocksworld/domain.pddl', cache=cache)
+                PDDLParser.parse('pddl/doors/domain.pddl', cache=cache)
+            self.assertEqual(0, len([f for f in os.listdir(tmp) if f.endswith(ParseCache.SUFFIX)]))
+
+# Check that problems parsed in a session share their symbols
+class TestProblemSession(unittest.TestCase):
+
+    def test_shared_symbols(self):
+        files = ['pddl/earth_observation/p0{}.pddl'.format(i) for i in range(1, 4)]
+        session = ProblemSession('pddl/earth_observation/domain.pddl')
+        problems = [p for _, p in session.parse_many(files)]
+        self.assertEqual([repr(PDDLParser.parse(f)) for f in files], [repr(p) for p in problems])
+
+        terms = {}
+        for problem in problems:
+            for pred in problem.init:
+                self.assertIs(session.symbols.name(pred.name), pred.name)
+                for arg in pred.args:
+                    self.assertIs(terms.setdefault((arg.name, arg.type), arg), arg)
+
+    def test_session_does_not_grow(self):
+        # atoms, literals and objects stay with each problem, the session keeps the domain symbols
+        session = ProblemSession('pddl/earth_observation/domain.pddl')
+        size = len(session.symbols)
+        for _, problem in session.parse_many(['pddl/earth_observation/p0{}.pddl'.format(i) for i in range(1, 4)]):
+            self.assertIsNotNone(problem)
+        self.assertEqual(size, len(session.symbols))
+        self.assertEqual(({}, {}, {}), (session.symbols.atoms, session.symbols.argument_tuples,
+                                        session.symbols._literals))
+
+    def test_parent_table(self):
+        parent = SymbolTable()
+        name, constant = parent.name('at'), parent.constant('b1', 'block')
+        child = SymbolTable(parent)
+        self.assertIs(name, child.name(''.join(['a', 't'])))
+        self.assertIs(constant, child.constant('b1', 'block'))
+        child.atom('at', [child.constant('b2')])
+        self.assertEqual((3, 1), (len(parent), len(parent._typed_constants)))    # at, b1, block
+        self.assertEqual({}, parent.atoms)
+
+# Check parsing from memory
+class TestParseInMemory(unittest.TestCase):
+
+    def test_string_bytes_stream(self):
+        for filename in ['pddl/blocksworld/domain.pddl', 'pddl/blocksworld/problems/probBLOCKS-04-0.pddl']:
+            expected = repr(PDDLParser.parse(filename))
+            with open(filename, 'rb') as f:
+                data = f.read()
+            self.assertEqual(expected, repr(PDDLParser.parse_bytes(data)))
+            self.assertEqual(expected, repr(PDDLParser.parse_bytes(memoryview(bytearray(data)))))
+            self.assertEqual(expected, repr(PDDLParser.parse_string(data.decode('utf-8'))))
+            self.assertEqual(expected, repr(PDDLParser.parse_stream(io.BytesIO(data))))
+            self.assertEqual(expected, repr(PDDLParser.parse_stream(io.StringIO(data.decode('utf-8')))))
+
+    def test_comments_and_case(self):
+        problem = PDDLParser.parse_string('(DEFINE (PROBLEM p) ; comment\r\n (:domain d) (:init (At B1)) (:goal (at b1)))')
+        self.assertEqual('p', problem.name)
+        self.assertEqual('(at b1)', repr(problem.init[0]))
+
+
+class TestLazyParsing(unittest.TestCase):
+
+    def test_same_problem(self):
+        for filename in ['pddl/blocksworld/problems/probBLOCKS-04-0.pddl', 'pddl/mtp-example/mtp-problem.pddl']:
+            problem = PDDLParser.parse(filename, lazy=True)
+            self.assertIsNotNone(problem._init_loader)
+            self.assertEqual(repr(PDDLParser.parse(filename)), repr(problem))
+            self.assertIsNone(problem._init_loader)
+
+    def test_grammar_fallback(self):
+        # negated atoms are not allowed in :init, which is only noticed when decoding it
+        problem = PDDLParser.parse_string('(define (problem p) (:domain d) (:init (at b1) (not (on b1 b2))) (:goal (at b1)))', lazy=True)
+        self.assertEqual('p', problem.name)
+        with self.assertRaises(ValueError):
+            problem.init
+
+    def test_shared_symbols(self):
+        problem = PDDLParser.parse_string('(define (problem p) (:domain d) (:objects b1) (:init (and (at b1) (clear))) (:goal (at b1)))', lazy=True)
+        self.assertEqual(['(at b1)', '(clear)'], [repr(p) for p in problem.init])
+        self.assertIs(problem.goal[0].predicate.name, problem.init[0].name)
+
+    def test_init_alone_is_not_a_document(self):
+        # lazy :init sections are decoded by a parser of their own, not by the document grammar
+        self.assertIsNone(PDDLParser.parse_string('(:init (on a b))'))
+        self.assertIsInstance(PDDLParser.check_string('(:init (on a b))'), PDDLSyntaxError)
+
+
+class TestSyntaxCheck(unittest.TestCase):
+
+    def test_valid_files(self):
+        for filename in ['pddl/blocksworld/domain.pddl', 'pddl/blocksworld/problems/probBLOCKS-04-0.pddl',
+                         'pddl/mtp-example/mtp-domain.pddl']:
+            self.assertIsNone(PDDLParser.check(filename))
+
+    def test_first_error(self):
+        error = PDDLParser.check_string('(define (domain d)\n  (:predicates (p ?x)\n   (q ?x ?) ;?\n  ))')
+        self.assertIsInstance(error, PDDLSyntaxError)
+        self.assertEqual((3, 10, '?'), (error.lineno, error.column, error.token))
+
+        error = PDDLParser.check_string('(define (domain d)\n  (:predicates (p ?x)')
+        self.assertEqual((2, 22, None), (error.lineno, error.column, error.token))
+
+    def test_error_in_file(self):
+        error = PDDLParser.check('pddl/test/domain-zeno.pddl')
+        self.assertEqual('pddl/test/domain-zeno.pddl:56:8: unexpected \'forall\'', str(error))
+
+    def test_file_normalized_once(self):
+        # files are normalized when read, and lexed as they are
+        from pypddl import pddlparser
+        with unittest.mock.patch.object(pddlparser, '_normalize_text', side_effect=AssertionError) as normalize:
+            self.assertIsNone(PDDLParser.check('pddl/blocksworld/domain.pddl'))
+        self.assertFalse(normalize.called)
+
+
+class TestRegexLexer(unittest.TestCase):
+
+    def tokens(self, parser, text):
+        parser._lexer.input(text)
+        parser._lexer.lineno = 1
+        return [str(t) for t in parser._lexer]
+
+    def test_same_tokens_as_ply(self):
+        regex, ply = PDDLParser(lexer='regex'), PDDLParser(lexer='ply')
+        for filename in ['pddl/blocksworld/domain.pddl', 'pddl/blocksworld/problems/probBLOCKS-04-0.pddl',
+                         'pddl/mtp-example/mtp-domain.pddl', 'pddl/mtp-example/mtp-problem.pddl']:
+            with open(filename) as f:
+                text = re.sub(';[^\n]*', '', f.read().lower())
+            self.assertEqual(self.tokens(ply, text), self.tokens(regex, text))
+            self.assertEqual(repr(ply.parse(filename)), repr(regex.parse(filename)))
+
+    def test_tokens(self):
+        tokens = self.tokens(PDDLParser(), '(:init\n  (at ?x b-1)\n\t(probabilistic 0.25 (p)))')
+        self.assertEqual("LexToken(INIT_KEY,':init',1,1)", tokens[1])
+        self.assertEqual("LexToken(VARIABLE,'?x',2,13)", tokens[4])
+        self.assertEqual("LexToken(PROBABILITY,0.25,3,37)", tokens[9])
+
+    def test_illegal_character(self):
+        error = PDDLParser(lexer='regex').check_string('(define (domain d)\n  (:predicates (p ?x) (q 1)))')
+        self.assertEqual((2, 26, '1'), (error.lineno, error.column, error.token))
+        with self.assertRaises(ValueError):
+            PDDLParser(lexer='lex')
+
+
+class TestFlatSections(unittest.TestCase):
+
+    def test_decode_objects(self):
+        symbols = SymbolTable()
+        objects = decode_objects(' b1 b2 - block\n t1 - table ', symbols, reserved)
+        self.assertEqual([('b1', 'block'), ('b2', 'block'), ('t1', 'table')], [(o.name, o.type) for o in objects])
+        self.assertIs(objects[0], symbols.constant('b1', 'block'))
+        self.assertEqual(['a', 'b'], [o.name for o in decode_objects('a b', symbols, reserved)])
+        for body in ['a - t b', 'a - - t', 'a -t', 'a - domain', '']:
+            self.assertIsNone(decode_objects(body, symbols, reserved), body)
+
+    def test_decode_ground_atoms(self):
+        symbols = SymbolTable()
+        atoms = decode_ground_atoms(' (and (at b1 t1)\n (clear b1) ( on-table  b1 ))', symbols, reserved)
+        self.assertEqual(['(at b1 t1)', '(clear b1)', '(on-table b1)'], [repr(a) for a in atoms])
+        self.assertIs(atoms[0].args[0], atoms[1].args[0])
+        self.assertEqual([], decode_ground_atoms(' ', symbols, reserved))
+        for body in ['(at ?x)', '(not (at b1))', '(at b1) junk', '(at and)', '(and)', '(and (at b1)) (at b2)']:
+            self.assertIsNone(decode_ground_atoms(body, symbols, reserved), body)
+
+    def test_same_as_grammar(self):
+        text = '(define (problem p) (:domain d) (:objects b1 b2 - block t1 - table) (:init (at b1 t1) (clear b2)) (:goal (at b1 t1)))'
+        problem = PDDLParser.parse_string(text)
+        self.assertEqual({'block': ['b1', 'b2'], 'table': ['t1']}, problem.objects)
+        self.assertEqual(['(at b1 t1)', '(clear b2)'], [repr(a) for a in problem.init])
+        # the lexer takes ':b2' for a name but the scanner does not, so the grammar parses both sections
+        problem = PDDLParser.parse_string(text.replace('b2', ':b2'))
+        self.assertEqual({'block': ['b1', ':b2'], 'table': ['t1']}, problem.objects)
+        self.assertEqual(['(at b1 t1)', '(clear :b2)'], [repr(a) for a in problem.init])
+        self.assertIsNone(PDDLParser.parse_string(text.replace('- table', '- table b3')))
+
+class TestInterning(unittest.TestCase):
+
+    def test_terms_are_interned(self):
+        self.assertIs(Term.constant('b1'), Term.constant('b1'))
+        self.assertIsNot(Term.constant('b1'), Term.variable('b1'))
+        self.assertIsNot(Term.constant('b1'), Term.constant('b1', 'block'))
+        term = Term.variable('?x', 'block')
+        self.assertIs(term, pickle.loads(pickle.dumps(term)))
+        self.assertIs(term, copy.deepcopy(term))
+
+    def test_immutable(self):
+        pred = Predicate('on', [Term.constant('a'), Term.constant('b')])
+        for obj, attr in [(Term.constant('a'), '_name'), (pred, '_args'), (SymbolTable().literal(pred), '_positive')]:
+            with self.assertRaises(AttributeError):
+                setattr(obj, attr, None)
+        with self.assertRaises(AttributeError):
+            pred.colour = 'red'
+
+    def test_argument_tuples_are_shared(self):
+        text = '(define (problem p) (:domain d) (:objects a b) (:init (road a b) (path a b)) (:goal (road a b)))'
+        road, path = PDDLParser.parse_string(text).init
+        self.assertIs(road.args, path.args)
+        symbols = SymbolTable()
+        a, b = symbols.constant('a'), symbols.constant('b')
+        self.assertIs(symbols.atom('road', [a, b]).args, symbols.atom('path', (a, b)).args)
+
+    def test_parsed_atoms_are_shared(self):
+        text = '(define (problem p) (:domain d) (:objects a b) (:init (on a b) (on a b) (clear a)) (:goal (and (on a b) (not (clear a)))))'
+        problem = PDDLParser.parse_string(text)
+        self.assertIs(problem.init[0], problem.init[1])
+        self.assertIs(problem.init[0], problem.goal[0].predicate)
+        self.assertEqual(problem.init[0], Predicate('on', [Term.constant('a'), Term.constant('b')]))
+        self.assertNotEqual(problem.init[0], problem.init[2])
+        self.assertEqual(repr(problem), repr(pickle.loads(pickle.dumps(problem))))
+
+    def test_typed_parameters(self):
+        domain = PDDLParser.parse('pddl/blocksworld/domain.pddl')
+        params = domain.operators[0].params
+        self.assertTrue(params and all(p.is_variable() and p.is_typed() for p in params))
+        self.assertFalse(Term.variable(params[0].name).is_typed())
+
+
+class TestHashing(unittest.TestCase):
+
+    def test_equal_objects_hash_alike(self):
+        args = [Term.constant('a'), Term.variable('?x', 'block')]
+        pred, other = Predicate('on', args), Predicate('on', list(args))
+        self.assertIsNot(pred, other)
+        self.assertEqual(pred, other)
+        self.assertEqual(hash(pred), hash(other))
+        self.assertEqual(hash(Literal(pred, False)), hash(Literal(other, False)))
+        self.assertEqual(1, len({pred, other, SymbolTable().atom('on', args)}))
+        self.assertEqual(2, len({Literal(pred), Literal(other), Literal(pred, False)}))
+        self.assertNotEqual(pred, Predicate('on', args[::-1]))
+
+    def test_term_equality_is_boolean(self):
+        self.assertIs(Term.constant('a') == Term.constant('a'), True)
+        self.assertIs(Term.constant('a') == Term.constant('b'), False)
+        self.assertIs(Term.constant('a') == 'a', False)
+        self.assertIs(Term.constant('a') != Term.variable('a'), True)
+        self.assertEqual(hash(Term.constant('a', 'block')), hash(pickle.loads(pickle.dumps(Term.constant('a', 'block')))))
+
+
+class TestReadOnlyViews(unittest.TestCase):
+
+    def test_domain_getters(self):
+        domain = PDDLParser.parse('pddl/blocksworld/domain.pddl')
+        self.assertIs(domain.operators, domain.operators)
+        self.assertIsInstance(domain.predicates, tuple)
+        self.assertEqual(['block'], domain.types[''])
+        with self.assertRaises(TypeError):
+            domain.types['cell'] = []
+        with self.assertRaises(AttributeError):
+            domain.operators.append(None)
+
+    def test_mutation_methods(self):
+        domain = PDDLParser.parse('pddl/blocksworld/domain.pddl')
+        action = domain.operators[0]
+        self.assertIs(action.precond, action.precond)
+        literal = SymbolTable().literal(Predicate('handempty'), False)
+        action.add_precond(literal)
+        action.add_effect((1.0, literal))
+        self.assertIs(literal, action.precond[-1])
+        self.assertTrue(repr(action).endswith('(not (handempty)))\n\t)'))
+        domain.add_pred('act', [])
+        domain.del_pred('handempty', 0)
+        self.assertEqual(['on', 'ontable', 'clear', 'holding', 'act'], [p.name for p in domain.predicates])
+        domain.del_action(action.name)
+        self.assertNotIn(action, domain.operators)
+
+
+numpy_int32 = facts.np and facts.np.int32
+
+
+@unittest.skipIf(facts.np is None, 'numpy is not installed')
+class TestFactStore(unittest.TestCase):
+
+    def test_round_trip(self):
+        problem = PDDLParser.parse('pddl/blocksworld/problems/probBLOCKS-04-2.pddl')
+        init = list(problem.init)
+        text = repr(problem)
+        store = problem.compact()
+        self.assertEqual(len(init), len(store))
+        self.assertIsNone(problem._init)
+        self.assertEqual(init, problem.init)
+        self.assertEqual(text, repr(problem))
+
+    def test_queries(self):
+        text = '(define (problem p) (:domain d) (:objects a b c) (:init (on a b) (clear a) (on b c) (handempty)) (:goal (on a c)))'
+        store = facts.FactStore.from_atoms(PDDLParser.parse_string(text).init)
+        self.assertEqual([('on', 2), ('clear', 1), ('handempty', 0)], store.predicates)
+        self.assertEqual([[0, 1], [1, 2]], store.facts('on').tolist())
+        self.assertEqual((1, 0), store.facts('handempty').shape)
+        self.assertEqual([[1, 2]], store.select('on', [None, 'c']).tolist())
+        self.assertEqual(0, len(store.select('on', ['d', None])))
+        self.assertEqual(numpy_int32, store.facts('on').dtype)
+        with self.assertRaises(ValueError):
+            store.facts('on')[0, 0] = 2
+
+
+class TestFactIndex(unittest.TestCase):
+
+    text = '(define (problem p) (:domain d) (:objects c0 c1 c2) (:init (adj c0 c1) (adj c1 c2) (adj c2 c1) (at c0) (at c0)) (:goal (at c2)))'
+
+    def test_queries(self):
+        problem = PDDLParser.parse_string(self.text)
+        index = problem.index
+        self.assertEqual(['(adj c0 c1)', '(adj c2 c1)'], [repr(a) for a in index.match('adj', [None, 'c1'])])
+        self.assertEqual(['(adj c1 c2)'], [repr(a) for a in index.match('adj', [Term.variable('?x'), Term.constant('c2')])])
+        self.assertEqual(3, len(index.match('adj')))
+        self.assertEqual([], index.match('adj', ['c1', 'c0']))
+        self.assertEqual([], index.match('adj', ['c1']))
+        self.assertTrue(index.holds('adj', ['c2', 'c1']))
+        self.assertFalse(index.holds('at', ['c1']))
+        self.assertIn(problem.init[0], index)
+        self.assertEqual((5, 2), (len(index), index.count(problem.init[-1])))
+
+    def test_kept_up_to_date(self):
+        problem = PDDLParser.parse_string(self.text)
+        index = problem.index
+        problem.add_to_init(Predicate('at', [Term.constant('c1')]))
+        self.assertTrue(index.holds('at', ['c1']))
+        problem.init = problem.init[1:4]
+        self.assertIs(index, problem.index)
+        self.assertFalse(index.holds('adj', ['c0', 'c1']))
+        self.assertEqual(1, index.count(problem.init[-1]))
+        self.assertEqual(3, len(index))
+        problem.init = lambda: []
+        self.assertEqual(0, len(problem.index))
+
+
+class TestEffects(unittest.TestCase):
+
+    text = """(define (domain d) (:requirements :non-deterministic)
+        (:predicates (at ?x) (broken) (scratch))
+        (:action move :parameters (?x ?y)
+            :precondition (at ?x)
+            :effect (oneof (and (not (at ?x)) (at ?y)) (and (broken) (when (at ?x) (scratch))))))"""
+
+    def test_parsed_effects(self):
+        action = PDDLParser.parse_string(self.text).operators[0]
+        effects = action.effects
+        self.assertIsInstance(effects, And)
+        self.assertIsInstance(effects.effects[0], OneOf)
+        when = effects.effects[0].effects[1].effects[1]
+        self.assertIsInstance(when, When)
+        self.assertEqual('(scratch)', repr(when.effect))
+        found = [e.literal for e in walk(effects) if isinstance(e, Probabilistic)]
+        self.assertEqual(['(not (at ?x))', '(at ?y)', '(broken)', '(at ?x)', '(scratch)'], [repr(l) for l in found])
+        self.assertEqual(found, literals(effects))
+
+    def test_legacy_round_trip(self):
+        domain = PDDLParser.parse_string(self.text)
+        effects = domain.operators[0].effects
+        legacy = to_legacy(effects)
+        self.assertEqual(effects, from_legacy(legacy))
+        self.assertEqual(legacy, domain.operators[0].legacy_effects)
+        at = Literal(Predicate('at', [Term.variable('?x')]), True)
+        domain.operators[0].effects = [(1.0, at)]
+        self.assertEqual(And([Probabilistic(1.0, at)]), domain.operators[0].effects)
+        labeled = from_legacy([('label', 'd1', [(0.5, at)]), ('forall', [(1.0, at)])])
+        self.assertEqual('(and (d1 (at ?x)) (forall (at ?x)))', repr(labeled))
+        self.assertRaises(ValueError, from_legacy, 'at')
+
+    def test_immutable(self):
+        effect = Labeled('d1', And([]))
+        self.assertRaises(AttributeError, setattr, effect, 'label', 'd2')
+        self.assertEqual(effect, pickle.loads(pickle.dumps(effect)))
+        self.assertEqual(hash(effect), hash(Labeled('d1', And(()))))
+
+
+class TestTypeClosure(unittest.TestCase):
+
+    domain_text = """(define (domain d) (:requirements :typing)
+        (:types truck airplane - vehicle vehicle package - locatable location)
+        (:constants depot - location t0 - truck)
+        (:predicates (at ?x - locatable ?l - location)))"""
+    problem_text = """(define (problem p) (:domain d)
+        (:objects t1 - truck a1 - airplane p1 - package l1 - location)
+        (:init (at t1 l1)) (:goal (at p1 l1)))"""
+
+    def test_closure(self):
+        domain = PDDLParser.parse_string(self.domain_text)
+        self.assertEqual({'locatable', 'vehicle', 'truck', 'airplane', 'package'}, domain.subtypes('locatable'))
+        self.assertTrue(domain.is_subtype('truck', 'locatable'))
+        self.assertFalse(domain.is_subtype('location', 'vehicle'))
+        self.assertIs(domain.type_closure, domain.type_closure)
+        domain.add_type('ship', 'vehicle')
+        self.assertTrue(domain.is_subtype('ship', 'locatable'))
+
+    def test_objects_of_type(self):
+        domain = PDDLParser.parse_string(self.domain_text)
+        problem = PDDLParser.parse_string(self.problem_text)
+        self.assertEqual(('t1', 'a1', 't0'), problem.objects_of_type('vehicle', domain))
+        self.assertEqual(('l1', 'depot'), problem.objects_of_type('location', domain))
+        self.assertEqual(('t1',), problem.objects_of_type('truck'))
+        self.assertEqual(6, len(problem.objects_of_type('object', domain)))
+        self.assertIs(problem.objects_of_type('vehicle', domain), problem.objects_of_type('vehicle', domain))
+        problem.add_object('t2', 'truck')
+        self.assertEqual(('t1', 't2', 'a1', 't0'), problem.objects_of_type('vehicle', domain))
+        domain.constants = {}
+        self.assertEqual(('t1', 't2', 'a1'), problem.objects_of_type('vehicle', domain))
+
+
+class TestRegistries(unittest.TestCase):
+
+    def test_predicates(self):
+        domain = PDDLParser.parse('pddl/blocksworld/domain.pddl')
+        names = [(p.name, p.arity) for p in domain.predicates]
+        domain.add_pred('open', [('?x', 'block'), 'table'])
+        self.assertEqual('(open ?x - block table)', repr(domain.predicate('open', 2)))
+        self.assertIsNone(domain.predicate('open', 1))
+        domain.del_pred('handempty', 0)
+        domain.del_pred('handempty', 0)
+        self.assertEqual([n for n in names if n != ('handempty', 0)] + [('open', 2)],
+                         [(p.name, p.arity) for p in domain.predicates])
+
+    def test_actions(self):
+        domain = PDDLParser.parse('pddl/blocksworld/domain.pddl')
+        names = [op.name for op in domain.operators]
+        pick_up = domain.action('pick-up')
+        self.assertIs(pick_up, domain.operators[names.index('pick-up')])
+        domain.add_action(pick_up)
+        domain.add_action('noop', [], [], [])
+        self.assertEqual(names + ['pick-up', 'noop'], [op.name for op in domain.operators])
+        domain.del_action('pick-up')
+        self.assertIsNone(domain.action('pick-up'))
+        self.assertEqual([n for n in names if n != 'pick-up'] + ['noop'], [op.name for op in domain.operators])
+        self.assertIs(domain.operators, domain.operators)
+        copy = pickle.loads(pickle.dumps(domain))
+        self.assertEqual(repr(domain), repr(copy))
+
+    def test_add_text(self):
+        problem = PDDLParser.parse('pddl/blocksworld/problems/probBLOCKS-04-0.pddl')
+        problem.add_to_init_text('clear', ['a'])
+        problem.add_to_goal_text('clear', ['b'])
+        self.assertTrue(problem.index.holds('clear', ['a']))
+        self.assertEqual('(clear b)', repr(problem.goal[-1]))
+
+
+class TestClone(unittest.TestCase):
+
+    def test_clone_domain(self):
+        domain = PDDLParser.parse('pddl/robot/domain.pddl')
+        text = repr(domain)
+        clone = domain.clone()
+        self.assertEqual(text, repr(clone))
+        self.assertIs(domain.predicates[0], clone.predicates[0])
+        self.assertIs(domain.operators[0].effects, clone.operators[0].effects)
+        clone.del_pred(domain.predicates[0].name, domain.predicates[0].arity)
+        clone.add_type('robot')
+        clone.operators[0].add_precond(clone.operators[0].precond[0])
+        clone.del_action(domain.operators[-1].name)
+        self.assertEqual(text, repr(domain))
+        self.assertNotEqual(text, repr(clone))
+
+    def test_clone_problem(self):
+        for lazy in (False, True):
+            problem = PDDLParser.parse('pddl/robot/boxes/problem01.pddl', lazy=lazy)
+            text = repr(problem)
+            clone = problem.clone()
+            self.assertIs(problem.init, clone.init)
+            clone.add_to_init(Predicate('act'))
+            clone.add_object('box9', 'box')
+            clone.add_to_goal(Literal(Predicate('act')))
+            self.assertEqual(text, repr(problem))
+            self.assertIn('(act)', repr(clone))
+            self.assertIsNot(problem.init, clone.init)
+            self.assertEqual(problem.init, clone.init[:-1])
+            self.assertTrue(clone.index.holds('act'))
+            self.assertFalse(problem.index.holds('act'))
+
+    def test_pickle_clone(self):
+        # atoms added to a clone and not yet appended to its init are pickled once
+        problem = PDDLParser.parse('pddl/robot/boxes/problem01.pddl')
+        clone = problem.clone()
+        clone.add_to_init(Predicate('act'))
+        for copied in (pickle.loads(pickle.dumps(clone)), copy.deepcopy(clone)):
+            self.assertEqual(len(problem.init) + 1, len(copied.init))
+            self.assertEqual(clone.init, copied.init)
+        self.assertEqual(len(problem.init) + 1, len(clone.init))
+
+    def test_mtp_variants(self):
+        domain = PDDLParser.parse('pddl/mtp-example/labeled-domain.pddl')
+        problem = PDDLParser.parse('pddl/mtp-example/labeled-problem.pddl')
+        text = repr(domain), repr(problem)
+        with tempfile.TemporaryDirectory() as tmp:
+            out_domain, out_problem = os.path.join(tmp, 'domain.pddl'), os.path.join(tmp, 'problem.pddl')
+            variants = []
+            for _ in range(2):
+                variant_domain, variant_problem = domain.clone(), problem.clone()
+                hierarchy, goal = multi_tier_compilation_problem(variant_problem, out_problem)
+                multi_tier_compilation_domain(variant_domain, hierarchy, goal, out_domain)
+                variants.append((repr(variant_domain), repr(variant_problem)))
+        self.assertEqual(text, (repr(domain), repr(problem)))
+        self.assertEqual(variants[0], variants[1])
+
+
+class TestFingerprint(unittest.TestCase):
+
+    domain_file = 'pddl/blocksworld/domain.pddl'
+    problem_file = 'pddl/blocksworld/problems/probBLOCKS-04-0.pddl'
+
+    def test_stable(self):
+        # the digests do not depend on the process (e.g., on hash randomization)
+        self.assertEqual('99559076a5494fd519d8732ff1d81147', PDDLParser.parse(self.domain_file).fingerprint())
+        self.assertEqual('00130494b5814885759fea49863d3580', PDDLParser.parse(self.problem_file).fingerprint())
+
+    def test_order_insensitive(self):
+        problem = PDDLParser.parse(self.problem_file)
+        other = PDDLParser.parse(self.problem_file)
+        other.init = list(reversed(other.init))
+        other.goal = list(reversed(other.goal))
+        self.assertEqual(problem.fingerprint(), other.fingerprint())
+        domain = PDDLParser.parse(self.domain_file)
+        other = PDDLParser.parse(self.domain_file)
+        other.operators = reversed(other.operators)
+        other.predicates = reversed(other.predicates)
+        other.operators[0].precond = reversed(other.operators[0].precond)
+        self.assertEqual(domain.fingerprint(), other.fingerprint())
+
+    def test_updated_on_changes(self):
+        problem = PDDLParser.parse(self.problem_file)
+        first = problem.fingerprint()
+        self.assertIs(first, problem.fingerprint())
+        problem.add_to_init(Predicate('handempty'))
+        changed = problem.fingerprint()
+        self.assertNotEqual(first, changed)
+        other = PDDLParser.parse(self.problem_file)
+        other.init = [Predicate('handempty')] + other.init
+        self.assertEqual(changed, other.fingerprint())
+        problem.add_object('e', None)
+        self.assertNotEqual(changed, problem.fingerprint())
+
+        domain = PDDLParser.parse(self.domain_file)
+        first = domain.fingerprint()
+        action = domain.action('stack')
+        action.add_precond(action.precond[0])
+        self.assertNotEqual(first, domain.fingerprint())
+        domain.del_pred('handempty', 0)
+        self.assertNotEqual(first, domain.fingerprint())
+
+    def test_effect_goals(self):
+        # goals that are not literals, e.g., an unlabeled oneof, are digested as effects
+        text = '(define (problem p) (:domain d) (:init (f a)) (:goal (oneof (f a) (f b))))'
+        problem = PDDLParser.parse_string(text)
+        self.assertNotIsInstance(problem.goal[0], Literal)
+        self.assertEqual(problem.fingerprint(), PDDLParser.parse_string(text).fingerprint())
+        self.assertNotEqual(problem.fingerprint(), PDDLParser.parse_string(text.replace('(f b)', '(f c)')).fingerprint())
+
+
+class TestWriter(unittest.TestCase):
+
+    files = ['pddl/blocksworld/domain.pddl', 'pddl/blocksworld/problems/probBLOCKS-04-0.pddl',
+             'pddl/earth_observation/domain.pddl', 'pddl/mtp-example/labeled-domain.pddl',
+             'pddl/mtp-example/labeled-problem.pddl', 'pddl/logistics/problems/strips-log-x-1.pddl']
+
+    def test_same_as_repr(self):
+        for filename in self.files:
+            model = PDDLParser.parse(filename)
+            for buffer_size in (1, 1 << 16):
+                out = io.StringIO()
+                model.write(out, buffer_size)
+                self.assertEqual(repr(model), out.getvalue())
+        action = PDDLParser.parse(self.files[0]).operators[0]
+        out = io.StringIO()
+        action.write(out)
+        self.assertEqual(repr(action), out.getvalue())
+
+    def test_batches(self):
+        problem = Problem('p', 'd', [], [Predicate('at', [Term.constant('c{}'.format(i))]) for i in range(3000)],
+                          [Literal(Predicate('done'))])
+        text = repr(problem)
+        self.assertNotIn(':objects', text)
+        self.assertEqual(3000, text.count('(at c'))
+        self.assertIn('(at c2999))\n\t(:goal (and \n\t\t(done)))\n)', text)
+
+
+class TestBinary(unittest.TestCase):
+
+    files = ['pddl/blocksworld/domain.pddl', 'pddl/blocksworld/problems/probBLOCKS-04-0.pddl',
+             'pddl/earth_observation/domain.pddl', 'pddl/mtp-example/labeled-domain.pddl',
+             'pddl/mtp-example/labeled-problem.pddl', 'pddl/logistics/problems/strips-log-x-1.pddl']
+
+    def test_round_trip(self):
+        for filename in self.files:
+            model = PDDLParser.parse(filename)
+            for lazy in (False, True):
+                loaded = binary.loads(binary.dumps(model), lazy=lazy)
+                self.assertEqual(repr(model), repr(loaded))
+                self.assertEqual(model.fingerprint(), loaded.fingerprint())
+
+    def test_load_file(self):
+        problem = PDDLParser.parse(self.files[1])
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'problem.bin')
+            binary.dump(problem, filename)
+            loaded = binary.load(filename, lazy=True)     # init decoded from the mmap on access
+            self.assertEqual(problem.init, loaded.init)
+            with open(filename, 'rb') as f:
+                self.assertEqual(repr(problem), repr(binary.load(f)))
+        self.assertEqual(repr(problem), repr(binary.load(io.BytesIO(binary.dumps(problem)))))
+
+    def test_size(self):
+        locations = [Term.constant('l{}'.format(i)) for i in range(300)]
+        init = [Predicate('road', [locations[i % 300], locations[i // 300]]) for i in range(3000)]
+        problem = Problem('roads', 'roads', locations, init, [Literal(Predicate('at', locations[:1]))])
+        data = binary.dumps(problem)
+        self.assertLess(len(data) * 2, len(repr(problem)))
+        self.assertEqual(init, binary.loads(data).init)
+
+    def test_domain_and_problem(self):
+        domain, problem = PDDLParser.parse(self.files[0]), PDDLParser.parse(self.files[1])
+        loaded = binary.loads(binary.dumps((domain, problem)))
+        self.assertEqual((repr(domain), repr(problem)), tuple(map(repr, loaded)))
+
+    def test_bad_input(self):
+        data = binary.dumps(PDDLParser.parse(self.files[1]))
+        with self.assertRaises(ValueError):
+            binary.loads(b'(define (problem p))')
+        with self.assertRaises(ValueError):
+            binary.loads(data[:8] + (binary.VERSION + 1).to_bytes(4, 'little') + data[12:])
+        with self.assertRaises(TypeError):
+            binary.dumps('problem')
+
+    def test_effect_goals(self):
+        # oneof goals parse into effects, which may also be given alongside literal goals
+        problem = PDDLParser.parse_string('(define (problem p) (:domain d) (:init (f a)) (:goal (oneof (f a) (f b))))')
+        self.assertEqual(problem.goal, binary.loads(binary.dumps(problem)).goal)
+        mixed = Problem('p', 'd', [], problem.init, [Literal(problem.init[0], False)] + problem.goal)
+        self.assertEqual(mixed.goal, binary.loads(binary.dumps(mixed)).goal)
+
+    def test_truncated_input(self):
+        # every prefix of a valid encoding, and corrupt section headers, raise ValueError
+        data = binary.dumps(PDDLParser.parse(self.files[1]))
+        for size in range(len(data)):
+            with self.assertRaises(ValueError):
+                binary.loads(data[:size])
+        corrupt = bytearray(data)
+        corrupt[16] = ord('x')      # typecode of the first section
+        with self.assertRaises(ValueError):
+            binary.loads(bytes(corrupt))
+        corrupt = bytearray(data)
+        corrupt[24:32] = (1 << 40).to_bytes(8, 'little')     # length of the first section
+        with self.assertRaises(ValueError):
+            binary.loads(bytes(corrupt))
+
+    @staticmethod
+    def _item_offset(data, section, item):
+        # offset of an item of a section of an encoding, as binary._sections reads it
+        offset = binary._HEADER.size
+        for i in range(section + 1):
+            code, count = binary._SECTION.unpack_from(data, offset)
+            offset += binary._SECTION.size
+            size = count * struct.calcsize(code.decode())
+            if i < section:
+                offset += size + (-size % 8)
+        return offset + item * struct.calcsize(code.decode())
+
+    def test_corrupt_ids_and_runs(self):
+        # IDs out of range and runs that do not match the arguments raise
+        # ValueError when loading, lazy or not, instead of decoding other atoms
+        data = binary.dumps(PDDLParser.parse(self.files[1]))
+        corrupt = []
+        count = self._item_offset(data, 5, 2)     # count of the first run of init atoms
+        corrupt.append(data[:count] + struct.pack('<i', 1000) + data[count + 4:])
+        name = self._item_offset(data, 1, 0)      # name of the first term
+        corrupt.append(data[:name] + struct.pack('<i', -5) + data[name + 4:])
+        for wrong in corrupt:
+            for lazy in (False, True):
+                with self.assertRaisesRegex(ValueError, 'corrupt'):
+                    binary.loads(wrong, lazy=lazy).init
+
+
+@unittest.skipIf(facts.np is None, 'numpy is not installed')
+class TestColumnar(unittest.TestCase):
+
+    family = ['pddl/earth_observation/p{:02d}.pddl'.format(i) for i in range(1, 6)]
+
+    def test_round_trip(self):
+        for filename in ['pddl/blocksworld/problems/probBLOCKS-04-0.pddl', 'pddl/logistics/problems/strips-log-x-1.pddl',
+                         'pddl/triangle-tireworld/problems/p01.ppddl'] + self.family[:1]:
+            problem = PDDLParser.parse(filename)
+            out = io.BytesIO()
+            columnar.save_npz(problem, out)
+            out.seek(0)
+            loaded = columnar.load_npz(out)
+            self.assertEqual(repr(problem), repr(loaded))
+            self.assertEqual(problem.fingerprint(), loaded.fingerprint())
+
+    def test_family(self):
+        problems = [PDDLParser.parse(filename) for filename in self.family]
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'family.npz')
+            columnar.save_family_npz(problems, filename)
+            family = columnar.load_family_npz(filename)
+        self.assertEqual(len(problems), len(family))
+        self.assertEqual([p.name for p in problems], family.names)
+        self.assertEqual([repr(p) for p in problems], [repr(p) for p in family.problems()])
+        connected = family.facts('connected')
+        self.assertEqual(sum(1 for p in problems for a in p.init if a.name == 'connected'), len(connected))
+        ids = family.problem_ids('connected')
+        self.assertEqual(len(connected), len(ids))
+        second = family.facts('connected', problem=1)
+        self.assertEqual(connected[ids == 1].tolist(), second.tolist())
+        first = [a for a in problems[1].init if a.name == 'connected'][0]
+        self.assertEqual([arg.name for arg in first.args], family.term_names[second[0]].tolist())
+        self.assertEqual(0, len(family.facts('missing', 2)))
+
+    def test_labeled_goals(self):
+        problem = PDDLParser.parse('pddl/mtp-example/labeled-problem.pddl')
+        with self.assertRaises(ValueError):
+            columnar.save_npz(problem, io.BytesIO())
+
+
 def clean_up_str(string):
     string = string.strip()
     string = re.sub(r"^\s+","", string) 
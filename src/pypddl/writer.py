@@ -0,0 +1,160 @@
+# This file is part of pypddl-parser.
+
+# pypddl-parser is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pypddl-parser is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with pypddl-parser.  If not, see <http://www.gnu.org/licenses/>.
+
+# Streaming PDDL writer: the text of domains, problems and actions as a
+# sequence of chunks (batches of atoms, parts of actions...), written to any
+# file-like object through a buffer. The repr of the model is the join of
+# the same chunks, so writing a model and printing its repr give the same text.
+
+from pypddl.literal import Literal
+from pypddl.effects import Labeled, to_pddl
+
+
+def _joined(items, separator, batch=1024):
+    # separator.join(map(repr, items)), in chunks of up to batch items
+    items = iter(items)
+    first = True
+    while True:
+        texts = [repr(item) for _, item in zip(range(batch), items)]
+        if not texts:
+            return
+        yield separator.join(texts) if first else separator + separator.join(texts)
+        first = False
+
+
+def action_chunks(action):
+    """
+    :param action: Action object
+    :return: generator of the chunks of its PDDL text
+    """
+    yield '\t(:action {name} \n\t\t:parameters ({param})\n\t\t:precondition (and '.format(
+        name=action.name, param=' '.join(repr(p) for p in action.params))
+    for p in action.precond:
+        if not isinstance(p, list):
+            yield ' ' + repr(p)
+        else:   # (or ...) of literals
+            yield ' (or {})'.format(' '.join(repr(x) for x in p))
+    yield ')\n\t\t:effect {effect}\n\t)'.format(effect=to_pddl(action.effects))
+
+
+def _typed_names(names_by_type):
+    # e.g., :types and :constants, names without type ('') go last
+    text = ' '.join('\t\t{} - {}\n'.format(' '.join(names_by_type[t]), t) for t in names_by_type.keys() if not t == '')
+    if '' in names_by_type.keys():
+        text = '\t\t{} {}\n'.format(text, ' '.join(t for t in names_by_type['']))
+    return text
+
+
+def domain_chunks(domain):
+    """
+    :param domain: Domain object
+    :return: generator of the chunks of its PDDL text
+    """
+    yield '(define (domain {})\n'.format(domain.name)
+
+    if domain.requirements is not None:
+        yield '\t(:requirements {})\n'.format(' '.join(domain.requirements))
+
+    if len(domain.types):       # if there are some :types defined
+        yield '\t(:types \n{}\t)\n'.format(_typed_names(domain.types))
+
+    if len(domain.constants):   # there are :constants defined
+        yield '\t(:constants \n{}\t)\n'.format(_typed_names(domain.constants))
+
+    yield '\t(:predicates\n \t\t'
+    yield from _joined(domain.predicates, '\n\t\t')
+    yield '\n\t)\n'
+
+    for i, act in enumerate(domain.operators):
+        if i:
+            yield '\n'
+        yield from action_chunks(act)
+    yield '\n)'
+
+
+def _objects_text(objects):
+    if len(objects) > 0:
+        if len(objects) > 1 or not list(objects.keys())[0] == None:
+            return ' '.join('{} - {}'.format(' '.join(objects[o]), o) for o in objects.keys())
+        return ' '.join(objects[None])
+    return None
+
+
+def _goal_chunks(goal):
+    if goal and isinstance(goal[0], Literal):    # normal goal definition: list of Literals
+        yield from _joined(goal, '\n\t\t')
+        return
+    for g in goal:      # must be a list of Labeled effects - MTP problems with goals per level
+        if not isinstance(g, Labeled):
+            raise ValueError('Something is wrong with the :goal, expected labelled goals: {}'.format(g))
+        atomic_effects = g.effect.effects   # must be Probabilistic effects
+        yield '({} (and {}))\n\t\t'.format(g.label, ' '.join(repr(pred.literal) for pred in atomic_effects))
+
+
+def problem_chunks(problem):
+    """
+    :param problem: Problem object
+    :return: generator of the chunks of its PDDL text
+    """
+    yield '(define (problem {})\n\t(:domain {})\n'.format(problem.name, problem.domain)
+
+    objects = _objects_text(problem.objects)
+    if objects is not None and objects != 'None':   # no :objects line without objects
+        yield '\t(:objects {})\n'.format(objects)
+
+    yield '\t(:init\n\t\t'
+    yield from _joined(problem.init, '\n\t\t')
+    yield ')\n\t(:goal (and \n\t\t'
+    yield from _goal_chunks(problem.goal)
+    yield '))\n)'
+
+
+class BufferedSink(object):
+
+    def __init__(self, file, buffer_size=1 << 16):
+        """
+            Gathers small chunks of text and writes them to file in blocks
+
+        :param file: file-like object with a write method (e.g., sys.stdout)
+        :param buffer_size: characters gathered before each write
+        """
+        self._file = file
+        self._buffer_size = buffer_size
+        self._chunks = []
+        self._size = 0
+
+    def write(self, chunk):
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        if self._size >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._chunks:
+            self._file.write(''.join(self._chunks))
+            self._chunks = []
+            self._size = 0
+
+
+def write_chunks(chunks, file, buffer_size=1 << 16):
+    """
+    :param chunks: iterable of strings (e.g., problem_chunks(problem))
+    :param file: file-like object to write them to
+    :param buffer_size: characters gathered before each write
+    """
+    sink = BufferedSink(file, buffer_size)
+    for chunk in chunks:
+        sink.write(chunk)
+    sink.flush()